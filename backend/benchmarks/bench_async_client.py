@@ -0,0 +1,100 @@
+"""Concurrent-request throughput: blocking boto3 calls vs the AsyncTable executor.
+
+Run against DynamoDB Local (docker-compose.yml) from the backend directory:
+
+    python -m benchmarks.bench_async_client --requests 2000 --concurrency 64
+
+--rtt-ms adds a fixed delay before each request is sent, to approximate the
+network round trip to a real DynamoDB endpoint when the local stand-in is on
+the same host.
+"""
+import argparse
+import asyncio
+import json
+import time
+from uuid import uuid4
+from core.config import settings
+from core.database import LISTING_PARTITION, AsyncTable, init_db
+from utils.helpers import date_bucket, get_sgt_time, to_price_number
+
+def add_round_trip(table, rtt_ms: float):
+    def delay(**kwargs):
+        time.sleep(rtt_ms / 1000)
+    table.meta.client.meta.events.register('before-send.dynamodb', delay)
+
+def seed(table, count: int) -> list:
+    ids = []
+    with table.batch_writer() as batch:
+        for i in range(count):
+            now = get_sgt_time()
+            item_id = str(uuid4())
+            batch.put_item(Item={
+                'id': item_id,
+                'item_name': f"bench item {i}",
+                'category': f"bench {i % 10}",
+                'price': to_price_number(1 + i % 100),
+                'listing': LISTING_PARTITION,
+                'last_updated_dt': now,
+                'last_updated_date': date_bucket(now)
+            })
+            ids.append(item_id)
+    return ids
+
+async def run_blocking(table, ids: list, requests: int, concurrency: int):
+    # What InventoryService did before: synchronous boto3 inside async def
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            table.get_item(Key={'id': ids[i % len(ids)]})
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+
+async def run_executor(table, ids: list, requests: int, concurrency: int):
+    async_table = AsyncTable(table)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await async_table.get_item(Key={'id': ids[i % len(ids)]})
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+
+def measure(runner, table, ids, requests, concurrency) -> dict:
+    start = time.perf_counter()
+    asyncio.run(runner(table, ids, requests, concurrency))
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", default="InventoryBench")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rtt-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    settings.DYNAMODB_TABLE = args.table
+    table = init_db()
+    ids = seed(table, args.items)
+    if args.rtt_ms:
+        add_round_trip(table, args.rtt_ms)
+
+    results = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "rtt_ms": args.rtt_ms,
+        "blocking": measure(run_blocking, table, ids, args.requests, args.concurrency),
+        "executor": measure(run_executor, table, ids, args.requests, args.concurrency),
+    }
+    results["speedup"] = round(
+        results["executor"]["requests_per_second"] / results["blocking"]["requests_per_second"], 2
+    )
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
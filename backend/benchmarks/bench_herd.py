@@ -0,0 +1,111 @@
+"""Thundering herd: DynamoDB reads and latency for bursts of identical requests, with and without coalescing.
+
+Uses the bench_load tables (seeded the same way) and the in-process app with
+the read cache off, so every burst that is not coalesced goes to DynamoDB. Run
+from the backend directory:
+
+    python -m benchmarks.bench_herd --items 10000 --herd 50 --waves 5
+
+Each wave sends --herd identical requests at once, like dashboards refreshing
+together. DynamoDB calls and scanned items come from the app's /metrics,
+diffed around each run.
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import httpx
+from core.config import settings
+from benchmarks.bench_load import percentile, read_costs, seed
+
+CALL_LINE = re.compile(r'^dynamodb_call_duration_seconds_count\{(.*)\} (\S+)$')
+ROUTE_LABEL = re.compile(r'route="([^"]*)"')
+
+HERDS = [
+    # (name, route template, path)
+    ("list_all", "/items/", "/items/"),
+    ("list_category", "/items/", "/items/?category=bench%203"),
+    ("query_sorted_by_category", "/query-items/", "/query-items/?sort_field=category&limit=20"),
+]
+
+def read_calls(text: str) -> dict:
+    # route -> DynamoDB calls, summed over operations and tables
+    calls = {}
+    for line in text.splitlines():
+        match = CALL_LINE.match(line)
+        if match:
+            route = ROUTE_LABEL.search(match.group(1)).group(1)
+            calls[route] = calls.get(route, 0) + float(match.group(2))
+    return calls
+
+async def run_herd(client: httpx.AsyncClient, route: str, path: str, herd: int, waves: int) -> dict:
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+
+    metrics = (await client.get("/metrics")).text
+    calls_before, costs_before = read_calls(metrics), read_costs(metrics)
+    for _ in range(waves):
+        await asyncio.gather(*(one() for _ in range(herd)))
+    metrics = (await client.get("/metrics")).text
+    calls_after, costs_after = read_calls(metrics), read_costs(metrics)
+
+    requests = herd * waves
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "dynamodb_calls": int(calls_after.get(route, 0) - calls_before.get(route, 0)),
+        "scanned_items": int(costs_after.get(route, [0])[0] - costs_before.get(route, [0])[0]),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+async def run(args) -> dict:
+    from main import app
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        for name, route, path in HERDS:
+            results[name] = {}
+            for coalesce in (False, True):
+                settings.COALESCE_ENABLED = coalesce
+                results[name]["coalesced" if coalesce else "independent"] = await run_herd(
+                    client, route, path, args.herd, args.waves
+                )
+            independent, coalesced = results[name]["independent"], results[name]["coalesced"]
+            results[name]["scan_reduction"] = round(
+                1 - coalesced["scanned_items"] / independent["scanned_items"], 3
+            ) if independent["scanned_items"] else None
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--herd", type=int, default=50, help="identical requests per wave")
+    parser.add_argument("--waves", type=int, default=5)
+    parser.add_argument("--table-prefix", default="InventoryLoad")
+    parser.add_argument("--seed-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    # Must be set before main is imported: the service binds its tables then
+    settings.DYNAMODB_TABLE = args.table_prefix
+    settings.AGGREGATES_TABLE = f"{args.table_prefix}Aggregates"
+    settings.NAMES_TABLE = f"{args.table_prefix}Names"
+    settings.CACHE_BACKEND = "none"
+    settings.SNAPSHOT_ENABLED = False
+
+    seed(args.items, args.seed_workers)
+    print(json.dumps({
+        "config": {"items": args.items, "herd": args.herd, "waves": args.waves},
+        "herds": asyncio.run(run(args))
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
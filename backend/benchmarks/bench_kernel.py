@@ -0,0 +1,110 @@
+"""Query kernels: the per-row loops they replaced vs services.kernel and the snapshot columns.
+
+Runs without DynamoDB, from the backend directory:
+
+    python -m benchmarks.bench_kernel --items 100000
+
+The batch cases filter, order and page (or total) one list of synthetic items
+the old way and the kernel way and check that both return the same rows. The
+column cases do the same for a snapshot's integer columns, comparing a bounded
+heap and a Python sum against the NumPy partition and sum.
+"""
+import argparse
+import heapq
+import json
+import random
+import statistics
+import time
+from decimal import Decimal
+from services.kernel import page_items, select_items, total_price
+from services.snapshot import SnapshotData
+from utils.helpers import read_price
+
+def make_items(count: int) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            'id': f"{i:032x}",
+            'item_name': f"item {rng.randrange(count)}",
+            'category': f"category {rng.randrange(50)}",
+            'price': Decimal(f"{rng.randint(1, 999)}.{rng.randrange(100):02d}"),
+            'last_updated_dt': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00.000000+08:00"
+        }
+        for i in range(count)
+    ]
+
+def loop_page(items, name, category, low, high, sort_key, descending, page, limit):
+    items = [item for item in items if name in item.get('item_name', '')]
+    items = [item for item in items if item.get('category') == category]
+    items = [item for item in items if 'price' in item and low <= read_price(item['price']) <= high]
+    items.sort(key=lambda x: x.get(sort_key, ""), reverse=descending)
+    return items[(page - 1) * limit:page * limit]
+
+def kernel_page(items, name, category, low, high, sort_key, descending, page, limit):
+    matches = select_items(items, name=name, category=category, price_range=(low, high))
+    return page_items(matches, sort_key, descending, page, limit)
+
+def loop_sort(items, sort_key, descending, page, limit):
+    items = sorted(items, key=lambda x: x.get(sort_key, ""), reverse=descending)
+    return items[(page - 1) * limit:page * limit]
+
+def loop_total(items):
+    total = Decimal('0')
+    for item in items:
+        total += read_price(item['price'])
+    return total
+
+def heap_order(data, rows, sort_field, descending, count):
+    column = data.prices if sort_field == 'price' else data.updated
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return select(count, rows, key=column.__getitem__)
+
+def loop_rows_total(data, rows):
+    prices = data.prices
+    return Decimal(sum(prices[r] for r in rows)).scaleb(-2)
+
+def timed(fn, repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(latencies), 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    data = SnapshotData()
+    for item in items:
+        data.load(item)
+    data.build_indexes()
+    rows = data.select(category="category 7")
+    cases = {
+        "batch_filter_sort_by_price_page": (
+            loop_page, kernel_page, (items, "item 1", "category 7", Decimal("10"), Decimal("500"), "price", False, 2, 10)
+        ),
+        "batch_sort_by_last_updated_desc_page": (loop_sort, page_items, (items, "last_updated_dt", True, 3, 10)),
+        "batch_sort_by_category_page": (loop_sort, page_items, (items, "category", False, 1, 50)),
+        "batch_total_price": (loop_total, total_price, (items,)),
+        "columns_order_by_price_desc": (heap_order, data.order, (data, rows, "price", True, 30)),
+        "columns_order_by_last_updated": (heap_order, data.order, (data, rows, "last_updated_dt", False, 30)),
+        "columns_total_price": (loop_rows_total, data.total, (data, rows)),
+    }
+
+    results = {}
+    for name, (loop, kernel, case_args) in cases.items():
+        # Bound methods already carry the snapshot
+        kernel_args = case_args[1:] if name.startswith("columns_") else case_args
+        assert loop(*case_args) == kernel(*kernel_args), name
+        results[name] = {
+            "loop_ms": timed(lambda: loop(*case_args), args.repeat),
+            "kernel_ms": timed(lambda: kernel(*kernel_args), args.repeat),
+        }
+    print(json.dumps({"items": args.items, "cases": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
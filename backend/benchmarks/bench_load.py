@@ -0,0 +1,253 @@
+"""Endpoint load test: latency percentiles, throughput and DynamoDB read cost per scenario.
+
+Seeds a separate set of bench tables in DynamoDB Local (docker-compose.yml) or
+moto_server, then drives every endpoint at a fixed concurrency. Run from the
+backend directory:
+
+    python -m benchmarks.bench_load --items 10000 --requests 500 --concurrency 32 --output load.json
+    python -m benchmarks.bench_load --items 10000 --baseline load.json --tolerance 0.25
+
+By default the app runs in-process over an ASGI transport with the read cache
+off. Set --url to load a running server instead; its cache setting then
+applies. Scanned and returned item counts and consumed capacity come from the
+app's /metrics, diffed around each scenario. Seeding is skipped when the bench
+tables already hold --items items. With --baseline, p95 latency, throughput
+and scanned items per request are compared against an earlier --output file.
+Any scenario that is worse by more than --tolerance is listed under
+"regressions", and the exit status is 1.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+import httpx
+from core.config import settings
+
+CATEGORIES = 20
+METRIC_LINE = re.compile(r'^(dynamodb_scanned_items_total|dynamodb_returned_items_total|dynamodb_consumed_capacity_units_total)\{(.*)\} (\S+)$')
+ROUTE_LABEL = re.compile(r'route="([^"]*)"')
+
+def bench_item(i: int, now: str, date: str) -> dict:
+    from core.database import LISTING_PARTITION
+    return {
+        'id': f"bench-{i:08d}",
+        'item_name': f"bench item {i}",
+        'category': f"bench {i % CATEGORIES}",
+        'price': Decimal(f"{1 + i % 500}.99"),
+        'listing': LISTING_PARTITION,
+        'last_updated_dt': now,
+        'last_updated_date': date
+    }
+
+def seed(count: int, workers: int) -> float:
+    from core.database import get_db, init_db
+    from services.aggregates import ALL_SCOPE, rebuild_aggregates
+    from utils.helpers import date_bucket, get_sgt_time
+
+    init_db()
+    db = get_db()
+    aggregates = db.Table(settings.AGGREGATES_TABLE)
+    current = aggregates.get_item(Key={'scope': ALL_SCOPE}).get('Item')
+    if current and int(current['item_count']) == count:
+        return 0.0
+
+    now = get_sgt_time()
+    date = date_bucket(now)
+    start = time.perf_counter()
+
+    def write_range(first: int, last: int):
+        items, names = db.Table(settings.DYNAMODB_TABLE), db.Table(settings.NAMES_TABLE)
+        with items.batch_writer() as item_batch, names.batch_writer() as name_batch:
+            for i in range(first, last):
+                item = bench_item(i, now, date)
+                item_batch.put_item(Item=item)
+                name_batch.put_item(Item={'item_name': item['item_name'], 'id': item['id']})
+
+    step = -(-count // workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda first: write_range(first, min(first + step, count)), range(0, count, step)))
+    rebuild_aggregates(aggregates, (bench_item(i, now, date) for i in range(count)))
+    return time.perf_counter() - start
+
+def percentile(latencies: list, p: float) -> float:
+    # Nearest-rank percentile over sorted latencies
+    index = max(0, min(len(latencies) - 1, int(round(p / 100 * len(latencies))) - 1))
+    return latencies[index]
+
+def read_costs(text: str) -> dict:
+    # route -> [scanned, returned, capacity], summed over operations and tables
+    costs = {}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        route = ROUTE_LABEL.search(labels).group(1)
+        totals = costs.setdefault(route, [0.0, 0.0, 0.0])
+        position = {"dynamodb_scanned_items_total": 0, "dynamodb_returned_items_total": 1}.get(name, 2)
+        totals[position] += float(value)
+    return costs
+
+def scenarios(items: int, rng: random.Random, created: list) -> list:
+    # (name, route template, request factory); each factory returns (method, path, json body)
+    from utils.helpers import date_bucket, get_sgt_time
+    today = date_bucket(get_sgt_time())
+
+    def seeded_id():
+        return f"bench-{rng.randrange(items):08d}"
+
+    def create():
+        return "POST", "/items/", {"name": f"bench new {uuid4()}", "category": f"bench {rng.randrange(CATEGORIES)}", "price": 9.99}
+
+    def delete():
+        return "DELETE", f"/items/{created.pop()}", None
+
+    return [
+        ("list_category", "/items/", lambda: ("GET", f"/items/?category=bench%20{rng.randrange(CATEGORIES)}", None)),
+        ("list_today", "/items/", lambda: ("GET", f"/items/?dt_from={today}", None)),
+        ("summary", "/items/summary", lambda: ("GET", f"/items/summary?category=bench%20{rng.randrange(CATEGORIES)}", None)),
+        ("query_price_sorted", "/query-items/", lambda: (
+            "GET", f"/query-items/?category=bench%20{rng.randrange(CATEGORIES)}&sort_field=price&limit=20"
+                   f"&page={rng.randint(1, 5)}", None)),
+        ("query_price_range", "/query-items/", lambda: (
+            "GET", f"/query-items/?price_min={rng.randint(1, 400)}&price_max=500&sort_field=price&limit=50", None)),
+        ("query_name", "/query-items/", lambda: ("GET", f"/query-items/?name=item%20{rng.randrange(items)}&limit=10", None)),
+        ("create", "/items/", create),
+        ("update_price", "/items/{item_id}/price", lambda: (
+            "PUT", f"/items/{seeded_id()}/price", {"price": round(rng.uniform(1, 500), 2)})),
+        ("delete", "/items/{item_id}", delete),
+    ]
+
+async def run_scenario(client: httpx.AsyncClient, factory, requests: int, concurrency: int, created: list) -> dict:
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            method, path, body = factory()
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+            elif method == "POST":
+                created.append(response.json()["id"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "throughput_rps": round(requests / elapsed, 1),
+    }
+
+async def run(args) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    rng = random.Random(args.seed)
+    created = []
+    results = {}
+    async with client:
+        for name, route, factory in scenarios(args.items, rng, created):
+            if args.only and name not in args.only:
+                continue
+            before = read_costs((await client.get("/metrics")).text)
+            # Deletes remove the items the create scenario added, so the table size holds steady
+            requests = min(args.requests, len(created)) if name == "delete" else args.requests
+            if not requests:
+                continue
+            result = await run_scenario(client, factory, requests, args.concurrency, created)
+            after = read_costs((await client.get("/metrics")).text)
+            scanned, returned, capacity = (
+                a - b for a, b in zip(after.get(route, [0, 0, 0]), before.get(route, [0, 0, 0]))
+            )
+            result.update(
+                scanned_items_per_request=round(scanned / requests, 1),
+                returned_items_per_request=round(returned / requests, 1),
+                consumed_capacity_per_request=round(capacity / requests, 2)
+            )
+            results[name] = result
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        checks = (
+            ("p95_ms", result["p95_ms"] > base["p95_ms"] * (1 + tolerance)),
+            ("throughput_rps", result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance)),
+            ("scanned_items_per_request",
+             result["scanned_items_per_request"] > base["scanned_items_per_request"] * (1 + tolerance)),
+        )
+        for metric, worse in checks:
+            if worse:
+                regressions.append({"scenario": name, "metric": metric, "baseline": base[metric], "current": result[metric]})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--table-prefix", default="InventoryLoad")
+    parser.add_argument("--seed-workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--url", help="base URL of a running server instead of the in-process app")
+    parser.add_argument("--cache", action="store_true", help="keep the in-process read cache on")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # Must be set before main is imported: the service binds its tables then
+    settings.DYNAMODB_TABLE = args.table_prefix
+    settings.AGGREGATES_TABLE = f"{args.table_prefix}Aggregates"
+    settings.NAMES_TABLE = f"{args.table_prefix}Names"
+    if not args.cache:
+        settings.CACHE_BACKEND = "none"
+
+    seed_seconds = seed(args.items, args.seed_workers)
+    report = {
+        "config": {
+            "items": args.items,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "target": args.url or "in-process",
+            "cache": args.cache or bool(args.url),
+            "seed_seconds": round(seed_seconds, 1)
+        },
+        "scenarios": asyncio.run(run(args))
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report["scenarios"], json.load(f), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    if report.get("regressions"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Name search latency: the in-process trigram index vs a linear substring scan.
+
+Runs without DynamoDB, on synthetic names, from the backend directory:
+
+    python -m benchmarks.bench_name_search --names 100000
+
+The linear scan stands in for contains(item_name, :name) evaluated over every
+row, minus the network and read-capacity cost of fetching those rows.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from services.search import NameSearchIndex
+
+WORDS = [
+    "apple", "banana", "cherry", "grape", "lemon", "mango", "melon", "orange", "peach", "pear",
+    "juice", "pie", "jam", "tart", "cake", "bread", "soda", "tea", "milk", "bar",
+]
+
+def make_names(count: int) -> dict:
+    rng = random.Random(42)
+    return {
+        str(i): f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        for i in range(count)
+    }
+
+def timed(fn, queries: list) -> dict:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 3),
+        "queries_per_second": round(len(latencies) / (sum(latencies) / 1000), 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    names = make_names(args.names)
+
+    async def load():
+        for item_id, item_name in names.items():
+            yield item_id, item_name
+
+    index = NameSearchIndex(load, refresh_seconds=300)
+    start = time.perf_counter()
+    asyncio.run(index.ensure_loaded())
+    build_seconds = time.perf_counter() - start
+
+    # Type-ahead style queries: growing prefixes of real words plus name suffixes
+    rng = random.Random(7)
+    queries = []
+    for _ in range(args.queries):
+        word = rng.choice(WORDS)
+        queries.append(word[:rng.randint(3, len(word))] + rng.choice(["", " ", f" {rng.choice(WORDS)[:2]}"]))
+
+    results = {
+        "names": args.names,
+        "build_seconds": round(build_seconds, 3),
+        "trigram_index": timed(lambda q: index.search(q, limit=args.limit), queries),
+        "linear_scan": timed(lambda q: [i for i, n in names.items() if q in n], queries),
+    }
+    results["speedup"] = round(
+        results["trigram_index"]["queries_per_second"] / results["linear_scan"]["queries_per_second"], 2
+    )
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Per-row cost of turning DynamoDB items into a JSON response body.
+
+Runs without DynamoDB, from the backend directory:
+
+    python -m benchmarks.bench_serialization --rows 50000
+
+"legacy" reproduces the previous path: an ItemResponse per row, then FastAPI's
+response_model validation and JSONResponse encoding. "fast" is the current
+path: a plain dict per row encoded by FastJSONResponse.
+"""
+import argparse
+import asyncio
+import json
+import time
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from core.models import ItemResponse, QueryResponse
+from core.responses import FastJSONResponse
+from services.inventory import InventoryService
+
+def make_items(count: int) -> list:
+    return [{
+        'id': f"00000000-0000-0000-0000-{i:012d}",
+        'item_name': f"item {i}",
+        'category': f"category {i % 10}",
+        'price': Decimal(f"{1 + i % 100}.99"),
+        'listing': 'item',
+        'last_updated_dt': "2025-01-01T00:00:00+08:00",
+        'last_updated_date': "2025-01-01"
+    } for i in range(count)]
+
+def legacy_items(items: list, field) -> bytes:
+    payload = {
+        "items": [
+            ItemResponse(
+                id=item['id'], item_name=item['item_name'], category=item['category'],
+                price=float(item['price'])
+            ).model_dump(by_alias=True)
+            for item in items
+        ],
+        "total_price": "0.00"
+    }
+    content = asyncio.run(serialize_response(field=field, response_content=payload))
+    return JSONResponse(content).body
+
+def legacy_page(items: list, field) -> bytes:
+    result = QueryResponse(
+        items=[
+            ItemResponse(
+                id=item['id'], item_name=item['item_name'], category=item['category'],
+                price=float(item['price'])
+            )
+            for item in items
+        ],
+        count=len(items), page=1, limit=100
+    )
+    content = asyncio.run(serialize_response(field=field, response_content=result))
+    return JSONResponse(content).body
+
+def fast_items(items: list, field) -> bytes:
+    payload = {"items": [InventoryService._item_payload(item) for item in items], "total_price": "0.00"}
+    return FastJSONResponse(payload).body
+
+def fast_page(items: list, field) -> bytes:
+    rows = [InventoryService._item_row(item) for item in items]
+    return FastJSONResponse(InventoryService._page_response(rows, len(items), 1, 100)).body
+
+def measure(fn, items: list, field, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items, field)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "seconds": round(best, 4),
+        "microseconds_per_row": round(best / len(items) * 1e6, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    items = make_items(args.rows)
+    dict_field = create_model_field(name="Response_dict", type_=dict, mode="serialization")
+    page_field = create_model_field(name="Response_QueryResponse", type_=QueryResponse, mode="serialization")
+
+    # Both paths must produce the same document
+    assert json.loads(legacy_items(items[:10], dict_field)) == json.loads(fast_items(items[:10], None))
+
+    results = {"rows": args.rows}
+    for name, legacy, fast, field in (
+        ("items", legacy_items, fast_items, dict_field),
+        ("query_items_page", legacy_page, fast_page, page_field),
+    ):
+        legacy_result = measure(legacy, items, field, args.repeat)
+        fast_result = measure(fast, items, field, args.repeat)
+        results[name] = {
+            "legacy": legacy_result,
+            "fast": fast_result,
+            "speedup": round(legacy_result["seconds"] / fast_result["seconds"], 2)
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
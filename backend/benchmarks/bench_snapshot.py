@@ -0,0 +1,99 @@
+"""Inventory snapshot: build time, memory and query latency over synthetic items.
+
+Runs without DynamoDB, from the backend directory:
+
+    python -m benchmarks.bench_snapshot --items 1000000
+
+Memory is what tracemalloc sees allocated while a second snapshot of up to
+--memory-items items is built, divided by its item count. Query latency covers
+selecting, ordering and shaping one page or, for the list queries, every
+matching row plus the total.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from decimal import Decimal
+from services.snapshot import SnapshotData, price_bounds, time_bounds
+
+def make_items(count: int):
+    rng = random.Random(42)
+    for i in range(count):
+        yield {
+            'id': f"{i:032x}",
+            'item_name': f"item {i}",
+            'category': f"category {rng.randrange(50)}",
+            'price': Decimal(f"{rng.randint(1, 999)}.{rng.randrange(100):02d}"),
+            'last_updated_dt': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00.000000+08:00"
+        }
+
+def build(count: int) -> SnapshotData:
+    data = SnapshotData()
+    for item in make_items(count):
+        data.load(item)
+    data.build_indexes()
+    return data
+
+def page(data: SnapshotData, rows, sort_field: str, descending: bool, number: int, limit: int = 10) -> list:
+    ordered = data.order(rows, sort_field, descending, count=number * limit)
+    return [data.item(row) for row in ordered[(number - 1) * limit:]]
+
+def timed(fn, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(statistics.median(latencies), 3), "max_ms": round(max(latencies), 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--memory-items", type=int, default=100000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = build(args.items)
+    build_seconds = time.perf_counter() - start
+
+    # tracemalloc slows allocation several times over, so it gets its own smaller build
+    memory_items = min(args.items, args.memory_items)
+    tracemalloc.start()
+    sample = build(memory_items)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sample
+
+    all_rows = lambda: data.select()
+    queries = {
+        "page_sorted_by_name": lambda: page(data, all_rows(), "name", False, 1),
+        "page_sorted_by_price_desc": lambda: page(data, all_rows(), "price", True, 5),
+        "page_in_category_by_price": lambda: page(data, data.select(category="category 7"), "price", False, 1),
+        "page_in_price_range": lambda: page(data, data.select(price_range=price_bounds(100, 110)), "price", False, 1),
+        "list_category_with_total": lambda: (
+            lambda rows: (data.items(rows), data.total(rows))
+        )(data.select(category="category 7")),
+        "list_month_with_total": lambda: (
+            lambda rows: (data.items(rows), data.total(rows))
+        )(data.select(time_range=time_bounds("2025-03-01", "2025-03-31T23:59:59+08:00"))),
+        "upsert_then_remove": lambda: (
+            data.upsert({
+                'id': "bench", 'item_name': "bench item", 'category': "category 1",
+                'price': Decimal("5.00"), 'last_updated_dt': "2025-12-31T00:00:00.000000+08:00"
+            }),
+            data.remove("bench")
+        ),
+    }
+
+    print(json.dumps({
+        "items": args.items,
+        "build_seconds": round(build_seconds, 2),
+        "bytes_per_item": round(memory / memory_items),
+        "queries": {name: timed(fn, args.repeat) for name, fn in queries.items()},
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Worker startup cost: importing the app vs running its startup hook.
+
+Each run is a fresh interpreter, as a new uvicorn worker or test session would
+be. Run from the backend directory with DynamoDB Local up:
+
+    python -m benchmarks.bench_startup --runs 5
+
+import_seconds is what test collection and worker boot pay before serving;
+startup_seconds is the lifespan hook (table checks against DynamoDB) and
+first_request_seconds covers creating the shared client on first use.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    client.get("/items/summary")
+    requested = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - start,
+    "startup_seconds": started - imported,
+    "first_request_seconds": requested - started,
+}))
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    results = {"runs": args.runs}
+    for key in samples[0]:
+        results[key] = round(statistics.median(sample[key] for sample in samples), 4)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Time-range filtering over last_updated_dt: per-row datetime parsing vs string compare.
+
+Runs without DynamoDB, on synthetic timestamps, from the backend directory:
+
+    python -m benchmarks.bench_time_filter --rows 1000000
+
+"parse_per_row" is what query_items did before the range moved into DynamoDB:
+parse_datetime on every row, then compare datetimes. "string_compare" is the
+check DynamoDB now evaluates, and any in-process filter can use, on fixed-width
+SGT strings. Bound parsing is timed cold and through the parse_time_bound cache.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from utils.helpers import SGT, parse_datetime, parse_time_bound, to_sgt_iso
+
+def make_timestamps(count: int) -> list:
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1, tzinfo=SGT)
+    return [
+        to_sgt_iso(start + timedelta(seconds=rng.randrange(365 * 24 * 3600), microseconds=rng.randrange(10 ** 6)))
+        for _ in range(count)
+    ]
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--dt-from", default="2025-03-01")
+    parser.add_argument("--dt-to", default="2025-03-31T23:59:59+08:00")
+    parser.add_argument("--bound-calls", type=int, default=10000)
+    args = parser.parse_args()
+
+    timestamps = make_timestamps(args.rows)
+    low, high = parse_datetime(args.dt_from), parse_datetime(args.dt_to)
+    low_iso, high_iso = to_sgt_iso(low), to_sgt_iso(high)
+
+    legacy, legacy_seconds = timed(lambda: [ts for ts in timestamps if low <= parse_datetime(ts) <= high])
+    fast, fast_seconds = timed(lambda: [ts for ts in timestamps if low_iso <= ts <= high_iso])
+    assert legacy == fast
+
+    _, cold_seconds = timed(lambda: [to_sgt_iso(parse_datetime(args.dt_from)) for _ in range(args.bound_calls)])
+    parse_time_bound.cache_clear()
+    _, cached_seconds = timed(lambda: [parse_time_bound(args.dt_from) for _ in range(args.bound_calls)])
+
+    print(json.dumps({
+        "rows": args.rows,
+        "matched": len(fast),
+        "parse_per_row_seconds": round(legacy_seconds, 3),
+        "string_compare_seconds": round(fast_seconds, 3),
+        "row_speedup": round(legacy_seconds / fast_seconds, 1),
+        "bound_parse_cold_microseconds": round(cold_seconds / args.bound_calls * 1e6, 3),
+        "bound_parse_cached_microseconds": round(cached_seconds / args.bound_calls * 1e6, 3),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,81 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Inventory API"
     ENVIRONMENT: str = "local"
     DYNAMODB_TABLE: str = "Inventory"
+    AGGREGATES_TABLE: str = "InventoryAggregates"
+    NAMES_TABLE: str = "InventoryNames"
     AWS_REGION: str = "ap-southeast-1"
+    # DynamoDB Local; set to an empty string to use AWS with the default credential chain
+    DYNAMODB_ENDPOINT_URL: Optional[str] = "http://localhost:8000"
+    DB_CONNECT_TIMEOUT: float = 2
+    DB_READ_TIMEOUT: float = 5
+    DB_MAX_ATTEMPTS: int = 5
+    DB_RETRY_MODE: str = "adaptive"
+    DB_TCP_KEEPALIVE: bool = True
+    DB_INIT_ON_STARTUP: bool = True
     API_KEY: Optional[str] = None
     CORS_ORIGINS: str = "*"
+    DATE_INDEX_MAX_DAYS: int = 31
+    SCAN_SEGMENTS: int = 4
+    SCAN_MAX_WORKERS: int = 8
+    # Streamed scans (/items/?stream=true) run on their own threads, so a slow
+    # client holds up only other streams
+    STREAM_SCAN_MAX_WORKERS: int = 4
+    DB_MAX_WORKERS: int = 32
+    # Startup only checks the item table's indexes; scripts.migrate changes them.
+    # When set, the server refuses to start while any is missing or outdated.
+    DB_REQUIRE_INDEXES: bool = False
+    DB_INDEX_WAIT_TIMEOUT_SECONDS: float = 1800
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: float = 30
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_REDIS_URL: Optional[str] = None
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_WRITE_CONCURRENCY: int = 4
+    BATCH_WRITE_MAX_RETRIES: int = 5
+    BATCH_LOOKUP_CONCURRENCY: int = 16
+    BATCH_UPDATE_CONCURRENCY: int = 16
+    IMPORT_CHUNK_SIZE: int = 500
+    IMPORT_CONCURRENCY: int = 4
+    IMPORT_MAX_REPORTED_ERRORS: int = 100
+    UPSERT_MAX_ATTEMPTS: int = 3
+    AGGREGATE_MAX_ATTEMPTS: int = 5
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_INDEX_REFRESH_SECONDS: float = 300
+    SEARCH_MAX_CANDIDATES: int = 1000
+    SNAPSHOT_ENABLED: bool = False
+    SNAPSHOT_REFRESH_SECONDS: float = 5
+    SNAPSHOT_REBUILD_SECONDS: float = 900
+    SNAPSHOT_MAX_STALENESS_SECONDS: float = 30
+    COALESCE_ENABLED: bool = True
+    ETAG_ENABLED: bool = True
+    # Reads are eventually consistent, so validators are held back this long after a write
+    ETAG_SETTLE_SECONDS: float = 1
+    # Change feed events kept for clients resuming with Last-Event-ID
+    FEED_HISTORY: int = 10000
+    FEED_HEARTBEAT_SECONDS: float = 15
+    # Write-behind price updates: PUT /items/{id}/price is acknowledged once journaled
+    WRITE_BEHIND_ENABLED: bool = False
+    # Shared by the workers on a host, each journaling into its own subdirectory;
+    # keep it on a local disk, as recovery relies on flock
+    WRITE_BEHIND_JOURNAL_DIR: str = "price-journal"
+    WRITE_BEHIND_MAX_BATCH: int = 100
+    WRITE_BEHIND_FLUSH_SECONDS: float = 1
+    WRITE_BEHIND_MAX_PENDING: int = 10000
+    WRITE_BEHIND_CONCURRENCY: int = 16
+    # Per worker and table: calls per second for each operation class. Each
+    # limit halves when DynamoDB throttles and recovers as calls succeed.
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_READ_RATE: float = 1000
+    SCHEDULER_SCAN_RATE: float = 100
+    SCHEDULER_WRITE_RATE: float = 500
+    SCHEDULER_MIN_RATE: float = 1
+    # Calls waiting for a token per class before new ones get 429
+    SCHEDULER_MAX_QUEUE: int = 256
+    SCHEDULER_MAX_RETRIES: int = 3
+    SCHEDULER_BACKOFF_BASE_SECONDS: float = 0.05
+    SCHEDULER_BACKOFF_MAX_SECONDS: float = 2
+    METRICS_ENABLED: bool = True
+    METRICS_CONSUMED_CAPACITY: bool = True
 
     model_config = ConfigDict(
         env_file=".env",
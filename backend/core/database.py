@@ -1,61 +1,368 @@
+import asyncio
+import contextvars
+import threading
+import time
 import boto3
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional
 from core.config import settings
+from core.metrics import instrument_dynamodb
+from core.scheduler import CapacityScheduler, get_scheduler
 import logging
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# Every item carries listing = LISTING_PARTITION so the Listing* indexes can
+# walk the whole catalogue in price or name order
+LISTING_PARTITION = 'item'
+
+ATTRIBUTE_DEFINITIONS = [
+    {'AttributeName': 'id', 'AttributeType': 'S'},
+    {'AttributeName': 'item_name', 'AttributeType': 'S'},
+    {'AttributeName': 'category', 'AttributeType': 'S'},
+    {'AttributeName': 'last_updated_dt', 'AttributeType': 'S'},
+    {'AttributeName': 'last_updated_date', 'AttributeType': 'S'},
+    {'AttributeName': 'listing', 'AttributeType': 'S'},
+    {'AttributeName': 'price', 'AttributeType': 'N'},
+]
+
+GLOBAL_SECONDARY_INDEXES = [
+    {
+        'IndexName': 'NameIndex',
+        'KeySchema': [{'AttributeName': 'item_name', 'KeyType': 'HASH'}],
+        'Projection': {'ProjectionType': 'ALL'}
+    },
+    {
+        'IndexName': 'CategoryIndex',
+        'KeySchema': [
+            {'AttributeName': 'category', 'KeyType': 'HASH'},
+            {'AttributeName': 'last_updated_dt', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'ALL'}
+    },
+    {
+        'IndexName': 'DateIndex',
+        'KeySchema': [
+            {'AttributeName': 'last_updated_date', 'KeyType': 'HASH'},
+            {'AttributeName': 'last_updated_dt', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'ALL'}
+    },
+    {
+        'IndexName': 'ListingPriceIndex',
+        'KeySchema': [
+            {'AttributeName': 'listing', 'KeyType': 'HASH'},
+            {'AttributeName': 'price', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'ALL'}
+    },
+    {
+        'IndexName': 'ListingNameIndex',
+        'KeySchema': [
+            {'AttributeName': 'listing', 'KeyType': 'HASH'},
+            {'AttributeName': 'item_name', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'ALL'}
+    },
+    {
+        'IndexName': 'CategoryPriceIndex',
+        'KeySchema': [
+            {'AttributeName': 'category', 'KeyType': 'HASH'},
+            {'AttributeName': 'price', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'ALL'}
+    },
+    {
+        'IndexName': 'CategoryNameIndex',
+        'KeySchema': [
+            {'AttributeName': 'category', 'KeyType': 'HASH'},
+            {'AttributeName': 'item_name', 'KeyType': 'RANGE'}
+        ],
+        'Projection': {'ProjectionType': 'ALL'}
+    },
+]
+
+_executor = None
+
+class DynamoDBClientManager:
+    # One boto3 resource per process, created on first use. Its client is
+    # thread-safe and owns the HTTP connection pool every table shares.
+    def __init__(self):
+        self._resource = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def retry_config() -> dict:
+        if settings.SCHEDULER_ENABLED:
+            # The scheduler paces and retries every call itself; botocore's
+            # retries and adaptive rate limiting underneath would multiply its
+            # attempts (up to max_retries x DB_MAX_ATTEMPTS per logical call)
+            return {'mode': 'standard', 'total_max_attempts': 1}
+        return {'mode': settings.DB_RETRY_MODE, 'max_attempts': settings.DB_MAX_ATTEMPTS}
+
+    @staticmethod
+    def client_config() -> Config:
+        return Config(
+            # Room for every executor thread plus the parallel scan workers
+            max_pool_connections=settings.DB_MAX_WORKERS + settings.SCAN_MAX_WORKERS + settings.STREAM_SCAN_MAX_WORKERS,
+            connect_timeout=settings.DB_CONNECT_TIMEOUT,
+            read_timeout=settings.DB_READ_TIMEOUT,
+            retries=DynamoDBClientManager.retry_config(),
+            tcp_keepalive=settings.DB_TCP_KEEPALIVE
+        )
+
+    def resource(self):
+        if self._resource is None:
+            with self._lock:
+                if self._resource is None:
+                    params = {'region_name': settings.AWS_REGION, 'config': self.client_config()}
+                    if settings.DYNAMODB_ENDPOINT_URL:
+                        # DynamoDB Local accepts any credentials
+                        params.update(
+                            endpoint_url=settings.DYNAMODB_ENDPOINT_URL,
+                            aws_access_key_id='test',
+                            aws_secret_access_key='test'
+                        )
+                    resource = boto3.session.Session().resource('dynamodb', **params)
+                    if settings.METRICS_ENABLED:
+                        instrument_dynamodb(resource.meta.client, settings.METRICS_CONSUMED_CAPACITY)
+                    self._resource = resource
+        return self._resource
+
+    def table(self, name: str) -> "LazyTable":
+        return LazyTable(self, name)
+
+    def close(self):
+        with self._lock:
+            if self._resource is not None:
+                self._resource.meta.client.close()
+                self._resource = None
+
+class LazyTable:
+    # Stands in for a boto3 Table so services can be built at import time
+    # without creating the resource
+    def __init__(self, manager: DynamoDBClientManager, name: str):
+        self._manager = manager
+        self._table = None
+        self.name = name
+
+    def __getattr__(self, attribute):
+        if self._table is None:
+            self._table = self._manager.resource().Table(self.name)
+        return getattr(self._table, attribute)
+
+db_manager = DynamoDBClientManager()
+
 def get_db():
-    return boto3.resource(
-        'dynamodb',
-        endpoint_url='http://localhost:8000',
-        region_name='ap-southeast-1',
-        aws_access_key_id='test',
-        aws_secret_access_key='test'
-    )
-    
-    # AWS dynamoDB
-    # return boto3.resource(
-    #     'dynamodb',
-    #     region_name=settings.AWS_REGION
-    # )
+    return db_manager.resource()
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_MAX_WORKERS,
+            thread_name_prefix="dynamodb"
+        )
+    return _executor
+
+class AsyncTable:
+    # boto3 is blocking, so every call runs on a dedicated executor sized to the
+    # connection pool instead of stalling the event loop
+    def __init__(self, table, executor: ThreadPoolExecutor = None, scheduler: CapacityScheduler = None):
+        self.table = table
+        self.executor = executor or get_executor()
+        self.scheduler = scheduler or get_scheduler(table.name)
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+    async def _run(self, operation: str, method, **params) -> dict:
+        # The copied context carries the current route into the worker thread,
+        # where the metrics hooks read it. The scheduler waits for a token on the
+        # event loop, so queued calls do not hold executor threads.
+        loop = asyncio.get_running_loop()
+
+        def call():
+            return loop.run_in_executor(self.executor, partial(contextvars.copy_context().run, method, **params))
+
+        if self.scheduler is None:
+            return await call()
+        return await self.scheduler.run(operation, call)
+
+    async def _call(self, operation: str, **params) -> dict:
+        return await self._run(operation, getattr(self.table, operation), **params)
+
+    async def get_item(self, **params) -> dict:
+        return await self._call('get_item', **params)
+
+    async def put_item(self, **params) -> dict:
+        return await self._call('put_item', **params)
+
+    async def update_item(self, **params) -> dict:
+        return await self._call('update_item', **params)
+
+    async def delete_item(self, **params) -> dict:
+        return await self._call('delete_item', **params)
+
+    async def query(self, **params) -> dict:
+        return await self._call('query', **params)
+
+    async def scan(self, **params) -> dict:
+        return await self._call('scan', **params)
+
+    async def _client_call(self, operation: str, **params) -> dict:
+        # Multi-item operations live on the client; the resource's client still
+        # accepts and returns plain Python values
+        return await self._run(operation, getattr(self.table.meta.client, operation), **params)
+
+    async def batch_write_item(self, **params) -> dict:
+        return await self._client_call('batch_write_item', **params)
+
+    async def batch_get_item(self, **params) -> dict:
+        return await self._client_call('batch_get_item', **params)
+
+    async def transact_write_items(self, **params) -> dict:
+        return await self._client_call('transact_write_items', **params)
+
+def _wait_for_indexes(table, timeout: Optional[float] = None):
+    timeout = settings.DB_INDEX_WAIT_TIMEOUT_SECONDS if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    while True:
+        table.reload()
+        indexes = table.global_secondary_indexes or []
+        if table.table_status == 'ACTIVE' and all(i.get('IndexStatus', 'ACTIVE') == 'ACTIVE' for i in indexes):
+            return
+        if time.monotonic() >= deadline:
+            pending = [i['IndexName'] for i in indexes if i.get('IndexStatus', 'ACTIVE') != 'ACTIVE']
+            raise TimeoutError(f"{table.name} not active after {timeout:.0f}s; indexes still building: {pending}")
+        time.sleep(1)
+
+def outdated_indexes(table) -> List[str]:
+    # Indexes in GLOBAL_SECONDARY_INDEXES that the table lacks, has with another
+    # key schema, or is still building
+    existing = {index['IndexName']: index for index in (table.global_secondary_indexes or [])}
+    outdated = []
+    for index in GLOBAL_SECONDARY_INDEXES:
+        current = existing.get(index['IndexName'])
+        if (
+            current is None
+            or current['KeySchema'] != index['KeySchema']
+            or current.get('IndexStatus', 'ACTIVE') != 'ACTIVE'
+        ):
+            outdated.append(index['IndexName'])
+    return outdated
+
+def ensure_indexes(table):
+    # Brings an existing table in line with GLOBAL_SECONDARY_INDEXES: missing indexes
+    # are created and indexes whose key schema changed are rebuilt. DynamoDB only
+    # accepts one index change per update_table call. Only scripts.migrate calls
+    # this; a serving worker never changes the schema.
+    _wait_for_indexes(table)
+    existing = {index['IndexName']: index for index in (table.global_secondary_indexes or [])}
+
+    for index in GLOBAL_SECONDARY_INDEXES:
+        current = existing.get(index['IndexName'])
+        if current and current['KeySchema'] == index['KeySchema']:
+            continue
+        if current:
+            logger.info(f"Rebuilding index {index['IndexName']} on {table.name} with new key schema")
+            table.update(GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': index['IndexName']}}])
+            _wait_for_indexes(table)
+        logger.info(f"Creating index {index['IndexName']} on {table.name}")
+        table.update(
+            AttributeDefinitions=ATTRIBUTE_DEFINITIONS,
+            GlobalSecondaryIndexUpdates=[{'Create': index}]
+        )
+        _wait_for_indexes(table)
+
+def check_indexes(table):
+    # Run by every worker at startup: reports, and with DB_REQUIRE_INDEXES
+    # refuses to start on, indexes that scripts.migrate has not brought up to date
+    outdated = outdated_indexes(table)
+    if not outdated:
+        return
+    message = f"Indexes on {table.name} missing, changed or still building: {', '.join(outdated)}; run python -m scripts.migrate"
+    if settings.DB_REQUIRE_INDEXES:
+        raise RuntimeError(message)
+    logger.warning(message)
+
+def _create_table(db, **params):
+    # Workers start together; the ones that lose the race wait for the winner's table
+    try:
+        table = db.create_table(**params)
+    except db.meta.client.exceptions.ResourceInUseException:
+        table = db.Table(params['TableName'])
+    table.wait_until_exists()
+    return table
+
+def _ensure_table(db, table_name: str, hash_key: str):
+    try:
+        table = db.Table(table_name)
+        table.load()
+        return table
+    except db.meta.client.exceptions.ResourceNotFoundException:
+        logger.info(f"Creating table {table_name}")
+        return _create_table(
+            db,
+            TableName=table_name,
+            KeySchema=[{'AttributeName': hash_key, 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': hash_key, 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+            Tags=[{
+                'Key': 'Environment',
+                'Value': settings.ENVIRONMENT
+            }]
+        )
+
+def ensure_aggregates_table(db):
+    # One record per scope ("all" or "category#<name>") holding item_count and total_price
+    return _ensure_table(db, settings.AGGREGATES_TABLE, 'scope')
+
+def ensure_names_table(db):
+    # One guard record per item_name pointing at the owning item id; creates put it
+    # with attribute_not_exists in the same transaction as the item
+    return _ensure_table(db, settings.NAMES_TABLE, 'item_name')
 
 def init_db():
     db = get_db()
     
+    try:
+        ensure_aggregates_table(db)
+        ensure_names_table(db)
+    except ClientError as e:
+        logger.error(f"Auxiliary table creation failed: {str(e)}")
+        raise RuntimeError(f"DynamoDB initialization failed: {str(e)}")
+
     try:
         # Verify table exists
         table = db.Table(settings.DYNAMODB_TABLE)
         table.load()
         logger.info(f"Using existing table {settings.DYNAMODB_TABLE}")
+        check_indexes(table)
         return table
         
     except db.meta.client.exceptions.ResourceNotFoundException:
         try:
             logger.info(f"Creating table {settings.DYNAMODB_TABLE}")
-            table = db.create_table(
+            return _create_table(
+                db,
                 TableName=settings.DYNAMODB_TABLE,
                 KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
-                AttributeDefinitions=[
-                    {'AttributeName': 'id', 'AttributeType': 'S'},
-                    {'AttributeName': 'item_name', 'AttributeType': 'S'},
-                ],
+                AttributeDefinitions=ATTRIBUTE_DEFINITIONS,
                 BillingMode='PAY_PER_REQUEST',
-                GlobalSecondaryIndexes=[{
-                    'IndexName': 'NameIndex',
-                    'KeySchema': [{'AttributeName': 'item_name', 'KeyType': 'HASH'}],
-                    'Projection': {'ProjectionType': 'ALL'}
-                }],
+                GlobalSecondaryIndexes=GLOBAL_SECONDARY_INDEXES,
                 Tags=[{
                     'Key': 'Environment',
                     'Value': settings.ENVIRONMENT
                 }]
             )
-            table.wait_until_exists()
-            return table
         except ClientError as e:
             logger.error(f"Table creation failed: {str(e)}")
             raise RuntimeError(f"DynamoDB initialization failed: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
-        raise RuntimeError(f"DynamoDB initialization failed: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"DynamoDB initialization failed: {str(e)}")
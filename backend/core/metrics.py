@@ -0,0 +1,255 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from starlette.routing import Match
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route template of the request being served; "-" for work outside a request
+current_route = contextvars.ContextVar("current_route", default="-")
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple((name, labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple((name, labels[name]) for name in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    # Minimal Prometheus text-format registry; collectors add values that live
+    # elsewhere (such as cache stats) at scrape time
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, float]]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        metric = Gauge(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, float]]]):
+        # collector() yields (name, type, help, value)
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, value in collector():
+                lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"])
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+DYNAMODB_CALL_DURATION = registry.histogram(
+    "dynamodb_call_duration_seconds", "DynamoDB API call latency", ("operation", "table", "route")
+)
+DYNAMODB_CALL_ERRORS = registry.counter(
+    "dynamodb_call_errors_total", "DynamoDB API calls that failed", ("operation", "table", "route", "code")
+)
+DYNAMODB_SCANNED_ITEMS = registry.counter(
+    "dynamodb_scanned_items_total", "Items read by Query and Scan before filtering", ("operation", "table", "route")
+)
+DYNAMODB_RETURNED_ITEMS = registry.counter(
+    "dynamodb_returned_items_total", "Items returned by Query and Scan after filtering", ("operation", "table", "route")
+)
+DYNAMODB_CONSUMED_CAPACITY = registry.counter(
+    "dynamodb_consumed_capacity_units_total", "Capacity units reported by ReturnConsumedCapacity", ("operation", "table", "route")
+)
+
+# Operations that accept ReturnConsumedCapacity
+CAPACITY_OPERATIONS = {
+    "GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan",
+    "BatchGetItem", "BatchWriteItem", "TransactGetItems", "TransactWriteItems",
+}
+
+def _table_label(params: dict) -> str:
+    if "TableName" in params:
+        return params["TableName"]
+    if "RequestItems" in params:
+        return ",".join(sorted(params["RequestItems"]))
+    if "TransactItems" in params:
+        tables = {action["TableName"] for item in params["TransactItems"] for action in item.values()}
+        return ",".join(sorted(tables))
+    return "-"
+
+def _consumed_units(consumed) -> float:
+    if consumed is None:
+        return 0.0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(entry.get("CapacityUnits", 0) for entry in consumed)
+
+def instrument_dynamodb(client, consumed_capacity: bool = True):
+    # Hooks botocore's event system, so every call through this client is
+    # measured, including those made from the parallel scan threads
+    def on_params(params, model, context, **kwargs):
+        if consumed_capacity and model.name in CAPACITY_OPERATIONS and "ReturnConsumedCapacity" not in params:
+            params["ReturnConsumedCapacity"] = "TOTAL"
+        context["metrics_table"] = _table_label(params)
+        context["metrics_started"] = time.perf_counter()
+
+    def labels_for(model, context) -> Optional[dict]:
+        if "metrics_started" not in context:
+            return None
+        return {"operation": model.name, "table": context["metrics_table"], "route": current_route.get()}
+
+    def on_response(http_response, parsed, model, context, **kwargs):
+        labels = labels_for(model, context)
+        if labels is None:
+            return
+        DYNAMODB_CALL_DURATION.observe(time.perf_counter() - context["metrics_started"], **labels)
+        if "Error" in parsed:
+            DYNAMODB_CALL_ERRORS.inc(code=parsed["Error"].get("Code", "Unknown"), **labels)
+            return
+        if "ScannedCount" in parsed:
+            DYNAMODB_SCANNED_ITEMS.inc(parsed["ScannedCount"], **labels)
+            DYNAMODB_RETURNED_ITEMS.inc(parsed.get("Count", 0), **labels)
+        units = _consumed_units(parsed.get("ConsumedCapacity"))
+        if units:
+            DYNAMODB_CONSUMED_CAPACITY.inc(units, **labels)
+
+    def on_error(exception, model, context, **kwargs):
+        labels = labels_for(model, context)
+        if labels is None:
+            return
+        DYNAMODB_CALL_DURATION.observe(time.perf_counter() - context["metrics_started"], **labels)
+        DYNAMODB_CALL_ERRORS.inc(code=type(exception).__name__, **labels)
+
+    events = client.meta.events
+    # before-parameter-build sees the final params; boto3's resource layer
+    # replaces the dict passed to provide-client-params
+    events.register("before-parameter-build.dynamodb", on_params)
+    events.register("after-call.dynamodb", on_response)
+    events.register("after-call-error.dynamodb", on_error)
+
+def route_template(routes: Iterable, scope: dict) -> str:
+    # The path template ("/items/{item_id}") keeps label cardinality bounded
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: it does not touch the request body, so the
+    # streaming import endpoint keeps reading the upload itself
+    def __init__(self, app, routes: Iterable):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(self.routes, scope)
+        token = current_route.set(route)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=str(status)
+            )
+            current_route.reset(token)
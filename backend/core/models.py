@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import List
+from typing import List, Literal, Optional
 
 class ItemCreate(BaseModel):
     item_name: str = Field(..., alias="name", min_length=1)
@@ -39,7 +39,27 @@ class QueryResponse(BaseModel):
     count: int
     page: int = Field(..., ge=1)
     limit: int = Field(..., ge=1, le=100)
+    next_cursor: Optional[str] = None
 
 class DeleteResponse(BaseModel):
     status: str
-    deleted_id: str
\ No newline at end of file
+    deleted_id: str
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    # superseded: a later row in the same batch has the same name and was written instead
+    status: Literal["created", "updated", "failed", "superseded"]
+    error: Optional[str] = None
+
+class BatchUpsertResponse(BaseModel):
+    results: List[BatchItemResult]
+    created: int
+    updated: int
+    failed: int
+    superseded: int = 0
+
+class SummaryResponse(BaseModel):
+    category: Optional[str] = None
+    count: int
+    total_price: str
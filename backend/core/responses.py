@@ -0,0 +1,34 @@
+import hashlib
+from typing import Optional
+import pydantic_core
+from fastapi.responses import JSONResponse
+from utils.helpers import to_http_date
+
+class FastJSONResponse(JSONResponse):
+    # Encodes with pydantic-core's Rust serializer. Returning a Response also skips
+    # FastAPI's response_model validation, which would rebuild every row as a model.
+    def render(self, content) -> bytes:
+        return pydantic_core.to_json(content, by_alias=True)
+
+def version_headers(version: dict, query_key: str) -> dict:
+    # The ETag covers everything the body depends on: the scope's version, the
+    # snapshot generation when reads are served from memory, and the query itself
+    digest = hashlib.blake2b(
+        repr((version['scope'], version['version'], version['last_modified'], version['snapshot'], query_key)).encode(),
+        digest_size=12
+    ).hexdigest()
+    headers = {
+        'ETag': f'"{digest}"',
+        'Cache-Control': 'no-cache',
+        'X-Inventory-Version': str(version['version'])
+    }
+    if version['last_modified']:
+        headers['Last-Modified'] = to_http_date(version['last_modified'])
+    return headers
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from botocore.exceptions import ClientError, ConnectionError
+from fastapi import HTTPException
+from core.config import settings
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Error codes DynamoDB returns when a table, index or account is over capacity
+THROTTLE_CODES = {'ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded'}
+
+# Server-side failures botocore's standard mode would retry. The client runs
+# with botocore retries off while the scheduler is on, so it retries these too,
+# without slowing the class down.
+TRANSIENT_CODES = {'InternalServerError', 'ServiceUnavailable', 'RequestTimeout', 'RequestTimeoutException'}
+
+OPERATION_CLASSES = {
+    'get_item': 'read',
+    'query': 'read',
+    'batch_get_item': 'read',
+    'scan': 'scan',
+    'put_item': 'write',
+    'update_item': 'write',
+    'delete_item': 'write',
+    'batch_write_item': 'write',
+    'transact_write_items': 'write',
+}
+
+THROTTLED_CALLS = registry.counter(
+    "dynamodb_throttled_calls_total", "DynamoDB calls rejected for capacity", ("table", "operation_class")
+)
+RETRIED_CALLS = registry.counter(
+    "dynamodb_retried_calls_total", "Throttled DynamoDB calls retried after a backoff", ("table", "operation_class")
+)
+SHED_CALLS = registry.counter(
+    "dynamodb_shed_calls_total", "DynamoDB calls refused with 429 instead of queued or retried", ("table", "operation_class")
+)
+RATE_LIMIT = registry.gauge(
+    "dynamodb_rate_limit", "Current calls per second allowed by the scheduler", ("table", "operation_class")
+)
+QUEUED_CALLS = registry.gauge(
+    "dynamodb_queued_calls", "DynamoDB calls waiting for a scheduler token", ("table", "operation_class")
+)
+
+def is_throttle(error: Exception) -> bool:
+    return isinstance(error, ClientError) and error.response['Error']['Code'] in THROTTLE_CODES
+
+def is_transient(error: Exception) -> bool:
+    # A connection that failed before any response, or a DynamoDB 5xx
+    if isinstance(error, ConnectionError):
+        return True
+    return isinstance(error, ClientError) and error.response['Error']['Code'] in TRANSIENT_CODES
+
+class CapacityExceeded(HTTPException):
+    # Services re-raise HTTPException untouched, so this reaches the client as
+    # a 429 instead of being wrapped in a 500
+    def __init__(self, operation_class: str, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=f"DynamoDB {operation_class} capacity exceeded, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+class TokenBucket:
+    # Reservation-based: a caller takes a token immediately and is told how long
+    # to wait before using it, so waiting needs no lock and works the same from
+    # the event loop and from scan threads. The rate halves on every throttled
+    # call and climbs back by a hundredth of the ceiling per successful one.
+    def __init__(self, rate: float, min_rate: float):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        # One second of burst
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waiting = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def backlog(self) -> float:
+        # Seconds until a token taken now could be used
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, -self._tokens) / self.rate
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+class CapacityScheduler:
+    # Wraps every call to one table: a token bucket per operation class,
+    # retries with jittered exponential backoff on throttling, and a 429 once
+    # too many calls are waiting. Point reads get priority over scans: a scan
+    # waits out the point-read backlog as well as its own, and a throttled
+    # point read slows scans down too.
+    def __init__(
+        self,
+        table_name: str,
+        rates: Dict[str, float],
+        min_rate: float,
+        max_queue: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float
+    ):
+        self.table_name = table_name
+        self.buckets = {operation_class: TokenBucket(rate, min_rate) for operation_class, rate in rates.items()}
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        for operation_class, bucket in self.buckets.items():
+            RATE_LIMIT.set(bucket.rate, table=table_name, operation_class=operation_class)
+
+    def _admit(self, operation_class: str) -> float:
+        bucket = self.buckets[operation_class]
+        with self._lock:
+            if bucket.waiting >= self.max_queue:
+                SHED_CALLS.inc(table=self.table_name, operation_class=operation_class)
+                raise CapacityExceeded(operation_class, bucket.backlog())
+            bucket.waiting += 1
+        QUEUED_CALLS.set(bucket.waiting, table=self.table_name, operation_class=operation_class)
+        delay = bucket.reserve()
+        if operation_class == 'scan':
+            delay = max(delay, self.buckets['read'].backlog())
+        return delay
+
+    def _release(self, operation_class: str):
+        bucket = self.buckets[operation_class]
+        with self._lock:
+            bucket.waiting -= 1
+        QUEUED_CALLS.set(bucket.waiting, table=self.table_name, operation_class=operation_class)
+
+    def _succeeded(self, operation_class: str):
+        bucket = self.buckets[operation_class]
+        bucket.succeeded()
+        RATE_LIMIT.set(bucket.rate, table=self.table_name, operation_class=operation_class)
+
+    def _retry_delay(self, operation_class: str, error: Exception, attempt: int) -> float:
+        # Backoff before the next attempt; re-raises errors that are neither
+        # throttling nor transient, and gives up after max_retries, with a 429
+        # for throttling
+        if is_transient(error):
+            if attempt > self.max_retries:
+                raise error
+            RETRIED_CALLS.inc(table=self.table_name, operation_class=operation_class)
+            return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if not is_throttle(error):
+            raise error
+        THROTTLED_CALLS.inc(table=self.table_name, operation_class=operation_class)
+        throttled = {operation_class, 'scan'} if operation_class == 'read' else {operation_class}
+        for name in throttled:
+            self.buckets[name].throttled()
+            RATE_LIMIT.set(self.buckets[name].rate, table=self.table_name, operation_class=name)
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if attempt > self.max_retries:
+            logger.warning(f"{operation_class} on {self.table_name} still throttled after {self.max_retries} retries")
+            SHED_CALLS.inc(table=self.table_name, operation_class=operation_class)
+            raise CapacityExceeded(operation_class, max(ceiling, self.buckets[operation_class].backlog())) from error
+        RETRIED_CALLS.inc(table=self.table_name, operation_class=operation_class)
+        # Full jitter, as for throttled batches in services/batch.py
+        return random.uniform(0, ceiling)
+
+    async def run(self, operation: str, call: Callable[[], Awaitable[T]]) -> T:
+        operation_class = OPERATION_CLASSES[operation]
+        attempt = 0
+        while True:
+            delay = self._admit(operation_class)
+            try:
+                if delay:
+                    await asyncio.sleep(delay)
+            finally:
+                self._release(operation_class)
+            try:
+                result = await call()
+            except Exception as e:
+                attempt += 1
+                await asyncio.sleep(self._retry_delay(operation_class, e, attempt))
+                continue
+            self._succeeded(operation_class)
+            return result
+
+    def run_sync(self, operation: str, call: Callable[[], T]) -> T:
+        # For calls already on a worker thread, such as parallel scan segments
+        operation_class = OPERATION_CLASSES[operation]
+        attempt = 0
+        while True:
+            delay = self._admit(operation_class)
+            try:
+                if delay:
+                    time.sleep(delay)
+            finally:
+                self._release(operation_class)
+            try:
+                result = call()
+            except Exception as e:
+                attempt += 1
+                time.sleep(self._retry_delay(operation_class, e, attempt))
+                continue
+            self._succeeded(operation_class)
+            return result
+
+_schedulers: Dict[str, CapacityScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(table_name: str) -> Optional[CapacityScheduler]:
+    # One scheduler per table, as DynamoDB throttles each table separately;
+    # None when SCHEDULER_ENABLED is off
+    if not settings.SCHEDULER_ENABLED:
+        return None
+    with _schedulers_lock:
+        if table_name not in _schedulers:
+            _schedulers[table_name] = CapacityScheduler(
+                table_name,
+                {
+                    'read': settings.SCHEDULER_READ_RATE,
+                    'scan': settings.SCHEDULER_SCAN_RATE,
+                    'write': settings.SCHEDULER_WRITE_RATE,
+                },
+                settings.SCHEDULER_MIN_RATE,
+                settings.SCHEDULER_MAX_QUEUE,
+                settings.SCHEDULER_MAX_RETRIES,
+                settings.SCHEDULER_BACKOFF_BASE_SECONDS,
+                settings.SCHEDULER_BACKOFF_MAX_SECONDS
+            )
+        return _schedulers[table_name]
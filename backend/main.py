@@ -1,9 +1,35 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from core.database import init_db
-from routers.items import router as items_router
+from core.config import settings
+from core.database import db_manager, init_db
+from core.metrics import MetricsMiddleware
+from routers.items import router as items_router, service as items_service
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Table checks run once the worker starts serving, not at import, and off the event loop
+    if settings.DB_INIT_ON_STARTUP:
+        await asyncio.get_running_loop().run_in_executor(None, init_db)
+    if settings.SNAPSHOT_ENABLED:
+        # One parallel scan before serving; if it fails, the first request retries it
+        try:
+            await items_service.snapshot.ensure_loaded()
+        except Exception as e:
+            logger.error(f"Inventory snapshot preload failed: {str(e)}")
+    if settings.WRITE_BEHIND_ENABLED:
+        # Replays the journal before the first request can be acknowledged
+        await items_service.prices.start()
+    yield
+    if settings.WRITE_BEHIND_ENABLED:
+        await items_service.prices.stop()
+    db_manager.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,10 +38,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-init_db()
-
 app.include_router(items_router)
 
+if settings.METRICS_ENABLED:
+    # Outermost, so the latency covers CORS handling and the whole response body
+    app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
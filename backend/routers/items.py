@@ -1,45 +1,162 @@
-from typing import Optional
-from fastapi import APIRouter
+import json
+from typing import List, Optional
+import pydantic_core
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from core.config import settings
+from core.metrics import registry
+from core.responses import FastJSONResponse, etag_matches, version_headers
+from services.cache import InventoryCache
+from services.importer import IMPORT_FORMATS, iter_lines
 from services.inventory import InventoryService
-from core.models import ItemCreate, PriceUpdate, QueryResponse, DeleteResponse
+from core.models import (
+    BatchUpsertResponse, ItemCreate, PriceUpdate, QueryResponse, DeleteResponse, SummaryResponse
+)
 
 router = APIRouter()
 service = InventoryService()
+registry.register_collector(service.cache.metric_samples)
+registry.register_collector(service.snapshot.metric_samples)
+registry.register_collector(service.flights.metric_samples)
+registry.register_collector(service.feed.metric_samples)
+registry.register_collector(service.prices.metric_samples)
+registry.register_collector(service.aggregates.metric_samples)
+
+class UploadProgressResponse(StreamingResponse):
+    # The body iterator is still reading the request stream, so receive() must not
+    # be shared with StreamingResponse's disconnect listener
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+async def conditional_response(request: Request, category: Optional[str], query_key: str, read) -> Response:
+    # The version is read before the data, and a matching If-None-Match is
+    # answered with 304 without touching the items table
+    version = await service.read_version(category)
+    if version is None:
+        return FastJSONResponse(await read())
+    headers = version_headers(version, query_key)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response = FastJSONResponse(await read())
+    response.headers.update(headers)
+    return response
+
+async def ndjson_lines(records):
+    # Closed explicitly, so a client that goes away stops the scan behind it
+    # now rather than whenever the generator is collected
+    try:
+        async for record in records:
+            yield pydantic_core.to_json(record) + b"\n"
+    finally:
+        await records.aclose()
+
+def sse_frame(event: Optional[tuple]) -> bytes:
+    if event is None:
+        # Comment line: keeps proxies from closing an idle connection
+        return b": keep-alive\n\n"
+    event_id, change, data = event
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode(), change.encode(), pydantic_core.to_json(data))
 
 @router.post("/items/", response_model=dict)
 async def create_or_update_item(item: ItemCreate):
     return await service.create_or_update_item(item)
 
+@router.post("/items/batch", response_model=BatchUpsertResponse)
+async def batch_upsert_items(items: List[ItemCreate]):
+    return await service.batch_upsert_items(items)
+
+@router.post("/items/import")
+async def import_items(request: Request, format: str = "ndjson"):
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(IMPORT_FORMATS)}")
+
+    async def progress():
+        async for report in service.import_items(iter_lines(request.stream()), format):
+            yield json.dumps(report) + "\n"
+
+    return UploadProgressResponse(progress(), media_type="application/x-ndjson")
+
 @router.get("/items/", response_model=dict)
 async def query_items(
+    request: Request,
     dt_from: Optional[str] = None,
     dt_to: Optional[str] = None,
-    category: Optional[str] = None
+    category: Optional[str] = None,
+    stream: bool = False,
+    changed_since: Optional[str] = None
 ):
-    return await service.query_items(dt_from=dt_from,
+    if stream and changed_since is not None:
+        raise HTTPException(status_code=400, detail="stream and changed_since cannot be combined")
+    if stream:
+        records = service.stream_items(dt_from=dt_from, dt_to=dt_to, category=category)
+        return StreamingResponse(ndjson_lines(records), media_type="application/x-ndjson")
+    if changed_since is not None:
+        query_key = InventoryCache.query_key('query_changes', changed_since=changed_since, category=category)
+        return await conditional_response(
+            request, category, query_key, lambda: service.query_changes(changed_since, category=category)
+        )
+    query_key = InventoryCache.query_key('query_items', dt_from=dt_from, dt_to=dt_to, category=category)
+    return await conditional_response(request, category, query_key, lambda: service.query_items(dt_from=dt_from,
         dt_to=dt_to,
-        category=category)
+        category=category))
+
+@router.get("/items/summary", response_model=SummaryResponse)
+async def items_summary(category: Optional[str] = None):
+    return await service.get_summary(category=category)
+
+@router.get("/items/changes")
+async def item_changes(request: Request, category: Optional[str] = None, last_event_id: Optional[str] = None):
+    # EventSource sends Last-Event-ID itself when it reconnects
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    events = service.feed.listen(
+        category=category, last_event_id=last_event_id, heartbeat_seconds=settings.FEED_HEARTBEAT_SECONDS
+    )
+    return StreamingResponse(
+        (sse_frame(event) async for event in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/query-items/", response_model=QueryResponse)
 async def query_items_paginated(
+    request: Request,
     name: Optional[str] = None,
     category: Optional[str] = None,
     price_min: Optional[float] = None,
     price_max: Optional[float] = None,
-    page: int = 1,
-    limit: int = 10,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
     sort_field: str = "name",
-    sort_order: str = "asc"
+    sort_order: str = "asc",
+    cursor: Optional[str] = None,
+    exact_count: bool = True
 ):      
-    return await service.query_items_paginated(
-        name=name, category=category, price_min=price_min, price_max=price_max, 
-        page=page, limit=limit, sort_field=sort_field, sort_order=sort_order
+    query_key = InventoryCache.query_key(
+        'query_items_paginated', name=name, category=category, price_min=price_min, price_max=price_max,
+        page=page, limit=limit, sort_field=sort_field, sort_order=sort_order, cursor=cursor, exact_count=exact_count
     )
+    return await conditional_response(request, category, query_key, lambda: service.query_items_paginated(
+        name=name, category=category, price_min=price_min, price_max=price_max, 
+        page=page, limit=limit, sort_field=sort_field, sort_order=sort_order,
+        cursor=cursor, exact_count=exact_count
+    ))
 
 @router.put("/items/{item_id}/price", response_model=dict)
-async def update_item_price(item_id: str, price_update: PriceUpdate):
-    return await service.update_item_price(item_id, price_update)
+async def update_item_price(item_id: str, price_update: PriceUpdate, response: Response):
+    result = await service.update_item_price(item_id, price_update)
+    if result.get("status") == "accepted":
+        # Buffered by write-behind mode; DynamoDB is updated on the next flush
+        response.status_code = 202
+    return result
 
 @router.delete("/items/{item_id}", response_model=DeleteResponse)
 async def delete_item(item_id: str):
-    return await service.delete_item(item_id)
\ No newline at end of file
+    return await service.delete_item(item_id)
+
+@router.get("/cache/stats", response_model=dict)
+async def cache_stats():
+    return service.cache.as_dict()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from core.database import init_db
+from services.importer import IMPORT_FORMATS
+from services.inventory import InventoryService
+
+async def read_lines(path: str):
+    with open(path, encoding="utf-8", newline="") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+async def run(path: str, fmt: str):
+    init_db()
+    service = InventoryService()
+    async for report in service.import_items(read_lines(path), fmt):
+        print(json.dumps(report), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream an NDJSON or CSV file of items into the inventory")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    if fmt not in IMPORT_FORMATS:
+        parser.error(f"Cannot infer format from {args.path}; pass --format")
+    asyncio.run(run(args.path, fmt))
+
+if __name__ == "__main__":
+    main()
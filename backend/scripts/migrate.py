@@ -0,0 +1,130 @@
+import argparse
+import logging
+from core.config import settings
+from botocore.exceptions import ClientError
+from core.database import LISTING_PARTITION, ensure_aggregates_table, ensure_indexes, ensure_names_table, get_db
+from services.aggregates import rebuild_aggregates
+from services.scanner import ParallelScanner
+from utils.helpers import SGT_ISO_WIDTH, date_bucket, parse_datetime, read_price, to_sgt_iso
+
+logger = logging.getLogger(__name__)
+
+def _pending_changes(item: dict):
+    updates = {}
+    removals = []
+    if 'last_updated_dt' in item and len(item['last_updated_dt']) != SGT_ISO_WIDTH:
+        # Timestamps written without microseconds sort before fixed-width bounds at the same second
+        updates['last_updated_dt'] = to_sgt_iso(parse_datetime(item['last_updated_dt']))
+    if 'last_updated_dt' in item and 'last_updated_date' not in item:
+        updates['last_updated_date'] = date_bucket(item['last_updated_dt'])
+    if 'listing' not in item:
+        updates['listing'] = LISTING_PARTITION
+    if isinstance(item.get('price'), str):
+        updates['price'] = read_price(item['price'])
+    # Numeric shadow of price used by the sort indexes before price itself became a Number
+    if 'price_value' in item:
+        removals.append('price_value')
+    return updates, removals
+
+def backfill_items(table, dry_run: bool = False) -> int:
+    updated = 0
+    scan_params = {
+        'FilterExpression': (
+            'attribute_not_exists(last_updated_date) OR attribute_not_exists(listing) '
+            'OR attribute_type(price, :string) OR attribute_exists(price_value) '
+            'OR size(last_updated_dt) <> :width'
+        ),
+        'ExpressionAttributeValues': {':string': 'S', ':width': SGT_ISO_WIDTH}
+    }
+    last_key = None
+    while True:
+        if last_key:
+            scan_params['ExclusiveStartKey'] = last_key
+        response = table.scan(**scan_params)
+        for item in response.get('Items', []):
+            updates, removals = _pending_changes(item)
+            if not updates and not removals:
+                continue
+            if not dry_run:
+                expression = []
+                if updates:
+                    expression.append("SET " + ", ".join(f"{name} = :{name}" for name in updates))
+                if removals:
+                    expression.append("REMOVE " + ", ".join(removals))
+                params = {
+                    'Key': {'id': item['id']},
+                    'UpdateExpression': " ".join(expression)
+                }
+                if updates:
+                    params['ExpressionAttributeValues'] = {f":{name}": value for name, value in updates.items()}
+                table.update_item(**params)
+            updated += 1
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+    return updated
+
+def backfill_name_guards(table, names_table, dry_run: bool = False) -> int:
+    # Items created before name guards existed; when a name is duplicated the
+    # first item scanned keeps it and the rest are logged for manual cleanup
+    claimed = 0
+    scan_params = {'ProjectionExpression': 'id, item_name'}
+    last_key = None
+    while True:
+        if last_key:
+            scan_params['ExclusiveStartKey'] = last_key
+        response = table.scan(**scan_params)
+        for item in response.get('Items', []):
+            if dry_run:
+                claimed += 1
+                continue
+            try:
+                names_table.put_item(
+                    Item={'item_name': item['item_name'], 'id': item['id']},
+                    ConditionExpression='attribute_not_exists(item_name) OR id = :id',
+                    ExpressionAttributeValues={':id': item['id']}
+                )
+                claimed += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                logger.warning(f"Duplicate item name {item['item_name']}: item {item['id']} has no name guard")
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+    return claimed
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill item attributes, bring the inventory indexes up to date and rebuild the aggregates. "
+                    "Run before deploying a release that changes the schema."
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Count rows without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # These calls go straight to boto3 rather than through the scheduler, so
+    # botocore keeps its own retries
+    settings.SCHEDULER_ENABLED = False
+    db = get_db()
+    table = db.Table(settings.DYNAMODB_TABLE)
+    # Rows are converted first so rebuilt indexes keyed on Number attributes
+    # pick up every item
+    updated = backfill_items(table, dry_run=args.dry_run)
+    logger.info(f"Backfilled {updated} items")
+    if not args.dry_run:
+        ensure_indexes(table)
+    names_table = db.Table(settings.NAMES_TABLE) if args.dry_run else ensure_names_table(db)
+    claimed = backfill_name_guards(table, names_table, dry_run=args.dry_run)
+    logger.info(f"Claimed {claimed} item names")
+    if not args.dry_run:
+        # Seeds the aggregates, as scripts.reconcile_aggregates does; until
+        # then listings count matches from the indexes
+        items = ParallelScanner(table).items(ProjectionExpression='category, price')
+        scopes = rebuild_aggregates(ensure_aggregates_table(db), items)
+        logger.info(f"Rebuilt {len(scopes)} aggregate records")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import json
+import logging
+from core.config import settings
+from core.database import ensure_aggregates_table, get_db
+from services.aggregates import compute_aggregates, rebuild_aggregates
+from services.scanner import ParallelScanner
+from utils.helpers import format_price
+
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the per-category item count and price aggregates from a full scan. "
+                    "Writes landing during the scan may be missed, so run it when the inventory is quiet."
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Print the recomputed aggregates without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = get_db()
+    items = ParallelScanner(db.Table(settings.DYNAMODB_TABLE)).items(ProjectionExpression='category, price')
+    if args.dry_run:
+        scopes = compute_aggregates(items)
+    else:
+        scopes = rebuild_aggregates(ensure_aggregates_table(db), items)
+        logger.info(f"Rebuilt {len(scopes)} aggregate records")
+    for scope, (count, price) in sorted(scopes.items()):
+        print(json.dumps({"scope": scope, "count": count, "total_price": format_price(price)}))
+
+if __name__ == "__main__":
+    main()
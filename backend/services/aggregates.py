@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import random
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+from botocore.exceptions import ClientError
+from core.config import settings
+from core.database import AsyncTable, db_manager
+from core.scheduler import CapacityExceeded
+from utils.helpers import get_sgt_time, read_price
+
+logger = logging.getLogger(__name__)
+
+ALL_SCOPE = "all"
+
+# An ADD to a row that a transaction is writing at the same moment is rejected
+# with this; throttling is retried by the scheduler
+CONTENDED_CODES = {'TransactionConflictException'}
+
+def scope_for(category: Optional[str]) -> str:
+    return f"category#{category}" if category else ALL_SCOPE
+
+class AggregateDeltas:
+    def __init__(self):
+        self.by_category: Dict[str, Tuple[int, Decimal]] = {}
+
+    def add(self, category: str, count: int, price: Decimal):
+        current_count, current_price = self.by_category.get(category, (0, Decimal('0')))
+        self.by_category[category] = (current_count + count, current_price + price)
+
+    def created(self, item: dict):
+        self.add(item['category'], 1, read_price(item['price']))
+
+    def repriced(self, old_item: dict, new_price: Decimal):
+        self.add(old_item['category'], 0, new_price - read_price(old_item['price']))
+
+    def deleted(self, item: dict):
+        self.add(item['category'], -1, -read_price(item['price']))
+
+    def scopes(self) -> Dict[str, Tuple[int, Decimal]]:
+        scopes = {}
+        total_count, total_price = 0, Decimal('0')
+        # Every touched scope is updated, even with zero deltas, so its version moves
+        for category, (count, price) in self.by_category.items():
+            scopes[scope_for(category)] = (count, price)
+            total_count += count
+            total_price += price
+        if scopes:
+            scopes[ALL_SCOPE] = (total_count, total_price)
+        return scopes
+
+class AggregateStore:
+    # Item count and price sum per category and for the whole inventory, kept in
+    # their own table and adjusted with atomic ADD on every write. Each write also
+    # bumps the scope's version and stamps last_modified, which is what ETags and
+    # Last-Modified headers are built from. The ADDs run after the item write,
+    # outside its transaction: a transaction touching the shared "all" row would
+    # be cancelled whenever two writes overlapped.
+    def __init__(self, table: AsyncTable, max_attempts: Optional[int] = None):
+        self.table = table
+        self.max_attempts = max_attempts or settings.AGGREGATE_MAX_ATTEMPTS
+        # scope -> (count, price) that DynamoDB rejected; added to the next apply
+        self._unapplied: Dict[str, Tuple[int, Decimal]] = {}
+        self.failed_updates = 0
+        self._seeded = False
+
+    @staticmethod
+    def update_params(scope: str, count: int, price: Decimal) -> dict:
+        return {
+            'Key': {'scope': scope},
+            'UpdateExpression': "ADD item_count :count, total_price :price, #version :one SET last_modified = :now",
+            'ExpressionAttributeNames': {'#version': 'version'},
+            'ExpressionAttributeValues': {':count': count, ':price': price, ':one': 1, ':now': get_sgt_time()}
+        }
+
+    async def _update(self, scope: str, count: int, price: Decimal):
+        attempt = 0
+        while True:
+            try:
+                await self.table.update_item(**self.update_params(scope, count, price))
+                return
+            except ClientError as e:
+                attempt += 1
+                if e.response['Error']['Code'] not in CONTENDED_CODES or attempt >= self.max_attempts:
+                    raise
+            await asyncio.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+
+    async def apply(self, deltas: AggregateDeltas):
+        scopes = deltas.scopes()
+        for scope, (count, price) in self._unapplied.items():
+            current_count, current_price = scopes.get(scope, (0, Decimal('0')))
+            scopes[scope] = (current_count + count, current_price + price)
+        self._unapplied = {}
+
+        results = await asyncio.gather(
+            *(self._update(scope, count, price) for scope, (count, price) in scopes.items()),
+            return_exceptions=True
+        )
+        for (scope, (count, price)), result in zip(scopes.items(), results):
+            if not isinstance(result, Exception):
+                continue
+            self.failed_updates += 1
+            if isinstance(result, (ClientError, CapacityExceeded)):
+                # Rejected, so certainly not applied: carried into the next apply
+                current_count, current_price = self._unapplied.get(scope, (0, Decimal('0')))
+                self._unapplied[scope] = (current_count + count, current_price + price)
+                logger.error(f"Aggregate {scope} update rejected, {count:+d} items {price:+} kept for the next write: {str(result)}")
+            else:
+                # The outcome is unknown, so retrying could count it twice
+                logger.error(
+                    f"Aggregate {scope} update of {count:+d} items {price:+} may not have applied: {str(result)}; "
+                    "run scripts.reconcile_aggregates if totals drift"
+                )
+
+    def metric_samples(self) -> list:
+        # (name, type, help, value) rows for the /metrics collector
+        return [
+            ("inventory_aggregate_update_failures_total", "counter", "Aggregate row updates that failed after retries", self.failed_updates),
+            ("inventory_aggregate_unapplied_scopes", "gauge", "Aggregate rows with rejected deltas waiting for the next write", len(self._unapplied)),
+        ]
+
+    async def get(self, category: Optional[str] = None) -> dict:
+        response = await self.table.get_item(Key={'scope': scope_for(category)})
+        record = response.get('Item', {})
+        return {
+            'count': int(record.get('item_count', 0)),
+            'total_price': record.get('total_price', Decimal('0')),
+            'version': int(record.get('version', 0)),
+            'last_modified': record.get('last_modified')
+        }
+
+    async def seeded(self) -> bool:
+        # Whether the rows were ever rebuilt from a full scan. Before that they
+        # only hold the writes made since aggregates were introduced, so their
+        # counts are not totals. Once seeded, a store stops asking.
+        if not self._seeded:
+            response = await self.table.get_item(Key={'scope': ALL_SCOPE}, ProjectionExpression='seeded_at')
+            self._seeded = 'seeded_at' in response.get('Item', {})
+        return self._seeded
+
+def create_aggregate_store() -> AggregateStore:
+    return AggregateStore(AsyncTable(db_manager.table(settings.AGGREGATES_TABLE)))
+
+def compute_aggregates(items: Iterable[dict]) -> Dict[str, Tuple[int, Decimal]]:
+    deltas = AggregateDeltas()
+    for item in items:
+        if 'category' in item and 'price' in item:
+            deltas.created(item)
+    scopes = deltas.scopes()
+    scopes.setdefault(ALL_SCOPE, (0, Decimal('0')))
+    return scopes
+
+def rebuild_aggregates(aggregates_table, items: Iterable[dict]) -> Dict[str, Tuple[int, Decimal]]:
+    # Synchronous so it can run from a script over a parallel scan of the items table
+    scopes = compute_aggregates(items)
+    versions = {}
+    last_key = None
+    scan_params = {
+        'ProjectionExpression': '#scope, #version',
+        'ExpressionAttributeNames': {'#scope': 'scope', '#version': 'version'}
+    }
+    while True:
+        if last_key:
+            scan_params['ExclusiveStartKey'] = last_key
+        response = aggregates_table.scan(**scan_params)
+        versions.update({record['scope']: int(record.get('version', 0)) for record in response.get('Items', [])})
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+    stale = set(versions) - set(scopes)
+
+    # Versions keep counting up, so ETags issued before the rebuild stop matching
+    now = get_sgt_time()
+    with aggregates_table.batch_writer() as batch:
+        for scope, (count, price) in scopes.items():
+            record = {
+                'scope': scope, 'item_count': count, 'total_price': price,
+                'version': versions.get(scope, 0) + 1, 'last_modified': now
+            }
+            if scope == ALL_SCOPE:
+                # Marks the rows as totals; later ADDs leave it in place
+                record['seeded_at'] = now
+            batch.put_item(Item=record)
+        for scope in stale:
+            batch.delete_item(Key={'scope': scope})
+    return scopes
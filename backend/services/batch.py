@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import random
+from typing import Dict, List, Optional
+from core.config import settings
+from core.database import AsyncTable
+
+logger = logging.getLogger(__name__)
+
+# BatchWriteItem accepts at most 25 put/delete requests per call
+BATCH_WRITE_SIZE = 25
+
+class BatchWriter:
+    def __init__(
+        self,
+        table: AsyncTable,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.table = table
+        self.concurrency = concurrency or settings.BATCH_WRITE_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.BATCH_WRITE_MAX_RETRIES
+
+    async def _write_chunk(self, chunk: List[dict]) -> Dict[str, str]:
+        # Returns id -> error for every item DynamoDB still had not accepted
+        # after max_retries resubmissions of UnprocessedItems
+        pending = [{'PutRequest': {'Item': item}} for item in chunk]
+        attempt = 0
+        while pending:
+            try:
+                response = await self.table.batch_write_item(RequestItems={self.table.name: pending})
+            except Exception as e:
+                logger.error(f"Batch write of {len(pending)} items failed: {str(e)}")
+                return {request['PutRequest']['Item']['id']: str(e) for request in pending}
+
+            pending = response.get('UnprocessedItems', {}).get(self.table.name, [])
+            if not pending:
+                break
+            attempt += 1
+            if attempt > self.max_retries:
+                logger.warning(f"Giving up on {len(pending)} unprocessed items after {self.max_retries} retries")
+                return {
+                    request['PutRequest']['Item']['id']: "Unprocessed after retries"
+                    for request in pending
+                }
+            # Exponential backoff with full jitter, as recommended for throttled batches
+            await asyncio.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+        return {}
+
+    async def put_items(self, items: List[dict]) -> Dict[str, str]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def write(chunk):
+            async with semaphore:
+                return await self._write_chunk(chunk)
+
+        chunks = [items[i:i + BATCH_WRITE_SIZE] for i in range(0, len(items), BATCH_WRITE_SIZE)]
+        errors = {}
+        for chunk_errors in await asyncio.gather(*(write(chunk) for chunk in chunks)):
+            errors.update(chunk_errors)
+        return errors
+
+# BatchGetItem accepts at most 100 keys per call
+BATCH_GET_SIZE = 100
+
+class BatchReader:
+    def __init__(
+        self,
+        table: AsyncTable,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.table = table
+        self.concurrency = concurrency or settings.BATCH_LOOKUP_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.BATCH_WRITE_MAX_RETRIES
+
+    async def _read_chunk(self, chunk: List[str]) -> List[dict]:
+        pending = {'Keys': [{'id': item_id} for item_id in chunk]}
+        items = []
+        attempt = 0
+        while pending:
+            response = await self.table.batch_get_item(RequestItems={self.table.name: pending})
+            items.extend(response.get('Responses', {}).get(self.table.name, []))
+
+            pending = response.get('UnprocessedKeys', {}).get(self.table.name)
+            if not pending:
+                break
+            attempt += 1
+            if attempt > self.max_retries:
+                raise RuntimeError(f"{len(pending['Keys'])} keys still unprocessed after {self.max_retries} retries")
+            await asyncio.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+        return items
+
+    async def get_items(self, item_ids: List[str]) -> List[dict]:
+        # Ids that no longer exist are simply absent from the result
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def read(chunk):
+            async with semaphore:
+                return await self._read_chunk(chunk)
+
+        chunks = [item_ids[i:i + BATCH_GET_SIZE] for i in range(0, len(item_ids), BATCH_GET_SIZE)]
+        return [item for items in await asyncio.gather(*(read(chunk) for chunk in chunks)) for item in items]
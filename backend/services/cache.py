@@ -0,0 +1,358 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Set
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ALL_CATEGORIES = "category:*"
+
+# How long Redis keeps a tag's generation after its last invalidation; far
+# longer than any read that could have taken the previous one
+GENERATION_TTL_SECONDS = 3600
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_skips": self.stale_skips,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class CacheBackend:
+    # Every tag has a generation that invalidating it bumps. A set given the
+    # generation of its tags from before the read that produced the value is
+    # dropped, returning False, when a write invalidated one of them meanwhile.
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def generation(self, tags: Iterable[str]) -> tuple:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = (), generation: Optional[tuple] = None) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+class NullCache(CacheBackend):
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def generation(self, tags: Iterable[str]) -> tuple:
+        return ()
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = (), generation: Optional[tuple] = None) -> bool:
+        return True
+
+    def delete(self, key: str):
+        pass
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        return 0
+
+    def clear(self):
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+class InMemoryCache(CacheBackend):
+    # Per-process TTL + LRU cache. Entries carry tags so writes can drop exactly
+    # the results they affect.
+    def __init__(self, max_entries: int, stats: Optional[CacheStats] = None):
+        self.max_entries = max_entries
+        self.stats = stats or CacheStats()
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self, tags: Iterable[str]) -> tuple:
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in sorted(tags))
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = (), generation: Optional[tuple] = None) -> bool:
+        with self._lock:
+            tags = set(tags)
+            if generation is not None and generation != tuple(self._generations.get(tag, 0) for tag in sorted(tags)):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _remove(self, key: str):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisCache(CacheBackend):
+    # Shared across workers. Eviction is left to the server's maxmemory-policy
+    # (allkeys-lru); tags are Redis sets of keys.
+    def __init__(self, url: str, prefix: str = "inventory:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package") from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._watch_error = redis.WatchError
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def _generation_keys(self, tags: Iterable[str]) -> list:
+        return [self.prefix + "gen:" + tag for tag in sorted(tags)]
+
+    def generation(self, tags: Iterable[str]) -> tuple:
+        keys = self._generation_keys(tags)
+        return tuple(int(value or 0) for value in self.client.mget(keys)) if keys else ()
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = (), generation: Optional[tuple] = None) -> bool:
+        with self.client.pipeline() as pipe:
+            if generation is not None:
+                # WATCH makes the check and the write one step across workers
+                keys = self._generation_keys(tags)
+                try:
+                    if keys:
+                        pipe.watch(*keys)
+                        if tuple(int(value or 0) for value in pipe.mget(keys)) != generation:
+                            return False
+                    pipe.multi()
+                    self._write(pipe, key, value, ttl, tags)
+                    pipe.execute()
+                except self._watch_error:
+                    return False
+                return True
+            self._write(pipe, key, value, ttl, tags)
+            pipe.execute()
+        return True
+
+    def _write(self, pipe, key: str, value: Any, ttl: float, tags: Iterable[str]):
+        pipe.set(self.prefix + key, pickle.dumps(value), px=int(ttl * 1000))
+        for tag in tags:
+            pipe.sadd(self.prefix + "tag:" + tag, key)
+            pipe.pexpire(self.prefix + "tag:" + tag, int(ttl * 1000))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys |= {k.decode() for k in self.client.smembers(self.prefix + "tag:" + tag)}
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.delete(self.prefix + key)
+        for tag in tags:
+            pipe.delete(self.prefix + "tag:" + tag)
+            pipe.incr(self.prefix + "gen:" + tag)
+            pipe.expire(self.prefix + "gen:" + tag, GENERATION_TTL_SECONDS)
+        pipe.execute()
+        return len(keys)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.client.scan_iter(self.prefix + "*") if b":tag:" not in key)
+
+# Filters the service lowercases before querying
+CASE_INSENSITIVE_PARAMS = {"name", "category"}
+
+def _normalize(param: str, value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value.lower() if param in CASE_INSENSITIVE_PARAMS else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+class InventoryCache:
+    def __init__(self, backend: CacheBackend, ttl: float, stats: Optional[CacheStats] = None):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = stats or CacheStats()
+
+    @staticmethod
+    def query_key(operation: str, **params) -> str:
+        # Requests whose filters only differ in case, surrounding whitespace or
+        # 10 vs 10.0 share one entry
+        normalized = sorted((k, _normalize(k, v)) for k, v in params.items() if v is not None)
+        return f"query:{operation}:{normalized!r}"
+
+    @staticmethod
+    def category_tags(category: Optional[str]) -> Set[str]:
+        return {f"category:{category.strip().lower()}"} if category else {ALL_CATEGORIES}
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cache get failed for {key}: {str(e)}")
+            value = None
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def generation(self, tags: Iterable[str]) -> Optional[tuple]:
+        # Taken before a read whose result will be cached under these tags
+        try:
+            return self.backend.generation(tags)
+        except Exception as e:
+            logger.warning(f"Cache generation read failed: {str(e)}")
+            return None
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), generation: Optional[tuple] = None):
+        try:
+            if not self.backend.set(key, value, self.ttl, tags, generation):
+                # A write landed while the value was being read, so it may be stale
+                self.stats.stale_skips += 1
+        except Exception as e:
+            logger.warning(f"Cache set failed for {key}: {str(e)}")
+
+    def get_item(self, item_id: str) -> Optional[dict]:
+        return self.get(f"item:{item_id}")
+
+    def set_item(self, item: dict):
+        self.set(f"item:{item['id']}", item, tags={f"item:{item['id']}"})
+        self.set(f"name:{item['item_name']}", item, tags={f"item:{item['id']}"})
+
+    def get_item_by_name(self, item_name: str) -> Optional[dict]:
+        return self.get(f"name:{item_name}")
+
+    def invalidate_item(self, item_id: str, category: str):
+        # Results filtered to this category and unfiltered results both may hold the item
+        tags = {f"item:{item_id}", ALL_CATEGORIES} | self.category_tags(category)
+        try:
+            removed = self.backend.invalidate_tags(tags)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for item {item_id}: {str(e)}")
+            return
+        self.stats.invalidations += removed
+
+    def invalidate_results(self, category: Optional[str]):
+        # Query results for one category scope, or the unfiltered ones, e.g. after
+        # another worker's write shows up in the inventory version
+        try:
+            removed = self.backend.invalidate_tags(self.category_tags(category))
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {category or 'all categories'}: {str(e)}")
+            return
+        self.stats.invalidations += removed
+
+    def forget_item(self, item_id: str):
+        # For ids found missing on write, where the category is unknown
+        try:
+            removed = self.backend.invalidate_tags({f"item:{item_id}"})
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for item {item_id}: {str(e)}")
+            return
+        self.stats.invalidations += removed
+
+    def as_dict(self) -> dict:
+        stats = self.stats.as_dict()
+        stats["backend"] = type(self.backend).__name__
+        try:
+            stats["entries"] = len(self.backend)
+        except Exception:
+            stats["entries"] = None
+        return stats
+
+    def metric_samples(self) -> list:
+        # (name, type, help, value) rows for the /metrics collector
+        stats = self.as_dict()
+        samples = [
+            ("inventory_cache_hits_total", "counter", "Query cache hits", stats["hits"]),
+            ("inventory_cache_misses_total", "counter", "Query cache misses", stats["misses"]),
+            ("inventory_cache_evictions_total", "counter", "Query cache entries evicted for space", stats["evictions"]),
+            ("inventory_cache_invalidations_total", "counter", "Query cache entries dropped by writes", stats["invalidations"]),
+            ("inventory_cache_stale_skips_total", "counter", "Query results not cached because a write overlapped the read", stats["stale_skips"]),
+        ]
+        if stats["entries"] is not None:
+            samples.append(("inventory_cache_entries", "gauge", "Entries held by the query cache", stats["entries"]))
+        return samples
+
+def create_cache() -> InventoryCache:
+    stats = CacheStats()
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisCache(settings.CACHE_REDIS_URL)
+    elif settings.CACHE_BACKEND == "memory":
+        backend = InMemoryCache(settings.CACHE_MAX_ENTRIES, stats)
+    else:
+        backend = NullCache()
+    return InventoryCache(backend, settings.CACHE_TTL_SECONDS, stats)
@@ -0,0 +1,103 @@
+import asyncio
+import itertools
+import logging
+from collections import deque
+from typing import AsyncIterator, List, Optional, Tuple
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+CHANGE_TYPES = ("created", "updated", "deleted")
+
+class ChangeFeed:
+    # In-process log of item changes made by this worker. Every event gets the
+    # next sequence number and the last `history` events are kept for resuming.
+    # Listeners hold a position in the log rather than a queue of their own, so
+    # a slow client never holds up writers: it falls behind, and once its
+    # position has left the log it is told to reload instead.
+    def __init__(self, history: int):
+        # Sequence numbers restart with the process; the epoch tells a resuming
+        # client that its position belongs to an earlier one
+        self.epoch = uuid4().hex[:8]
+        self.sequence = 0
+        self._events: deque = deque(maxlen=history)
+        self._published = asyncio.Event()
+        self.listeners = 0
+        self.resets = 0
+
+    def publish(self, change: str, item: dict, at: str):
+        self.sequence += 1
+        self._events.append((self.sequence, change, item.get('category'), {
+            "type": change,
+            "sequence": self.sequence,
+            "at": at,
+            "item": item
+        }))
+        # Wakes every listener waiting on the current event, then starts a new one
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    def event_id(self, sequence: int) -> str:
+        return f"{self.epoch}:{sequence}"
+
+    def _oldest(self) -> int:
+        return self._events[0][0] if self._events else self.sequence + 1
+
+    def _position(self, last_event_id: Optional[str]) -> Optional[int]:
+        # Sequence to continue after, or None when the client has to reload
+        if not last_event_id:
+            return self.sequence
+        epoch, _, sequence = last_event_id.partition(":")
+        if epoch != self.epoch or not sequence.isdigit() or int(sequence) > self.sequence:
+            return None
+        return int(sequence)
+
+    def _after(self, sequence: int) -> List[tuple]:
+        return list(itertools.islice(self._events, sequence - self._oldest() + 1, None))
+
+    async def listen(
+        self,
+        category: Optional[str] = None,
+        last_event_id: Optional[str] = None,
+        heartbeat_seconds: float = 15
+    ) -> AsyncIterator[Optional[Tuple[str, str, dict]]]:
+        # Yields (event id, event type, data) and None as a keep-alive when nothing
+        # happened for heartbeat_seconds. A "reset" event means events were missed:
+        # reload the full state, then keep applying the events that follow.
+        if category:
+            category = category.lower()
+        self.listeners += 1
+        try:
+            position = self._position(last_event_id)
+            while True:
+                if position is not None and position < self._oldest() - 1:
+                    # Events after position have already left the log
+                    logger.info(f"Change feed listener fell behind at {position}; sending reset")
+                    position = None
+                if position is None:
+                    self.resets += 1
+                    position = self.sequence
+                    yield self.event_id(position), "reset", {"sequence": position}
+                    continue
+                published = self._published
+                events = self._after(position)
+                if not events:
+                    try:
+                        await asyncio.wait_for(published.wait(), timeout=heartbeat_seconds)
+                    except asyncio.TimeoutError:
+                        yield None
+                    continue
+                for sequence, change, event_category, data in events:
+                    position = sequence
+                    if category is None or event_category == category:
+                        yield self.event_id(sequence), change, data
+        finally:
+            self.listeners -= 1
+
+    def metric_samples(self) -> list:
+        # (name, type, help, value) rows for the /metrics collector
+        return [
+            ("inventory_feed_events_total", "counter", "Item changes published to the change feed", self.sequence),
+            ("inventory_feed_listeners", "gauge", "Clients connected to the change feed", self.listeners),
+            ("inventory_feed_resets_total", "counter", "Change feed clients told to reload after missing events", self.resets),
+        ]
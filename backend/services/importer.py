@@ -0,0 +1,164 @@
+import asyncio
+import codecs
+import csv
+import json
+import logging
+import time
+from typing import AsyncIterator, List, Optional, Set
+from pydantic import ValidationError
+from core.config import settings
+from core.models import ItemCreate
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Splits a byte stream into lines without holding more than one partial line
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[tuple]:
+    # Yields (line number, record or None, error or None)
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {str(e)}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+        else:
+            # One physical line per row: quoted fields may contain commas but not newlines
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield line_number, dict(zip(header, values)), None
+
+class ImportProgress:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.superseded = 0
+        self.errors = []
+
+    def reject(self, line_number: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": error})
+
+    def report(self, done: bool = False) -> dict:
+        elapsed = time.perf_counter() - self.started
+        report = {
+            "done": done,
+            "rows": self.rows,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "superseded": self.superseded,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else 0.0
+        }
+        if self.errors:
+            report["errors"] = self.errors
+            self.errors = []
+        return report
+
+class ItemImporter:
+    # Validates rows in fixed-size chunks and keeps at most `concurrency` chunks
+    # in flight, so memory stays bounded regardless of input size
+    def __init__(self, service, chunk_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.service = service
+        self.chunk_size = min(chunk_size or settings.IMPORT_CHUNK_SIZE, settings.BATCH_MAX_ITEMS)
+        self.concurrency = concurrency or settings.IMPORT_CONCURRENCY
+
+    async def _write(self, chunk: List[ItemCreate], progress: ImportProgress):
+        try:
+            result = await self.service.batch_upsert_items(chunk)
+        except Exception as e:
+            logger.error(f"Import chunk of {len(chunk)} items failed: {str(e)}")
+            progress.failed += len(chunk)
+            return
+        progress.created += result.created
+        progress.updated += result.updated
+        progress.failed += result.failed
+        progress.superseded += result.superseded
+
+    async def run(self, lines: AsyncIterator[str], fmt: str) -> AsyncIterator[dict]:
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+        progress = ImportProgress()
+        in_flight = {}
+        chunk = []
+
+        async def dispatch(chunk: List[ItemCreate]) -> List[dict]:
+            reports = []
+            names: Set[str] = {item.item_name for item in chunk}
+            # A name already being written by an earlier chunk must land first, so
+            # the later row's price is the one that stays
+            blocking = [task for task, task_names in in_flight.items() if names & task_names]
+            while blocking or len(in_flight) >= self.concurrency:
+                done, _ = await asyncio.wait(
+                    blocking or list(in_flight), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    in_flight.pop(task, None)
+                    reports.append(progress.report())
+                blocking = [task for task in blocking if task in in_flight]
+            task = asyncio.ensure_future(self._write(chunk, progress))
+            in_flight[task] = names
+            return reports
+
+        async for line_number, record, error in iter_records(lines, fmt):
+            progress.rows += 1
+            if error:
+                progress.reject(line_number, error)
+                continue
+            try:
+                chunk.append(ItemCreate.model_validate(record))
+            except ValidationError as e:
+                progress.reject(line_number, "; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            progress.accepted += 1
+            if len(chunk) >= self.chunk_size:
+                for report in await dispatch(chunk):
+                    yield report
+                chunk = []
+
+        if chunk:
+            for report in await dispatch(chunk):
+                yield report
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        logger.info(f"Import finished: {progress.rows} rows, {progress.rejected} rejected, {progress.failed} failed")
+        yield progress.report(done=True)
@@ -1,58 +1,541 @@
+import asyncio
+import random
+from datetime import datetime
 from uuid import uuid4
 from decimal import Decimal
 from fastapi import HTTPException
 import logging
-from core.database import get_db
-from core.models import ItemCreate, ItemResponse, PriceUpdate, QueryResponse
-from typing import Optional
-from utils.helpers import format_price, get_sgt_time, parse_datetime
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from core.config import settings
+from core.database import LISTING_PARTITION, AsyncTable, db_manager
+from core.models import (
+    BatchItemResult, BatchUpsertResponse, ItemCreate, PriceUpdate, SummaryResponse
+)
+from services.aggregates import AggregateDeltas, create_aggregate_store, scope_for
+from services.batch import BatchReader, BatchWriter
+from services.cache import create_cache
+from services.changefeed import ChangeFeed
+from services.importer import ItemImporter
+from services.kernel import page_items, select_items, total_price
+from services.planner import SORTED_INDEXES, QueryPlan, plan_items_query, plan_sorted_query
+from services.scanner import ParallelScanner
+from services.search import create_search_index
+from services.singleflight import SingleFlight
+from services.snapshot import SNAPSHOT_FIELDS, SnapshotData, create_snapshot, price_bounds, time_bounds
+from services.writebehind import BufferedPrice, create_price_buffer
+from typing import AsyncIterator, Dict, List, Optional
+from utils.helpers import (
+    SGT, date_bucket, decode_cursor, encode_cursor, format_price, get_sgt_time, parse_datetime, parse_since,
+    read_price, to_price_number
+)
 
 logger = logging.getLogger(__name__)
 
+_deserializer = TypeDeserializer()
+
+REQUIRED_ITEM_FIELDS = {'id', 'item_name', 'category', 'price', 'last_updated_dt'}
+
+# Cancellation reasons that say nothing about the item itself; the create is retried
+TRANSIENT_CANCELLATIONS = {'TransactionConflict', 'ThrottlingError', 'ProvisionedThroughputExceeded'}
+
+class WriteConflict(Exception):
+    pass
+
 class InventoryService:
     def __init__(self):
-        self.db = get_db()
-        self.table = self.db.Table('Inventory')
+        # Tables resolve lazily, so constructing the service does no I/O
+        table = db_manager.table(settings.DYNAMODB_TABLE)
+        self.table = AsyncTable(table)
+        self.names = AsyncTable(db_manager.table(settings.NAMES_TABLE))
+        self.scanner = ParallelScanner(table)
+        self.stream_scanner = ParallelScanner(table, max_workers=settings.STREAM_SCAN_MAX_WORKERS)
+        self.batch_writer = BatchWriter(self.table)
+        self.batch_reader = BatchReader(self.table)
+        self.cache = create_cache()
+        self.aggregates = create_aggregate_store()
+        self.search = create_search_index(self._load_names, self._load_name_changes)
+        self.snapshot = create_snapshot(self._load_items, self._load_changes)
+        self.flights = SingleFlight()
+        self.feed = ChangeFeed(settings.FEED_HISTORY)
+        self.prices = create_price_buffer(self._write_prices)
+        # Last (version, last_modified) read per aggregate scope
+        self._seen_versions: Dict[str, tuple] = {}
+
+    @staticmethod
+    def _is_condition_failure(e: Exception) -> bool:
+        return isinstance(e, ClientError) and e.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+    async def _find_by_name(self, item_name: str) -> Optional[dict]:
+        cached = self.cache.get_item_by_name(item_name)
+        if cached is not None:
+            return cached
+        response = await self.table.query(
+            IndexName='NameIndex',
+            KeyConditionExpression='item_name = :name',
+            ExpressionAttributeValues={':name': item_name}
+        )
+        items = response['Items'] if 'Items' in response else []
+        if items:
+            self.cache.set_item(items[0])
+            return items[0]
+        return None
+
+    async def _load_names(self) -> AsyncIterator[tuple]:
+        async for item in self.scanner.aitems(ProjectionExpression='id, item_name'):
+            yield item['id'], item['item_name']
+
+    async def _load_name_changes(self, since: str) -> List[tuple]:
+        return [(item['id'], item['item_name']) for item in await self._load_changes(since) if 'item_name' in item]
+
+    async def _load_items(self) -> AsyncIterator[dict]:
+        async for item in self.scanner.aitems(ProjectionExpression=', '.join(sorted(SNAPSHOT_FIELDS))):
+            yield item
+
+    async def _load_changes(self, since: str) -> List[dict]:
+        # Rows written at or after since, through the same DateIndex plan as a dt_from filter
+        return await self._execute_plan(plan_items_query(dt_from=since))
+
+    async def _fresh_snapshot(self) -> Optional[SnapshotData]:
+        # The snapshot's data when the read mode is on and within its staleness
+        # bound; otherwise reads go to DynamoDB
+        if not settings.SNAPSHOT_ENABLED:
+            return None
+        try:
+            await self.snapshot.ensure_loaded()
+        except Exception as e:
+            logger.error(f"Inventory snapshot unavailable: {str(e)}")
+            return None
+        return self.snapshot.data if self.snapshot.fresh else None
+
+    def _item_written(self, item: dict, change: str):
+        if settings.SEARCH_INDEX_ENABLED:
+            self.search.add(item['id'], item['item_name'])
+        if settings.SNAPSHOT_ENABLED:
+            self.snapshot.upsert(item)
+        self.flights.forget()
+        self.cache.invalidate_item(item['id'], item['category'])
+        self.cache.set_item(item)
+        self.feed.publish(change, self._item_row(item), item['last_updated_dt'])
+
+    def _item_removed(self, item_id: str):
+        if settings.SEARCH_INDEX_ENABLED:
+            self.search.remove(item_id)
+        if settings.SNAPSHOT_ENABLED:
+            self.snapshot.remove(item_id)
+
+    async def _shared_read(self, key: str, read):
+        # Identical concurrent queries (keyed like the cache) share one DynamoDB read
+        if not settings.COALESCE_ENABLED:
+            return await read()
+        return await self.flights.run(key, read)
+
+    async def _set_price(self, item_id: str, price: Decimal, now: str, only_if_older: bool = False) -> dict:
+        # ALL_OLD gives the previous price for the aggregate delta; the new item
+        # is the old one with the updated attributes applied. only_if_older makes
+        # a delayed write lose to anything written after it was accepted.
+        condition = "attribute_exists(id)"
+        if only_if_older:
+            condition += " AND last_updated_dt < :dt"
+        response = await self.table.update_item(
+            Key={'id': item_id},
+            UpdateExpression="SET price = :price, last_updated_dt = :dt, last_updated_date = :day",
+            ConditionExpression=condition,
+            ExpressionAttributeValues={
+                ":price": price,
+                ":dt": now,
+                ":day": date_bucket(now)
+            },
+            ReturnValues="ALL_OLD"
+        )
+        old_item = response['Attributes']
+        self._item_written(dict(old_item, price=price, last_updated_dt=now, last_updated_date=date_bucket(now)), "updated")
+        return old_item
 
     async def create_or_update_item(self, item: ItemCreate) -> dict:
         try:
-            response = self.table.query(
-                IndexName='NameIndex',
-                KeyConditionExpression='item_name = :name',
-                ExpressionAttributeValues={':name': item.item_name}
+            return await self._upsert_item(item)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in create_or_update_item: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _create_item(self, item: ItemCreate, price: Decimal, now: str, replaces: Optional[str] = None):
+        # Claims the name guard and writes the item in one transaction, then applies
+        # the aggregate deltas. Returns (True, new id), or (False, id owning the
+        # name) when another item holds it; raises WriteConflict when a concurrent
+        # write or throttling cancelled the transaction.
+        item_id = str(uuid4())
+        new_item = {
+            'id': item_id,
+            'item_name': item.item_name,
+            'category': item.category,
+            'price': price,
+            'listing': LISTING_PARTITION,
+            'last_updated_dt': now,
+            'last_updated_date': date_bucket(now)
+        }
+        guard = {
+            'TableName': self.names.name,
+            'Item': {'item_name': item.item_name, 'id': item_id},
+            'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+        }
+        if replaces:
+            # The guard points at an item that no longer exists
+            guard['ConditionExpression'] = 'attribute_not_exists(item_name) OR id = :stale'
+            guard['ExpressionAttributeValues'] = {':stale': replaces}
+        else:
+            guard['ConditionExpression'] = 'attribute_not_exists(item_name)'
+
+        try:
+            await self.table.transact_write_items(TransactItems=[
+                {'Put': guard},
+                {'Put': {
+                    'TableName': self.table.name,
+                    'Item': new_item,
+                    'ConditionExpression': 'attribute_not_exists(id)'
+                }}
+            ])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            # One reason per action, in order: the guard, then the item
+            guard_reason, item_reason = (e.response.get('CancellationReasons', []) + [{}, {}])[:2]
+            if guard_reason.get('Code') == 'ConditionalCheckFailed':
+                return False, await self._name_owner(item.item_name, guard_reason.get('Item'))
+            codes = {guard_reason.get('Code'), item_reason.get('Code')}
+            # A failed item condition means a duplicate id; a fresh one is drawn on retry
+            if codes & TRANSIENT_CANCELLATIONS or item_reason.get('Code') == 'ConditionalCheckFailed':
+                raise WriteConflict(f"Create of {item.item_name} cancelled: {sorted(code for code in codes if code and code != 'None')}")
+            raise
+
+        self._item_written(new_item, "created")
+        deltas = AggregateDeltas()
+        deltas.created(new_item)
+        await self.aggregates.apply(deltas)
+        logger.info(f"Created new item {item_id} with price {price}")
+        return True, item_id
+
+    async def _claim_name(self, item_name: str, item_id: str) -> tuple:
+        # (True, item_id) once the free name is claimed, or (False, id of the
+        # item already holding it)
+        try:
+            await self.names.put_item(
+                Item={'item_name': item_name, 'id': item_id},
+                ConditionExpression='attribute_not_exists(item_name)',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
             )
+        except ClientError as e:
+            if not self._is_condition_failure(e):
+                raise
+            return False, await self._name_owner(item_name, e.response.get('Item'))
+        return True, item_id
 
-            items = response['Items'] if 'Items' in response else []
-            now = get_sgt_time()
-            price_str = format_price(item.price)
-            
-            if items:
-                item_id = items[0]['id']
-                self.table.update_item(
-                    Key={'id': item_id},
-                    UpdateExpression="SET price = :price, last_updated_dt = :dt",
-                    ExpressionAttributeValues={
-                        ":price": price_str,
-                        ":dt": now
-                    }
+    async def _name_owner(self, item_name: str, guard: Optional[dict]) -> Optional[str]:
+        if guard is not None:
+            # Cancellation reasons are not run through the resource's type conversion
+            return _deserializer.deserialize(guard['id'])
+        response = await self.names.get_item(Key={'item_name': item_name}, ConsistentRead=True)
+        return response.get('Item', {}).get('id')
+
+    async def _upsert_item(self, item: ItemCreate) -> dict:
+        # A cached item is updated in place; otherwise creation is attempted first
+        # and a taken name falls through to updating its owner. A failed condition
+        # in either step means a concurrent write moved things, so retry.
+        now = get_sgt_time()
+        price = to_price_number(item.price)
+        cached = self.cache.get_item_by_name(item.item_name)
+        item_id = cached['id'] if cached else None
+        stale_id = None
+        conflicted = False
+
+        for attempt in range(settings.UPSERT_MAX_ATTEMPTS):
+            if item_id is None:
+                try:
+                    created, item_id = await self._create_item(item, price, now, replaces=stale_id)
+                except WriteConflict as e:
+                    logger.warning(str(e))
+                    conflicted = True
+                    await asyncio.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+                    continue
+                conflicted = False
+                if created:
+                    return {"id": item_id}
+                if item_id is None:
+                    continue
+
+            try:
+                old_item = await self._set_price(item_id, price, now)
+            except ClientError as e:
+                if not self._is_condition_failure(e):
+                    raise
+                self.cache.forget_item(item_id)
+                self._item_removed(item_id)
+                stale_id, item_id = item_id, None
+                continue
+
+            deltas = AggregateDeltas()
+            deltas.repriced(old_item, price)
+            await self.aggregates.apply(deltas)
+            logger.info(f"Updated item {item_id} with new price {price}")
+            return {"id": item_id}
+
+        if conflicted:
+            raise HTTPException(
+                status_code=503, detail=f"{item.item_name} could not be written under contention, retry later",
+                headers={"Retry-After": "1"}
+            )
+        # The name kept changing owner between the create and the update
+        raise HTTPException(status_code=409, detail=f"{item.item_name} is being written concurrently")
+
+    async def _find_many_by_name(self, item_names: List[str]) -> Dict[str, dict]:
+        # NameIndex is a GSI, so BatchGetItem cannot use it; run the lookups concurrently instead
+        semaphore = asyncio.Semaphore(settings.BATCH_LOOKUP_CONCURRENCY)
+
+        async def find(item_name):
+            async with semaphore:
+                return item_name, await self._find_by_name(item_name)
+
+        found = await asyncio.gather(*(find(item_name) for item_name in item_names))
+        return {item_name: item for item_name, item in found if item is not None}
+
+    async def batch_upsert_items(self, items: List[ItemCreate]) -> BatchUpsertResponse:
+        try:
+            if len(items) > settings.BATCH_MAX_ITEMS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"At most {settings.BATCH_MAX_ITEMS} items per batch"
                 )
-                logger.info(f"Updated item {item_id} with new price {price_str}")
-            else:
-                item_id = str(uuid4())
-                self.table.put_item(Item={
-                    'id': item_id,
-                    'item_name': item.item_name,
+
+            # Repeated names collapse into one write: the last row with a name wins
+            # and the earlier ones are reported as superseded
+            last_index = {item.item_name: index for index, item in enumerate(items)}
+            existing = await self._find_many_by_name(list(last_index))
+            now = get_sgt_time()
+
+            new_rows = {}
+            for item_name, index in last_index.items():
+                if item_name in existing:
+                    continue
+                item = items[index]
+                new_rows[item_name] = {
+                    'id': str(uuid4()),
+                    'item_name': item_name,
                     'category': item.category,
-                    'price': price_str,
-                    'last_updated_dt': now
-                })
-                logger.info(f"Created new item {item_id} with price {price_str}")
+                    'price': to_price_number(item.price),
+                    'listing': LISTING_PARTITION,
+                    'last_updated_dt': now,
+                    'last_updated_date': date_bucket(now)
+                }
+
+            # BatchWriteItem cannot be conditional, so every new name is claimed
+            # with its own conditional put before any row is written. A name
+            # another writer claimed first is updated through its owner instead.
+            semaphore = asyncio.Semaphore(settings.BATCH_UPDATE_CONCURRENCY)
+            # item_name -> (id, status, error) of the write made for it
+            outcomes = {}
+
+            async def claim(item_name: str, row: dict):
+                async with semaphore:
+                    try:
+                        claimed, owner = await self._claim_name(item_name, row['id'])
+                    except Exception as e:
+                        logger.error(f"Failed to claim name for item {row['id']}: {str(e)}")
+                        outcomes[item_name] = (row['id'], "failed", str(e))
+                        return
+                if claimed:
+                    return
+                if owner is None:
+                    outcomes[item_name] = (row['id'], "failed", "Name is being written concurrently")
+                    return
+                existing[item_name] = {'id': owner}
+
+            await asyncio.gather(*(claim(item_name, row) for item_name, row in new_rows.items()))
+            new_rows = {
+                item_name: row for item_name, row in new_rows.items()
+                if item_name not in outcomes and item_name not in existing
+            }
+
+            errors = await self.batch_writer.put_items(list(new_rows.values()))
+            # Rows that never landed give their names back
+            await asyncio.gather(*(self._release_name(row) for row in new_rows.values() if row['id'] in errors))
+
+            deltas = AggregateDeltas()
+            for item_name, row in new_rows.items():
+                if row['id'] in errors:
+                    outcomes[item_name] = (row['id'], "failed", errors[row['id']])
+                    continue
+                self._item_written(row, "created")
+                deltas.created(row)
+                outcomes[item_name] = (row['id'], "created", None)
+
+            # BatchWriteItem returns no old values, so existing items are updated
+            # one by one and their deltas come from the old image each update
+            # returns rather than the price the lookup saw
+            async def update(item_name: str):
+                item_id = existing[item_name]['id']
+                price = to_price_number(items[last_index[item_name]].price)
+                async with semaphore:
+                    try:
+                        old_item = await self._set_price(item_id, price, now)
+                    except Exception as e:
+                        if not self._is_condition_failure(e):
+                            logger.error(f"Batch update of item {item_id} failed: {str(e)}")
+                            outcomes[item_name] = (item_id, "failed", str(e))
+                            return
+                        self.cache.forget_item(item_id)
+                        outcomes[item_name] = (item_id, "failed", "Item was deleted during the batch")
+                        return
+                deltas.repriced(old_item, price)
+                outcomes[item_name] = (item_id, "updated", None)
+
+            await asyncio.gather(*(update(item_name) for item_name in existing))
+            await self.aggregates.apply(deltas)
+
+            results = []
+            for index, item in enumerate(items):
+                item_id, status, error = outcomes[item.item_name]
+                if index != last_index[item.item_name]:
+                    results.append(BatchItemResult(index=index, id=item_id, status="superseded"))
+                else:
+                    results.append(BatchItemResult(index=index, id=item_id, status=status, error=error))
+
+            written = sum(1 for _, status, _ in outcomes.values() if status != "failed")
+            logger.info(f"Batch upserted {written} of {len(outcomes)} items")
+            return BatchUpsertResponse(
+                results=results,
+                created=sum(1 for r in results if r.status == "created"),
+                updated=sum(1 for r in results if r.status == "updated"),
+                failed=sum(1 for r in results if r.status == "failed"),
+                superseded=sum(1 for r in results if r.status == "superseded")
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in batch_upsert_items: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def import_items(self, lines: AsyncIterator[str], fmt: str) -> AsyncIterator[dict]:
+        return ItemImporter(self).run(lines, fmt)
+
+    async def _query_all(self, params: dict) -> List[dict]:
+        params = dict(params)
+        items = []
+        last_key = None
+        while True:
+            if last_key:
+                params['ExclusiveStartKey'] = last_key
+            response = await self.table.query(**params)
+            items.extend(response.get('Items', []))
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+        return items
+
+    async def _execute_plan(self, plan: QueryPlan) -> List[dict]:
+        if plan.operation == 'scan':
+            return [item async for item in self.scanner.aitems(**plan.requests[0])]
+
+        # Per-day DateIndex queries are independent, so run them concurrently
+        results = await asyncio.gather(*(self._query_all(params) for params in plan.requests))
+        return [item for items in results for item in items]
+
+    async def _iter_plan_pages(self, plan: QueryPlan) -> AsyncIterator[List[dict]]:
+        # Only streams read this way; a paused client leaves the scan workers
+        # waiting on the bounded page queue, so they use their own executor
+        if plan.operation == 'scan':
+            async for page in self.stream_scanner.apages(**plan.requests[0]):
+                yield page
+            return
+
+        for params in plan.requests:
+            params = dict(params)
+            last_key = None
+            while True:
+                if last_key:
+                    params['ExclusiveStartKey'] = last_key
+                response = await self.table.query(**params)
+                yield response.get('Items', [])
+
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    break
+
+    @staticmethod
+    def _item_row(item: dict) -> dict:
+        # Plain dict in ItemResponse's serialized shape; building the model per
+        # row dominated the cost of large responses
+        return {
+            'id': item['id'],
+            'item_name': item['item_name'],
+            'category': item['category'],
+            'price': float(read_price(item['price']))
+        }
+
+    @staticmethod
+    def _item_payload(item: dict) -> Optional[dict]:
+        try:
+            if not item.keys() >= REQUIRED_ITEM_FIELDS:
+                logger.warning(f"Skipping incomplete item: {item.get('id')}")
+                return None
             
-            return {"id": item_id}
-        
+            return InventoryService._item_row(item)
         except Exception as e:
-            logger.error(f"Error in create_or_update_item: {str(e)}")
+            logger.error(f"Error processing item {item.get('id')}: {str(e)}")
+            return None
+
+    def stream_items(
+        self,
+        dt_from: Optional[str] = None,
+        dt_to: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        # Planned eagerly so bad filters fail before the response has started
+        try:
+            if category:
+                category = category.lower()
+            plan = plan_items_query(category=category, dt_from=dt_from, dt_to=dt_to)
+        except Exception as e:
+            logger.error(f"Error in stream_items: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
+        logger.info(f"Streaming items with filters - dt_from: {dt_from}, dt_to: {dt_to}, category: {category} using {plan}")
+        return self._stream_items(plan, category, dt_from, dt_to)
+
+    async def _stream_items(
+        self, plan: QueryPlan, category: Optional[str], dt_from: Optional[str], dt_to: Optional[str]
+    ) -> AsyncIterator[dict]:
+        data = await self._fresh_snapshot()
+        if data is None:
+            async for record in self._stream_plan(plan):
+                yield record
+            return
+        rows = data.select(category=category, time_range=time_bounds(dt_from, dt_to))
+        for row in rows:
+            yield data.item(row)
+        yield {"count": len(rows), "total_price": format_price(data.total(rows))}
+
+    async def _stream_plan(self, plan: QueryPlan) -> AsyncIterator[dict]:
+        # Items are yielded page by page as DynamoDB returns them; the total is
+        # accumulated on the way and sent last as a trailer record
+        count = 0
+        total = Decimal('0')
+        try:
+            async for page in self._iter_plan_pages(plan):
+                for item in page:
+                    payload = self._item_payload(item)
+                    if payload is not None:
+                        count += 1
+                        total += read_price(item['price'])
+                        yield payload
+        except Exception as e:
+            logger.error(f"Error in stream_items after {count} items: {str(e)}")
+            yield {"error": str(e)}
+            return
+        logger.info(f"Streamed {count} items")
+        yield {"count": count, "total_price": format_price(total)}
 
     async def query_items(
         self,
@@ -63,79 +546,130 @@ class InventoryService:
         try:
             if category:
                 category = category.lower()
-                
-            dt_from_parsed = parse_datetime(dt_from) if dt_from else None
-            dt_to_parsed = parse_datetime(dt_to) if dt_to else None
+
+            data = await self._fresh_snapshot()
+            if data is not None:
+                rows = data.select(category=category, time_range=time_bounds(dt_from, dt_to))
+                logger.info(f"Returning {len(rows)} items from the inventory snapshot")
+                return {"items": data.items(rows), "total_price": format_price(data.total(rows))}
+
+            cache_key = self.cache.query_key('query_items', dt_from=dt_from, dt_to=dt_to, category=category)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            return await self._shared_read(cache_key, lambda: self._read_items(cache_key, dt_from, dt_to, category))
             
-            logger.info(f"Querying items with filters - dt_from: {dt_from_parsed}, dt_to: {dt_to_parsed}, category: {category}")
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in query_items: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _read_items(self, cache_key: str, dt_from: Optional[str], dt_to: Optional[str], category: Optional[str]) -> dict:
+        tags = self.cache.category_tags(category)
+        generation = self.cache.generation(tags)
+        plan = plan_items_query(category=category, dt_from=dt_from, dt_to=dt_to)
+        logger.info(f"Querying items with filters - dt_from: {dt_from}, dt_to: {dt_to}, category: {category} using {plan}")
+
+        items = await self._execute_plan(plan)
+        
+        filtered = []
+        complete = []
+        
+        for item in items:
+            payload = self._item_payload(item)
+            if payload is not None:
+                filtered.append(payload)
+                complete.append(item)
+        
+        logger.info(f"Returning {len(filtered)} filtered items")
+        result = {
+            "items": filtered,
+            "total_price": format_price(total_price(complete))
+        }
+        self.cache.set(cache_key, result, tags=tags, generation=generation)
+        return result
 
-            scan_params = {}
+    async def get_summary(self, category: Optional[str] = None) -> SummaryResponse:
+        # A single read of the materialized aggregate instead of a scan
+        try:
             if category:
-                scan_params['FilterExpression'] = 'category = :cat'
-                scan_params['ExpressionAttributeValues'] = {':cat': category}
-            
-            items = []
-            last_key = None
-            
-            # Paginated scan
-            while True:
-                if last_key:
-                    scan_params['ExclusiveStartKey'] = last_key
-                
-                response = self.table.scan(**scan_params)
-                items_list = response['Items'] if 'Items' in response else []
-                items.extend(items_list)
-                
-                last_key = response.get('LastEvaluatedKey')
-                if not last_key:
-                    break
-            
-            # Filter items with strict comparisons
-            filtered = []
-            total = Decimal('0')
-            
-            for item in items:
-                try:
-                    if not all(k in item for k in ['id', 'item_name', 'category', 'price', 'last_updated_dt']):
-                        logger.warning(f"Skipping incomplete item: {item.get('id')}")
-                        continue
-                    
-                    item_dt = parse_datetime(item['last_updated_dt'])
-                    include = True
-                    
-                    logger.debug(f"Comparing: {item_dt} to range {dt_from_parsed} - {dt_to_parsed}")
-                    
-                    if dt_from_parsed and item_dt < dt_from_parsed:
-                        include = False
-                        logger.debug("Excluded - before start date")
-                    if dt_to_parsed and item_dt > dt_to_parsed:
-                        include = False
-                        logger.debug("Excluded - after end date")
-                    
-                    if include:
-                        filtered.append(ItemResponse(
-                            id=item['id'],
-                            item_name=item['item_name'],
-                            category=item['category'],
-                            price=float(item['price'])
-                        ).model_dump(by_alias=True))
-                        total += Decimal(item['price'])
-                        logger.debug("Included")
-                    else:
-                        logger.debug(f"Excluded item {item['id']} at {item_dt}")
-                except Exception as e:
-                    logger.error(f"Error processing item {item.get('id')}: {str(e)}")
-                    continue
-            
-            logger.info(f"Returning {len(filtered)} filtered items")
+                category = category.lower()
+            summary = await self.aggregates.get(category)
+            return SummaryResponse(
+                category=category,
+                count=summary['count'],
+                total_price=format_price(summary['total_price'])
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in get_summary: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def read_version(self, category: Optional[str] = None) -> Optional[dict]:
+        # Version of the data a read for this category scope returns, for ETag and
+        # Last-Modified. Callers read it before the data, so a concurrent write can
+        # only leave the body newer than its validators, never older. None means
+        # no validators: disabled, unavailable, or a write too recent to be
+        # visible to every read yet.
+        if not settings.ETAG_ENABLED:
+            return None
+        try:
+            if category:
+                category = category.lower()
+            record = await self.aggregates.get(category)
+        except Exception as e:
+            logger.warning(f"Inventory version unavailable: {str(e)}")
+            return None
+
+        scope = scope_for(category)
+        seen = (record['version'], record['last_modified'])
+        if self._seen_versions.get(scope, seen) != seen:
+            # Another worker wrote to this scope; results cached or in flight here predate it
+            self.cache.invalidate_results(category)
+            self.flights.forget()
+        self._seen_versions[scope] = seen
+
+        if record['last_modified']:
+            age = datetime.now(SGT) - parse_datetime(record['last_modified'])
+            if age.total_seconds() < settings.ETAG_SETTLE_SECONDS:
+                return None
+        return {
+            'scope': scope,
+            'version': record['version'],
+            'last_modified': record['last_modified'],
+            'snapshot': self.snapshot.generation if settings.SNAPSHOT_ENABLED else None
+        }
+
+    async def query_changes(self, changed_since: str, category: Optional[str] = None) -> dict:
+        # Items written after changed_since (ISO timestamp or a Last-Modified
+        # value), newest write last. Deletes are not listed; the counts from
+        # /items/summary show them. last_modified is the changed_since to send next.
+        try:
+            since = parse_since(changed_since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            if category:
+                category = category.lower()
+            plan = plan_items_query(category=category, dt_from=since)
+            logger.info(f"Querying items changed since {since}, category: {category} using {plan}")
+            items = [item for item in await self._execute_plan(plan) if item.get('last_updated_dt', '') > since]
+            items.sort(key=lambda x: x['last_updated_dt'])
+            rows = [payload for payload in map(self._item_payload, items) if payload is not None]
             return {
-                "items": filtered,
-                "total_price": format_price(total)
+                "items": rows,
+                "count": len(rows),
+                "last_modified": items[-1]['last_updated_dt'] if items else since
             }
-            
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"Error in query_items: {str(e)}")
+            logger.error(f"Error in query_changes: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
+
     # Only for Backend API
     async def query_items_paginated(
         self,
@@ -146,129 +680,458 @@ class InventoryService:
         page: int = 1,
         limit: int = 10,
         sort_field: str = "name",
-        sort_order: str = "asc"
-    ) -> QueryResponse:
+        sort_order: str = "asc",
+        cursor: Optional[str] = None,
+        exact_count: bool = True
+    ) -> dict:
         try:
             logger.info(f"Querying items with filters - name: {name}, category: {category}, price range: {price_min}-{price_max}")
+
+            if cursor is None:
+                data = await self._fresh_snapshot()
+                if data is not None:
+                    return await self._query_snapshot_page(
+                        data, name=name, category=category, price_min=price_min, price_max=price_max,
+                        page=page, limit=limit, sort_field=sort_field, sort_order=sort_order
+                    )
+
+            cache_key = self.cache.query_key(
+                'query_items_paginated', name=name, category=category, price_min=price_min,
+                price_max=price_max, page=page, limit=limit, sort_field=sort_field,
+                sort_order=sort_order, cursor=cursor, exact_count=exact_count
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            async def read() -> dict:
+                tags = self.cache.category_tags(category)
+                generation = self.cache.generation(tags)
+                result = await self._run_paginated_query(
+                    name=name, category=category, price_min=price_min, price_max=price_max,
+                    page=page, limit=limit, sort_field=sort_field, sort_order=sort_order, cursor=cursor,
+                    exact_count=exact_count
+                )
+                self.cache.set(cache_key, result, tags=tags, generation=generation)
+                return result
+
+            return await self._shared_read(cache_key, read)
             
-            scan_params = {}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in query_items_paginated: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _run_paginated_query(
+        self,
+        name: Optional[str],
+        category: Optional[str],
+        price_min: Optional[float],
+        price_max: Optional[float],
+        page: int,
+        limit: int,
+        sort_field: str,
+        sort_order: str,
+        cursor: Optional[str],
+        exact_count: bool = True
+    ) -> dict:
+        sorted_params = plan_sorted_query(
+            name=name, category=category, price_min=price_min, price_max=price_max,
+            sort_field=sort_field, sort_order=sort_order
+        )
+        if cursor is not None:
+            return await self._query_items_by_cursor(
+                name=name, category=category, price_min=price_min, price_max=price_max,
+                page=page, limit=limit, sort_field=sort_field, sort_order=sort_order, cursor=cursor,
+                sorted_params=sorted_params
+            )
+        if name and settings.SEARCH_INDEX_ENABLED:
+            result = await self._query_items_by_search(
+                name=name, category=category, price_min=price_min, price_max=price_max,
+                page=page, limit=limit, sort_field=sort_field, sort_order=sort_order
+            )
+            if result is not None:
+                return result
+        if sorted_params:
+            filtered = bool(name) or (price_min is not None and price_max is not None)
+            return await self._query_items_by_index(
+                sorted_params, page=page, limit=limit, category=category, filtered=filtered, exact_count=exact_count
+            )
+        
+        scan_params = {}
+        filter_expressions = []
+        expression_attrs = {}
+        
+        # Apply filters
+        if name:
+            name = name.lower()
+            filter_expressions.append("contains(item_name, :name)")
+            expression_attrs[":name"] = name
+        if category:
+            category = category.lower()
+            filter_expressions.append("category = :category")
+            expression_attrs[":category"] = category
+        if price_min is not None and price_max is not None:
+            filter_expressions.append("price BETWEEN :price_min AND :price_max")
+            expression_attrs[":price_min"] = Decimal(str(price_min))
+            expression_attrs[":price_max"] = Decimal(str(price_max))
+        
+        if filter_expressions:
+            scan_params['FilterExpression'] = " AND ".join(filter_expressions)
+            scan_params['ExpressionAttributeValues'] = expression_attrs
+        
+        items = [item async for item in self.scanner.aitems(**scan_params)]
+        
+        # Apply sorting and pagination (name and price are served pre-sorted by
+        # their indexes); only the rows up to the requested page are ordered
+        paginated_items = page_items(items, sort_field, sort_order == "desc", page, limit)
+        
+        # Convert to response
+        result_items = self._to_responses(paginated_items)
+        
+        logger.info(f"Returning {len(result_items)} items (page {page} of {len(items)//limit + 1})")
+        return self._page_response(
+            items=result_items,
+            count=len(items),
+            page=page,
+            limit=limit
+        )
+
+    async def _query_snapshot_page(
+        self,
+        data: SnapshotData,
+        name: Optional[str],
+        category: Optional[str],
+        price_min: Optional[float],
+        price_max: Optional[float],
+        page: int,
+        limit: int,
+        sort_field: str,
+        sort_order: str
+    ) -> dict:
+        # Same filters and ordering as the DynamoDB paths, evaluated over the
+        # in-memory columns. Cursor pagination stays on DynamoDB.
+        item_ids = None
+        if name:
+            name = name.lower()
+            if settings.SEARCH_INDEX_ENABLED:
+                await self.search.ensure_loaded()
+                try:
+                    await self.search.catch_up()
+                    item_ids = self.search.search(name)
+                except Exception as e:
+                    # The snapshot's own name filter covers every row
+                    logger.warning(f"Name search index could not catch up: {str(e)}")
+        rows = data.select(
+            ids=item_ids,
+            name=name or None,
+            category=category.lower() if category else None,
+            price_range=price_bounds(price_min, price_max) if price_min is not None and price_max is not None else None
+        )
+        ordered = data.order(rows, sort_field, descending=sort_order == "desc", count=page * limit)
+        result_items = [data.item(row) for row in ordered[(page - 1) * limit:]]
+
+        logger.info(f"Returning {len(result_items)} of {len(rows)} items from the inventory snapshot")
+        return self._page_response(
+            items=result_items,
+            count=len(rows),
+            page=page,
+            limit=limit
+        )
+
+    async def _query_items_by_search(
+        self,
+        name: str,
+        category: Optional[str],
+        price_min: Optional[float],
+        price_max: Optional[float],
+        page: int,
+        limit: int,
+        sort_field: str,
+        sort_order: str
+    ) -> Optional[dict]:
+        # Resolves the name filter to ids through the in-process index and reads
+        # only those items. Returns None when the match set is too broad, in which
+        # case the index or scan path is cheaper per page.
+        await self.search.ensure_loaded()
+        try:
+            await self.search.catch_up()
+        except Exception as e:
+            # Names created by other workers since the last catch-up are unknown
+            logger.warning(f"Name search index could not catch up: {str(e)}")
+            return None
+        name = name.lower()
+        # Type-ahead case: the index already knows the sort key, so only the
+        # requested page is read and any number of matches is cheap
+        type_ahead = sort_field == "name" and not category and (price_min is None or price_max is None)
+        item_ids = self.search.search(name, limit=None if type_ahead else settings.SEARCH_MAX_CANDIDATES)
+        if item_ids is None:
+            return None
+
+        if type_ahead:
+            item_ids.sort(key=lambda item_id: self.search.name_of(item_id) or "", reverse=sort_order == "desc")
+            page_ids = item_ids[(page - 1) * limit:page * limit]
+            items = await self.batch_reader.get_items(page_ids) if page_ids else []
+            items.sort(key=lambda x: x['item_name'], reverse=sort_order == "desc")
+            logger.info(f"Returning {len(items)} of {len(item_ids)} items from name search for '{name}'")
+            return self._page_response(
+                items=self._to_responses(items),
+                count=len(item_ids),
+                page=page,
+                limit=limit
+            )
+
+        items = await self.batch_reader.get_items(item_ids) if item_ids else []
+        # Rows are re-checked since the index may lag writes from other workers
+        matches = select_items(
+            items,
+            name=name,
+            category=category.lower() if category else None,
+            price_range=(Decimal(str(price_min)), Decimal(str(price_max)))
+            if price_min is not None and price_max is not None else None
+        )
+
+        sort_key = SORTED_INDEXES[sort_field][2] if sort_field in SORTED_INDEXES else sort_field
+        result_items = self._to_responses(page_items(matches, sort_key, sort_order == "desc", page, limit))
+
+        logger.info(f"Returning {len(result_items)} of {len(matches)} items from name search for '{name}'")
+        return self._page_response(
+            items=result_items,
+            count=len(matches),
+            page=page,
+            limit=limit
+        )
+
+    async def _read_rows(self, read, params: dict, limit: int, last_key: Optional[dict] = None):
+        # Limit caps evaluated rows, so the result never overshoots and the
+        # returned LastEvaluatedKey is always a valid resume point
+        params = dict(params)
+        items = []
+        while len(items) < limit:
+            params['Limit'] = limit - len(items)
+            if last_key:
+                params['ExclusiveStartKey'] = last_key
+            response = await read(**params)
+            items.extend(response.get('Items', []))
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+        return items, last_key
+
+    async def _count_rows(self, params: dict) -> int:
+        params = dict(params, Select='COUNT')
+        count = 0
+        last_key = None
+        while True:
+            if last_key:
+                params['ExclusiveStartKey'] = last_key
+            response = await self.table.query(**params)
+            count += response.get('Count', 0)
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                break
+        return count
+
+    def _to_responses(self, items: List[dict]) -> List[dict]:
+        return [self._item_row(item) for item in items]
+
+    @staticmethod
+    def _page_response(items: List[dict], count: int, page: int, limit: int, next_cursor: Optional[str] = None) -> dict:
+        # QueryResponse's shape, built directly so rows are not validated again
+        return {"items": items, "count": count, "page": page, "limit": limit, "next_cursor": next_cursor}
+
+    async def _count_matches(self, params: dict, category: Optional[str], filtered: bool, exact_count: bool) -> Optional[int]:
+        # An unfiltered listing is exactly the category's (or the inventory's)
+        # aggregate row, one GetItem, once the aggregates are seeded. Otherwise
+        # matches are counted by reading the whole index partition, unless the
+        # caller asked for an estimate; None then.
+        if not filtered and await self.aggregates.seeded():
+            return (await self.aggregates.get(category.lower() if category else None))['count']
+        if exact_count:
+            return await self._count_rows(params)
+        return None
+
+    async def _query_items_by_index(
+        self,
+        params: dict,
+        page: int,
+        limit: int,
+        category: Optional[str] = None,
+        filtered: bool = False,
+        exact_count: bool = True
+    ) -> dict:
+        # The index is already in sort order, so page N needs only N * limit rows
+        (items, last_key), count = await asyncio.gather(
+            self._read_rows(self.table.query, params, page * limit),
+            self._count_matches(params, category, filtered, exact_count)
+        )
+        if count is None:
+            # Matches seen so far, plus one when the index holds more, so a
+            # client can tell whether a next page exists
+            count = len(items) + (1 if last_key else 0)
+        result_items = self._to_responses(items[(page - 1) * limit:])
+
+        logger.info(f"Returning {len(result_items)} items from {params['IndexName']} (page {page} of {count//limit + 1})")
+        return self._page_response(
+            items=result_items,
+            count=count,
+            page=page,
+            limit=limit
+        )
+
+    async def _query_items_by_cursor(
+        self,
+        name: Optional[str],
+        category: Optional[str],
+        price_min: Optional[float],
+        price_max: Optional[float],
+        page: int,
+        limit: int,
+        sort_field: str,
+        sort_order: str,
+        cursor: str,
+        sorted_params: Optional[dict] = None
+    ) -> dict:
+        # Reads only as many rows as needed to fill one page, resuming from the
+        # ExclusiveStartKey carried in the cursor
+        query_fingerprint = [name, category, price_min, price_max, sort_field, sort_order]
+        last_key = None
+        if cursor:
+            try:
+                payload = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            if payload.get("query") != query_fingerprint:
+                raise HTTPException(status_code=400, detail="Cursor does not match query parameters")
+            last_key = payload.get("key")
+
+        if sorted_params:
+            params = sorted_params
+            read = self.table.query
+        else:
+            params = {}
             filter_expressions = []
             expression_attrs = {}
-            
-            # Apply filters
             if name:
-                name = name.lower()
                 filter_expressions.append("contains(item_name, :name)")
-                expression_attrs[":name"] = name
+                expression_attrs[":name"] = name.lower()
+            if price_min is not None and price_max is not None:
+                filter_expressions.append("price BETWEEN :price_min AND :price_max")
+                expression_attrs[":price_min"] = Decimal(str(price_min))
+                expression_attrs[":price_max"] = Decimal(str(price_max))
             if category:
-                category = category.lower()
-                filter_expressions.append("category = :category")
-                expression_attrs[":category"] = category
-            
+                params['IndexName'] = 'CategoryIndex'
+                params['KeyConditionExpression'] = 'category = :category'
+                params['ScanIndexForward'] = sort_order != "desc"
+                expression_attrs[":category"] = category.lower()
+                read = self.table.query
+            else:
+                read = self.table.scan
             if filter_expressions:
-                scan_params['FilterExpression'] = " AND ".join(filter_expressions)
-                scan_params['ExpressionAttributeValues'] = expression_attrs
-            
-            items = []
-            last_key = None
-            while True:
-                if last_key:
-                    scan_params['ExclusiveStartKey'] = last_key
-                response = self.table.scan(**scan_params)
-                items_list = response['Items'] if 'Items' in response else []
-                items.extend(items_list)
-                
-                last_key = response.get('LastEvaluatedKey')
-                if not last_key:
-                    break
-            
-            # Apply price filter
-            if price_min is not None and price_max is not None:
-                items = [
-                    item for item in items
-                    if price_min <= float(item['price']) <= price_max
-                ]
-            
-            # Apply sorting
-            reverse_sort = sort_order == "desc"
-            items.sort(
-                key=lambda x: (
-                    float(x['price']) if sort_field == "price" 
-                    else x.get(sort_field, "")
-                ),
-                reverse=reverse_sort
-            )
-            
-            # Apply pagination
-            start_idx = (page - 1) * limit
-            end_idx = start_idx + limit
-            paginated_items = items[start_idx:end_idx]
-            
-            # Convert to response
-            result_items = [
-                ItemResponse(
-                    id=item['id'],
-                    item_name=item['item_name'],
-                    category=item['category'],
-                    price=float(item['price'])
-                )
-                for item in paginated_items
-            ]
-            
-            logger.info(f"Returning {len(result_items)} items (page {page} of {len(items)//limit + 1})")
-            return QueryResponse(
-                items=result_items,
-                count=len(items),
-                page=page,
-                limit=limit
-            )
-            
-        except Exception as e:
-            logger.error(f"Error in query_items_paginated: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
+                params['FilterExpression'] = " AND ".join(filter_expressions)
+            if expression_attrs:
+                params['ExpressionAttributeValues'] = expression_attrs
+
+        items, last_key = await self._read_rows(read, params, limit, last_key=last_key)
+
+        next_cursor = None
+        if last_key:
+            next_cursor = encode_cursor({"key": last_key, "query": query_fingerprint})
+
+        result_items = self._to_responses(items)
+
+        logger.info(f"Returning {len(result_items)} items (cursor page, more: {next_cursor is not None})")
+        return self._page_response(
+            items=result_items,
+            count=len(result_items),
+            page=page,
+            limit=limit,
+            next_cursor=next_cursor
+        )
 
     async def update_item_price(self, item_id: str, price_update: PriceUpdate) -> dict:
         try:
             logger.info(f"Updating price for item {item_id} to {price_update.price}")
             
-            response = self.table.get_item(Key={'id': item_id})
-            item = response.get("Item")
-            if item is None:
-                logger.warning(f"Item not found: {item_id}")
-                raise HTTPException(status_code=404, detail="Item not found")
-            
             now = get_sgt_time()
-            price_str = format_price(price_update.price)
+            price = to_price_number(price_update.price)
+            if settings.WRITE_BEHIND_ENABLED and await self.prices.submit(item_id, price, now):
+                return {"status": "accepted", "updated_price": format_price(price)}
             
-            self.table.update_item(
-                Key={'id': item_id},
-                UpdateExpression="SET price = :price, last_updated_dt = :dt",
-                ExpressionAttributeValues={
-                    ":price": price_str,
-                    ":dt": now
-                }
-            )
+            try:
+                old_item = await self._set_price(item_id, price, now)
+            except ClientError as e:
+                if not self._is_condition_failure(e):
+                    raise
+                self.cache.forget_item(item_id)
+                self._item_removed(item_id)
+                logger.warning(f"Item not found: {item_id}")
+                raise HTTPException(status_code=404, detail="Item not found")
+            deltas = AggregateDeltas()
+            deltas.repriced(old_item, price)
+            await self.aggregates.apply(deltas)
             
             logger.info(f"Successfully updated price for item {item_id}")
-            return {"status": "success", "updated_price": price_str}
+            return {"status": "success", "updated_price": format_price(price)}
         except HTTPException:
             raise
         except Exception as e:
             logger.error(f"Error updating item {item_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
+    async def _write_prices(self, updates: List[BufferedPrice]) -> Dict[str, str]:
+        # One flush of the write-behind buffer. The updates run concurrently and
+        # their aggregate deltas are applied once for the whole batch.
+        semaphore = asyncio.Semaphore(settings.WRITE_BEHIND_CONCURRENCY)
+        deltas = AggregateDeltas()
+        outcomes = {}
+
+        async def write(update: BufferedPrice):
+            async with semaphore:
+                try:
+                    old_item = await self._set_price(update.item_id, update.price, update.at, only_if_older=True)
+                except Exception as e:
+                    if self._is_condition_failure(e):
+                        # Deleted, or written again after this update was accepted
+                        logger.info(f"Dropped buffered price for item {update.item_id}")
+                        outcomes[update.item_id] = "dropped"
+                    else:
+                        logger.error(f"Buffered price for item {update.item_id} failed: {str(e)}")
+                        outcomes[update.item_id] = "failed"
+                    return
+            deltas.repriced(old_item, update.price)
+            outcomes[update.item_id] = "written"
+
+        await asyncio.gather(*(write(update) for update in updates))
+        await self.aggregates.apply(deltas)
+        return outcomes
+
     async def delete_item(self, item_id: str) -> dict:
         try:
-            response = self.table.get_item(
-                Key={'id': item_id}
-            )
-            
-            if 'Item' not in response:
+            try:
+                response = await self.table.delete_item(
+                    Key={'id': item_id},
+                    ConditionExpression="attribute_exists(id)",
+                    ReturnValues="ALL_OLD"
+                )
+            except ClientError as e:
+                if not self._is_condition_failure(e):
+                    raise
+                self.cache.forget_item(item_id)
+                self._item_removed(item_id)
                 logger.error(f"Item {item_id} not found")
                 raise HTTPException(status_code=404, detail="Item not found")
-            
-            self.table.delete_item(
-                Key={'id': item_id}
-            )
+
+            item = response['Attributes']
+            self._item_removed(item_id)
+            self.flights.forget()
+            self.cache.invalidate_item(item_id, item['category'])
+            self.feed.publish("deleted", self._item_row(item), get_sgt_time())
+            deltas = AggregateDeltas()
+            deltas.deleted(item)
+            await asyncio.gather(self._release_name(item), self.aggregates.apply(deltas))
             
             logger.info(f"Deleted item {item_id}")
             return {"status": "success", "deleted_id": item_id}
@@ -277,4 +1140,17 @@ class InventoryService:
             raise 
         except Exception as e:
             logger.error(f"Error in delete_item: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _release_name(self, item: dict):
+        try:
+            await self.names.delete_item(
+                Key={'item_name': item['item_name']},
+                # The name may already have been claimed by a newer item
+                ConditionExpression="id = :id",
+                ExpressionAttributeValues={':id': item['id']}
+            )
+        except ClientError as e:
+            if not self._is_condition_failure(e):
+                # A leftover guard is replaced by the next create of this name
+                logger.error(f"Failed to release name {item['item_name']}: {str(e)}")
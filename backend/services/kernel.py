@@ -0,0 +1,76 @@
+from decimal import Decimal
+from heapq import nlargest, nsmallest
+from typing import List, Optional, Tuple
+import numpy as np
+from utils.helpers import read_price
+
+# Filter, order and total kernels behind the query paths. Results are the same
+# as a plain filter, list.sort(key=..., reverse=...) and Decimal sum; equal keys
+# keep their original order.
+#
+# Integer columns that are already in memory (the snapshot's cents and
+# timestamps) go through NumPy. A batch of DynamoDB items is still a list of
+# dicts holding Decimals and strings, and converting it to arrays costs more
+# than the work it saves, so batches use the C-level builtins instead: a
+# bounded heap for the first page(s) and sum() over the prices.
+
+def to_cents(price) -> int:
+    return int(read_price(price).scaleb(2))
+
+def cents_to_price(cents: int) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+def stable_order(keys: np.ndarray, descending: bool = False, count: Optional[int] = None) -> np.ndarray:
+    # Positions of the first count keys in sort order. A page only needs the
+    # top count, so a partition narrows the candidates before the stable sort.
+    n = len(keys)
+    if count is None or count >= n:
+        count = n
+    if count == 0:
+        return np.empty(0, dtype=np.intp)
+    if descending:
+        # Sorting the reversed keys ascending and reading the result backwards
+        # gives descending keys with ties in original order
+        keys = keys[::-1]
+        if count < n:
+            kth = np.partition(keys, n - count)[n - count]
+            candidates = np.flatnonzero(keys >= kth)
+            order = candidates[np.argsort(keys[candidates], kind='stable')][-count:]
+        else:
+            order = np.argsort(keys, kind='stable')
+        return (n - 1) - order[::-1]
+    if count < n:
+        kth = np.partition(keys, count - 1)[count - 1]
+        candidates = np.flatnonzero(keys <= kth)
+        return candidates[np.argsort(keys[candidates], kind='stable')][:count]
+    return np.argsort(keys, kind='stable')
+
+def select_items(
+    items: List[dict],
+    name: Optional[str] = None,
+    category: Optional[str] = None,
+    price_range: Optional[Tuple[Decimal, Decimal]] = None
+) -> List[dict]:
+    # Each filter only sees the rows that passed the one before it, cheapest first
+    if name is not None:
+        items = [item for item in items if name in item.get('item_name', '')]
+    if category is not None:
+        items = [item for item in items if item.get('category') == category]
+    if price_range is not None:
+        low, high = price_range
+        items = [item for item in items if 'price' in item and low <= read_price(item['price']) <= high]
+    return items
+
+def page_items(items: List[dict], sort_key: str, descending: bool, page: int, limit: int) -> List[dict]:
+    # Only the rows up to the end of the requested page are ordered;
+    # nsmallest/nlargest match sorted(...)[:n] including ties
+    select = nlargest if descending else nsmallest
+    return select(page * limit, items, key=lambda x: x.get(sort_key, ""))[(page - 1) * limit:]
+
+def total_price(items: List[dict]) -> Decimal:
+    prices = [item['price'] for item in items]
+    try:
+        return sum(prices, Decimal('0'))
+    except TypeError:
+        # Rows written before prices became Numbers still hold the formatted string
+        return sum(map(read_price, prices), Decimal('0'))
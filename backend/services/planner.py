@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional
+from core.config import settings
+from core.database import LISTING_PARTITION
+from utils.helpers import SGT, parse_time_bound
+
+class QueryPlan:
+    def __init__(self, operation: str, index: Optional[str], requests: List[dict]):
+        self.operation = operation
+        self.index = index
+        self.requests = requests
+
+    def __repr__(self) -> str:
+        return f"QueryPlan(operation={self.operation}, index={self.index}, requests={len(self.requests)})"
+
+def _range_condition(dt_from: Optional[str], dt_to: Optional[str], values: dict) -> Optional[str]:
+    if dt_from and dt_to:
+        values[':dt_from'] = dt_from
+        values[':dt_to'] = dt_to
+        return 'last_updated_dt BETWEEN :dt_from AND :dt_to'
+    if dt_from:
+        values[':dt_from'] = dt_from
+        return 'last_updated_dt >= :dt_from'
+    if dt_to:
+        values[':dt_to'] = dt_to
+        return 'last_updated_dt <= :dt_to'
+    return None
+
+def _days_between(start: datetime, end: datetime) -> List[str]:
+    days = []
+    day = start.date()
+    while day <= end.date():
+        days.append(day.isoformat())
+        day += timedelta(days=1)
+    return days
+
+def plan_items_query(
+    category: Optional[str] = None,
+    dt_from: Optional[str] = None,
+    dt_to: Optional[str] = None
+) -> QueryPlan:
+    # last_updated_dt is stored as a fixed-width SGT ISO string, so normalised bounds compare lexically
+    dt_from_parsed, dt_from_iso = parse_time_bound(dt_from) if dt_from else (None, None)
+    dt_to_parsed, dt_to_iso = parse_time_bound(dt_to) if dt_to else (None, None)
+
+    if category:
+        values = {':cat': category}
+        condition = 'category = :cat'
+        range_condition = _range_condition(dt_from_iso, dt_to_iso, values)
+        if range_condition:
+            condition = f"{condition} AND {range_condition}"
+        return QueryPlan('query', 'CategoryIndex', [{
+            'IndexName': 'CategoryIndex',
+            'KeyConditionExpression': condition,
+            'ExpressionAttributeValues': values
+        }])
+
+    if dt_from_parsed:
+        end = dt_to_parsed or datetime.now(SGT)
+        days = _days_between(dt_from_parsed, end) if end >= dt_from_parsed else []
+        if len(days) <= settings.DATE_INDEX_MAX_DAYS:
+            requests = []
+            for day in days:
+                values = {':day': day}
+                range_condition = _range_condition(dt_from_iso, dt_to_iso, values)
+                requests.append({
+                    'IndexName': 'DateIndex',
+                    'KeyConditionExpression': f"last_updated_date = :day AND {range_condition}",
+                    'ExpressionAttributeValues': values
+                })
+            return QueryPlan('query', 'DateIndex', requests)
+
+    scan_params = {}
+    values = {}
+    range_condition = _range_condition(dt_from_iso, dt_to_iso, values)
+    if range_condition:
+        scan_params['FilterExpression'] = range_condition
+        scan_params['ExpressionAttributeValues'] = values
+    return QueryPlan('scan', None, [scan_params])
+
+SORTED_INDEXES = {
+    # sort_field: (index without category, index within a category, sort key attribute)
+    'price': ('ListingPriceIndex', 'CategoryPriceIndex', 'price'),
+    'name': ('ListingNameIndex', 'CategoryNameIndex', 'item_name'),
+}
+
+def plan_sorted_query(
+    name: Optional[str] = None,
+    category: Optional[str] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    sort_field: str = "name",
+    sort_order: str = "asc"
+) -> Optional[dict]:
+    if sort_field not in SORTED_INDEXES:
+        return None
+    listing_index, category_index, sort_key = SORTED_INDEXES[sort_field]
+
+    values = {}
+    filter_expressions = []
+    if category:
+        index = category_index
+        key_condition = 'category = :category'
+        values[':category'] = category.lower()
+    else:
+        index = listing_index
+        key_condition = 'listing = :listing'
+        values[':listing'] = LISTING_PARTITION
+
+    if price_min is not None and price_max is not None:
+        values[':price_min'] = Decimal(str(price_min))
+        values[':price_max'] = Decimal(str(price_max))
+        if sort_key == 'price':
+            key_condition = f"{key_condition} AND price BETWEEN :price_min AND :price_max"
+        else:
+            filter_expressions.append('price BETWEEN :price_min AND :price_max')
+    if name:
+        filter_expressions.append('contains(item_name, :name)')
+        values[':name'] = name.lower()
+
+    params = {
+        'IndexName': index,
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeValues': values,
+        'ScanIndexForward': sort_order != "desc"
+    }
+    if filter_expressions:
+        params['FilterExpression'] = " AND ".join(filter_expressions)
+    return params
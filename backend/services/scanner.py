@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+from core.config import settings
+from core.scheduler import CapacityScheduler, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+class ParallelScanner:
+    def __init__(
+        self,
+        table,
+        segments: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        scheduler: Optional[CapacityScheduler] = None
+    ):
+        self.table = table
+        self.scheduler = scheduler or get_scheduler(table.name)
+        self.segments = segments or settings.SCAN_SEGMENTS
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.SCAN_MAX_WORKERS,
+            thread_name_prefix="dynamodb-scan"
+        )
+
+    def _scan_segment(self, segment: int, params: dict, emit: Callable, stop: threading.Event):
+        try:
+            scan_params = dict(params, Segment=segment, TotalSegments=self.segments)
+            last_key = None
+            while not stop.is_set():
+                if last_key:
+                    scan_params['ExclusiveStartKey'] = last_key
+                if self.scheduler is None:
+                    response = self.table.scan(**scan_params)
+                else:
+                    response = self.scheduler.run_sync('scan', partial(self.table.scan, **scan_params))
+                emit(response.get('Items', []))
+
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    break
+            emit(_DONE)
+        except Exception as e:
+            logger.error(f"Scan segment {segment}/{self.segments} failed: {str(e)}")
+            emit(e)
+
+    def pages(self, **params) -> Iterator[List[dict]]:
+        pages = queue.Queue(maxsize=self.segments * 2)
+        stop = threading.Event()
+
+        def emit(value):
+            # Bounded queue: a slow consumer applies backpressure to the segment workers
+            while not stop.is_set():
+                try:
+                    pages.put(value, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        for segment in range(self.segments):
+            self.executor.submit(contextvars.copy_context().run, self._scan_segment, segment, params, emit, stop)
+
+        remaining = self.segments
+        try:
+            while remaining:
+                page = pages.get()
+                if page is _DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield page
+        finally:
+            stop.set()
+
+    async def apages(self, **params) -> AsyncIterator[List[dict]]:
+        loop = asyncio.get_running_loop()
+        pages = asyncio.Queue()
+        slots = threading.Semaphore(self.segments * 2)
+        stop = threading.Event()
+
+        def emit(value):
+            # Same backpressure as pages(), without blocking the event loop on a full queue
+            while not stop.is_set():
+                if slots.acquire(timeout=0.1):
+                    loop.call_soon_threadsafe(pages.put_nowait, value)
+                    return
+
+        for segment in range(self.segments):
+            self.executor.submit(contextvars.copy_context().run, self._scan_segment, segment, params, emit, stop)
+
+        remaining = self.segments
+        try:
+            while remaining:
+                page = await pages.get()
+                slots.release()
+                if page is _DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield page
+        finally:
+            stop.set()
+
+    def items(self, **params) -> Iterator[dict]:
+        for page in self.pages(**params):
+            yield from page
+
+    async def aitems(self, **params) -> AsyncIterator[dict]:
+        async for page in self.apages(**params):
+            for item in page:
+                yield item
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from core.config import settings
+from utils.helpers import SGT, to_sgt_iso
+
+logger = logging.getLogger(__name__)
+
+GRAM_SIZE = 3
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+class NameSearchIndex:
+    # In-process trigram index over item names. A substring query intersects the
+    # id sets of its trigrams, so only names sharing every trigram are checked.
+    # Writes in this process are applied immediately. Names created by other
+    # workers are picked up by catch_up(), which reads the rows written since
+    # the last one; without a delta_loader they wait for the next rebuild.
+    def __init__(
+        self,
+        loader: Callable[[], AsyncIterator[Tuple[str, str]]],
+        refresh_seconds: float,
+        delta_loader: Optional[Callable[[str], Awaitable[List[Tuple[str, str]]]]] = None,
+        clock_skew_seconds: float = 5
+    ):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.delta_loader = delta_loader
+        self.clock_skew_seconds = clock_skew_seconds
+        self._names: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._load_lock = asyncio.Lock()
+        self._refresh_task = None
+        # Writes seen while a rebuild is scanning, replayed onto the new index
+        self._pending: Optional[List[tuple]] = None
+        # Rows written at or after this SGT timestamp are re-read by the next catch-up
+        self._watermark: Optional[str] = None
+        self._caught_up_at: Optional[float] = None
+        self._catching_up: Optional[asyncio.Future] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded_at is not None
+
+    @property
+    def tracking(self) -> bool:
+        # Built or being built; before that there is nothing to keep current,
+        # and the first build reads every name itself
+        return self._loaded_at is not None or self._pending is not None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def name_of(self, item_id: str) -> Optional[str]:
+        return self._names.get(item_id)
+
+    def add(self, item_id: str, item_name: str):
+        if not self.tracking:
+            return
+        if self._pending is not None:
+            self._pending.append(('add', item_id, item_name))
+        self._add(self._names, self._grams, item_id, item_name)
+
+    def remove(self, item_id: str):
+        if not self.tracking:
+            return
+        if self._pending is not None:
+            self._pending.append(('remove', item_id, None))
+        self._remove(self._names, self._grams, item_id)
+
+    @staticmethod
+    def _add(names: Dict[str, str], grams: Dict[str, Set[str]], item_id: str, item_name: str):
+        if names.get(item_id) == item_name:
+            return
+        NameSearchIndex._remove(names, grams, item_id)
+        names[item_id] = item_name
+        for gram in _grams(item_name):
+            grams.setdefault(gram, set()).add(item_id)
+
+    @staticmethod
+    def _remove(names: Dict[str, str], grams: Dict[str, Set[str]], item_id: str):
+        item_name = names.pop(item_id, None)
+        if item_name is None:
+            return
+        for gram in _grams(item_name):
+            ids = grams.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del grams[gram]
+
+    def search(self, query: str, limit: Optional[int] = None) -> Optional[List[str]]:
+        # Ids of every name containing query, or None when more than limit match
+        query = query.strip().lower()
+        if len(query) < GRAM_SIZE:
+            candidates = self._names.keys()
+        else:
+            id_sets = []
+            for gram in _grams(query):
+                ids = self._grams.get(gram)
+                if not ids:
+                    return []
+                id_sets.append(ids)
+            id_sets.sort(key=len)
+            candidates = id_sets[0].intersection(*id_sets[1:])
+
+        matches = []
+        for item_id in candidates:
+            if query in self._names[item_id]:
+                matches.append(item_id)
+                if limit is not None and len(matches) > limit:
+                    return None
+        return matches
+
+    def _next_watermark(self) -> str:
+        return to_sgt_iso(datetime.now(SGT) - timedelta(seconds=self.clock_skew_seconds))
+
+    async def catch_up(self):
+        # Adds the names written since the last catch-up by any worker, so a
+        # search misses nothing created before it started. Concurrent callers
+        # share one read, but only a read that began after the caller arrived
+        # counts for it. Raises when the read fails; the index then cannot
+        # rule a name out.
+        if self.delta_loader is None:
+            return
+        arrived = time.monotonic()
+        while self._caught_up_at is None or self._caught_up_at < arrived:
+            if self._catching_up is None:
+                self._catching_up = asyncio.ensure_future(self._read_changes())
+            await asyncio.shield(self._catching_up)
+
+    async def _read_changes(self):
+        started = time.monotonic()
+        watermark = self._next_watermark()
+        try:
+            if self._watermark is not None:
+                for item_id, item_name in await self.delta_loader(self._watermark):
+                    self.add(item_id, item_name)
+            self._watermark = watermark
+            self._caught_up_at = started
+        finally:
+            self._catching_up = None
+
+    async def _rebuild(self):
+        names: Dict[str, str] = {}
+        grams: Dict[str, Set[str]] = {}
+        watermark = self._next_watermark()
+        self._pending = []
+        try:
+            async for item_id, item_name in self.loader():
+                self._add(names, grams, item_id, item_name)
+            for op, item_id, item_name in self._pending:
+                if op == 'add':
+                    self._add(names, grams, item_id, item_name)
+                else:
+                    self._remove(names, grams, item_id)
+        finally:
+            self._pending = None
+        self._names, self._grams = names, grams
+        self._watermark = watermark
+        self._loaded_at = time.monotonic()
+        logger.info(f"Name search index built with {len(names)} names and {len(grams)} trigrams")
+
+    async def _refresh(self):
+        try:
+            async with self._load_lock:
+                await self._rebuild()
+        except Exception as e:
+            # Keep serving the old index and retry after another refresh period
+            self._loaded_at = time.monotonic()
+            logger.error(f"Name search index refresh failed: {str(e)}")
+
+    async def ensure_loaded(self):
+        # The first search waits for the initial build; later refreshes run in the
+        # background while the previous index keeps serving
+        if not self.ready:
+            async with self._load_lock:
+                if not self.ready:
+                    await self._rebuild()
+            return
+        stale = time.monotonic() - self._loaded_at > self.refresh_seconds
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+
+def create_search_index(
+    loader: Callable[[], AsyncIterator[Tuple[str, str]]],
+    delta_loader: Callable[[str], Awaitable[List[Tuple[str, str]]]]
+) -> NameSearchIndex:
+    return NameSearchIndex(loader, settings.SEARCH_INDEX_REFRESH_SECONDS, delta_loader)
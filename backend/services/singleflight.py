@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    # Concurrent calls with the same key share one in-flight read. The read
+    # runs as its own task, so a caller that disconnects does not cancel it for
+    # the others; every caller gets the same result or the same exception.
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: str, read: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            self.started += 1
+            flight = self._flights[key] = asyncio.ensure_future(read())
+            flight.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(flight)
+
+    def _finished(self, key: str, flight: asyncio.Future):
+        # A write may already have detached this flight and a newer one taken the key
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled() and flight.exception() is not None:
+            # Marks the exception retrieved when every caller has gone away
+            logger.debug(f"Shared read {key} failed: {str(flight.exception())}")
+
+    def forget(self):
+        # After a write, later callers start a fresh read instead of joining one
+        # that may have started before the write; current callers keep theirs
+        self._flights.clear()
+
+    def metric_samples(self) -> list:
+        # (name, type, help, value) rows for the /metrics collector
+        return [
+            ("inventory_coalesced_reads_total", "counter", "Query reads started on behalf of one or more requests", self.started),
+            ("inventory_coalesced_requests_total", "counter", "Requests served by joining a read already in flight", self.coalesced),
+            ("inventory_coalesced_reads_in_flight", "gauge", "Query reads currently in flight", self.in_flight),
+        ]
@@ -0,0 +1,394 @@
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import math
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from core.config import settings
+from services.kernel import cents_to_price, stable_order, to_cents
+from utils.helpers import SGT, parse_datetime, parse_time_bound, to_sgt_iso
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = frozenset({'id', 'item_name', 'category', 'price', 'last_updated_dt'})
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=SGT)
+_MICROSECOND = timedelta(microseconds=1)
+
+def to_micros(dt: datetime) -> int:
+    return (dt - _EPOCH) // _MICROSECOND
+
+def time_bounds(dt_from: Optional[str], dt_to: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    # Inclusive microsecond range matching the planner's last_updated_dt bounds
+    low = to_micros(parse_time_bound(dt_from)[0]) if dt_from else None
+    high = to_micros(parse_time_bound(dt_to)[0]) if dt_to else None
+    return low, high
+
+def price_bounds(price_min: float, price_max: float) -> Tuple[int, int]:
+    # Inclusive cent range matching price BETWEEN :price_min AND :price_max
+    return math.ceil(Decimal(str(price_min)).scaleb(2)), math.floor(Decimal(str(price_max)).scaleb(2))
+
+class SnapshotData:
+    # Column-per-attribute copy of the catalogue. Row r is (ids[r], names[r],
+    # categories[r], prices[r], updated[r]); deletes move the last row into the
+    # hole so the columns stay dense.
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.categories: List[str] = []
+        self.prices = array('q')    # cents
+        self.updated = array('q')   # last_updated_dt as epoch microseconds
+        self.rows: Dict[str, int] = {}
+        self.by_category: Dict[str, Set[str]] = {}
+        # Kept sorted; (sort key, id) so equal keys stay distinct
+        self.by_price: List[Tuple[int, str]] = []
+        self.by_name: List[Tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _columns(item: dict) -> Optional[tuple]:
+        if not item.keys() >= SNAPSHOT_FIELDS:
+            return None
+        return (
+            item['id'],
+            sys.intern(item['item_name']),
+            sys.intern(item['category']),
+            to_cents(item['price']),
+            to_micros(parse_datetime(item['last_updated_dt']))
+        )
+
+    def load(self, item: dict):
+        # Bulk path: appends without touching the sorted lists; call build_indexes() once at the end
+        columns = self._columns(item)
+        if columns is None or columns[0] in self.rows:
+            return
+        item_id, name, category, cents, micros = columns
+        self.rows[item_id] = len(self.ids)
+        self.ids.append(item_id)
+        self.names.append(name)
+        self.categories.append(category)
+        self.prices.append(cents)
+        self.updated.append(micros)
+        self.by_category.setdefault(category, set()).add(item_id)
+
+    def build_indexes(self):
+        self.by_price = sorted(zip(self.prices, self.ids))
+        self.by_name = sorted(zip(self.names, self.ids))
+
+    def upsert(self, item: dict):
+        columns = self._columns(item)
+        if columns is None:
+            return
+        item_id, name, category, cents, micros = columns
+        row = self.rows.get(item_id)
+        if row is not None:
+            if micros < self.updated[row]:
+                # An older copy than the one already held, e.g. a delta read that raced a local write
+                return
+            self._unindex(row)
+            self.names[row], self.categories[row] = name, category
+            self.prices[row], self.updated[row] = cents, micros
+        else:
+            row = self.rows[item_id] = len(self.ids)
+            self.ids.append(item_id)
+            self.names.append(name)
+            self.categories.append(category)
+            self.prices.append(cents)
+            self.updated.append(micros)
+        self.by_category.setdefault(category, set()).add(item_id)
+        bisect.insort(self.by_price, (cents, item_id))
+        bisect.insort(self.by_name, (name, item_id))
+
+    def remove(self, item_id: str):
+        row = self.rows.pop(item_id, None)
+        if row is None:
+            return
+        self._unindex(row)
+        last = len(self.ids) - 1
+        if row != last:
+            moved = self.ids[last]
+            self.rows[moved] = row
+            self.ids[row], self.names[row], self.categories[row] = moved, self.names[last], self.categories[last]
+            self.prices[row], self.updated[row] = self.prices[last], self.updated[last]
+        for column in (self.ids, self.names, self.categories, self.prices, self.updated):
+            column.pop()
+
+    def _unindex(self, row: int):
+        item_id = self.ids[row]
+        members = self.by_category.get(self.categories[row])
+        if members is not None:
+            members.discard(item_id)
+            if not members:
+                del self.by_category[self.categories[row]]
+        for index, key in ((self.by_price, self.prices[row]), (self.by_name, self.names[row])):
+            position = bisect.bisect_left(index, (key, item_id))
+            if position < len(index) and index[position] == (key, item_id):
+                del index[position]
+
+    @staticmethod
+    def _view(column: array) -> np.ndarray:
+        # Zero-copy view of an integer column. The array cannot grow or shrink
+        # while a view exists, so views stay local to one synchronous call and
+        # only copies (masks, fancy-indexed keys) are returned.
+        return np.frombuffer(column, dtype=np.int64)
+
+    def select(
+        self,
+        ids: Optional[Iterable[str]] = None,
+        name: Optional[str] = None,
+        category: Optional[str] = None,
+        price_range: Optional[Tuple[int, int]] = None,
+        time_range: Tuple[Optional[int], Optional[int]] = (None, None)
+    ) -> Sequence[int]:
+        # Rows matching every filter. The narrowest available index picks the
+        # candidates; the remaining filters are boolean masks over the columns.
+        # With no filters this is a range, not a copy of every row number.
+        rows = self.rows
+        if ids is not None:
+            candidates = [rows[item_id] for item_id in ids if item_id in rows]
+        elif category is not None:
+            candidates = [rows[item_id] for item_id in self.by_category.get(category, ())]
+        elif price_range is not None:
+            low = bisect.bisect_left(self.by_price, (price_range[0], ""))
+            high = bisect.bisect_left(self.by_price, (price_range[1] + 1, ""))
+            candidates = [rows[item_id] for _, item_id in self.by_price[low:high]]
+        else:
+            candidates = range(len(self.ids))
+        time_low, time_high = time_range
+        if (name is None and price_range is None and time_low is None and time_high is None
+                and (category is None or ids is None)):
+            return candidates
+
+        if isinstance(candidates, range):
+            candidates = np.arange(len(candidates))
+        else:
+            candidates = np.array(candidates, dtype=np.intp)
+        mask = np.ones(len(candidates), dtype=bool)
+        if name is not None:
+            names = self.names
+            mask &= np.fromiter((name in names[r] for r in candidates.tolist()), dtype=bool, count=len(candidates))
+        if category is not None and ids is not None:
+            categories = self.categories
+            mask &= np.fromiter((categories[r] == category for r in candidates.tolist()), dtype=bool, count=len(candidates))
+        if price_range is not None:
+            prices = self._view(self.prices)[candidates]
+            mask &= (prices >= price_range[0]) & (prices <= price_range[1])
+        if time_low is not None or time_high is not None:
+            updated = self._view(self.updated)[candidates]
+            if time_low is not None:
+                mask &= updated >= time_low
+            if time_high is not None:
+                mask &= updated <= time_high
+        return candidates[mask]
+
+    def order(self, rows: Sequence[int], sort_field: str, descending: bool, count: int) -> List[int]:
+        # The first count rows in sort order, ties in row order. A
+        # full-catalogue name or price sort walks the sorted list; integer
+        # columns take a partial argsort, string columns a bounded heap
+        if len(rows) == len(self.ids) and sort_field in ('name', 'price'):
+            index = self.by_name if sort_field == 'name' else self.by_price
+            entries = reversed(index) if descending else iter(index)
+            return [self.rows[item_id] for _, item_id in itertools.islice(entries, count)]
+
+        if sort_field in ('price', 'last_updated_dt'):
+            rows = np.arange(len(rows)) if isinstance(rows, range) else np.asarray(rows, dtype=np.intp)
+            keys = self._view(self.prices if sort_field == 'price' else self.updated)[rows]
+            return rows[stable_order(keys, descending, count)].tolist()
+        column = {'name': self.names, 'item_name': self.names, 'category': self.categories, 'id': self.ids}.get(sort_field)
+        if column is None:
+            # Same as sorting on an attribute no item has: order is unchanged
+            return list(rows[:count])
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(count, rows, key=column.__getitem__)
+
+    def item(self, row: int) -> dict:
+        # ItemResponse's serialized shape, as InventoryService._item_row returns
+        return {
+            'id': self.ids[row],
+            'item_name': self.names[row],
+            'category': self.categories[row],
+            'price': self.prices[row] / 100
+        }
+
+    def items(self, rows: Sequence[int]) -> List[dict]:
+        # item() for many rows in one comprehension
+        rows = rows.tolist() if isinstance(rows, np.ndarray) else list(rows)
+        ids, names, categories, prices = self.ids, self.names, self.categories, self.prices
+        return [
+            {'id': ids[r], 'item_name': names[r], 'category': categories[r], 'price': prices[r] / 100}
+            for r in rows
+        ]
+
+    def total(self, rows: Sequence[int]) -> Decimal:
+        prices = self._view(self.prices)
+        if not isinstance(rows, range):
+            prices = prices[np.asarray(rows, dtype=np.intp)]
+        return cents_to_price(prices.sum())
+
+class InventorySnapshot:
+    # Keeps SnapshotData in step with the items table: a full parallel scan on
+    # first use and every rebuild_seconds, a delta read of rows changed since
+    # the last sync every refresh_seconds, and write-through from this process
+    # in between. Deletes made by other workers only disappear on a rebuild.
+    def __init__(
+        self,
+        loader: Callable[[], AsyncIterator[dict]],
+        delta_loader: Callable[[str], Awaitable[List[dict]]],
+        refresh_seconds: float,
+        rebuild_seconds: float,
+        max_staleness_seconds: float,
+        clock_skew_seconds: float = 5
+    ):
+        self.loader = loader
+        self.delta_loader = delta_loader
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self.clock_skew_seconds = clock_skew_seconds
+        self.data = SnapshotData()
+        # Moves whenever the data does, so response validators change with it
+        self.generation = 0
+        self._built_at: Optional[float] = None
+        self._synced_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        # Rows changed at or after this SGT timestamp are re-read by the next delta
+        self._watermark: Optional[str] = None
+        self._load_lock = asyncio.Lock()
+        self._refresh_task = None
+        # Writes seen while a rebuild is scanning, replayed onto the new data
+        self._pending: Optional[List[tuple]] = None
+        # Local deletes, so a delta read that started before one cannot bring the row back
+        self._removed: Dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._built_at is not None
+
+    @property
+    def tracking(self) -> bool:
+        # Built or being built; before that there is nothing to keep current,
+        # and the first build reads every row itself
+        return self._built_at is not None or self._pending is not None
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self._synced_at is None else time.monotonic() - self._synced_at
+
+    @property
+    def fresh(self) -> bool:
+        age = self.age
+        return age is not None and age <= self.max_staleness_seconds
+
+    def upsert(self, item: dict):
+        if not self.tracking:
+            return
+        if self._pending is not None:
+            self._pending.append(('upsert', item))
+        self._removed.pop(item['id'], None)
+        self.data.upsert(item)
+        self.generation += 1
+
+    def remove(self, item_id: str):
+        if not self.tracking:
+            return
+        if self._pending is not None:
+            self._pending.append(('remove', item_id))
+        self._removed[item_id] = time.monotonic()
+        self.data.remove(item_id)
+        self.generation += 1
+
+    def metric_samples(self) -> list:
+        # (name, type, help, value) rows for the /metrics collector
+        samples = [("inventory_snapshot_items", "gauge", "Items held by the inventory snapshot", len(self.data))]
+        if self.age is not None:
+            samples.append(("inventory_snapshot_age_seconds", "gauge", "Seconds since the snapshot last synced", self.age))
+        return samples
+
+    def _next_watermark(self) -> str:
+        return to_sgt_iso(datetime.now(SGT) - timedelta(seconds=self.clock_skew_seconds))
+
+    async def _rebuild(self):
+        started = time.monotonic()
+        watermark = self._next_watermark()
+        data = SnapshotData()
+        self._pending = []
+        try:
+            async for item in self.loader():
+                data.load(item)
+            data.build_indexes()
+            for op, value in self._pending:
+                if op == 'upsert':
+                    data.upsert(value)
+                else:
+                    data.remove(value)
+        finally:
+            self._pending = None
+        self.data = data
+        self.generation += 1
+        self._removed = {}
+        self._watermark = watermark
+        self._built_at = self._synced_at = started
+        logger.info(f"Inventory snapshot built with {len(data)} items in {time.monotonic() - started:.2f}s")
+
+    async def _apply_delta(self):
+        started = time.monotonic()
+        watermark = self._next_watermark()
+        items = await self.delta_loader(self._watermark)
+        for item in items:
+            removed_at = self._removed.get(item.get('id'))
+            if removed_at is not None and removed_at >= started:
+                continue
+            self.data.upsert(item)
+        if items:
+            self.generation += 1
+        self._removed = {item_id: at for item_id, at in self._removed.items() if at >= started}
+        self._watermark = watermark
+        self._synced_at = started
+        logger.debug(f"Inventory snapshot applied {len(items)} changed items")
+
+    async def _refresh(self, rebuild: bool):
+        try:
+            async with self._load_lock:
+                if rebuild:
+                    await self._rebuild()
+                else:
+                    await self._apply_delta()
+        except Exception as e:
+            # Keep serving until the staleness bound runs out; retried after refresh_seconds
+            logger.error(f"Inventory snapshot {'rebuild' if rebuild else 'refresh'} failed: {str(e)}")
+
+    async def ensure_loaded(self):
+        # The first call waits for the initial build; later syncs run in the
+        # background while the current data keeps serving
+        if not self.ready:
+            async with self._load_lock:
+                if not self.ready:
+                    self._attempted_at = time.monotonic()
+                    await self._rebuild()
+            return
+        now = time.monotonic()
+        if now - max(self._synced_at, self._attempted_at or 0) <= self.refresh_seconds:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._attempted_at = now
+            self._refresh_task = asyncio.ensure_future(
+                self._refresh(rebuild=now - self._built_at > self.rebuild_seconds)
+            )
+
+def create_snapshot(
+    loader: Callable[[], AsyncIterator[dict]],
+    delta_loader: Callable[[str], Awaitable[List[dict]]]
+) -> InventorySnapshot:
+    return InventorySnapshot(
+        loader, delta_loader, settings.SNAPSHOT_REFRESH_SECONDS,
+        settings.SNAPSHOT_REBUILD_SECONDS, settings.SNAPSHOT_MAX_STALENESS_SECONDS
+    )
@@ -0,0 +1,376 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+from core.config import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: without advisory locks a worker recovers only its own directory
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+# Held for as long as a process owns its journal directory
+OWNER_LOCK = "owner.lock"
+# Held while a starting process adopts directories whose owner has died
+RECOVERY_LOCK = "recovery.lock"
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def _lock(path: str, blocking: bool = True):
+    # An open file holding an exclusive flock on path, or None when another
+    # process holds it
+    lock = open(path, "a")
+    if fcntl is None:
+        return lock
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+class BufferedPrice(NamedTuple):
+    item_id: str
+    price: Decimal
+    at: str
+    # Monotonic time the oldest unwritten update for this item was acknowledged
+    queued: float
+
+class PriceJournal:
+    # Append-only segment file of acknowledged price updates, one JSON line each
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "ab")
+        self._written = 0
+        self._synced = 0
+        self._syncing: Optional[asyncio.Future] = None
+
+    def append(self, update: BufferedPrice) -> int:
+        line = {"id": update.item_id, "price": str(update.price), "at": update.at}
+        self._file.write(json.dumps(line).encode() + b"\n")
+        self._written += 1
+        return self._written
+
+    async def commit(self, line: int):
+        # Group commit: lines appended while an fsync runs share the next one
+        while self._synced < line:
+            if self._syncing is None:
+                self._syncing = asyncio.ensure_future(self._sync())
+            await asyncio.shield(self._syncing)
+
+    async def _sync(self):
+        line = self._written
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._fsync)
+            self._synced = line
+        finally:
+            self._syncing = None
+
+    def _fsync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def close(self):
+        await self.commit(self._written)
+        self._file.close()
+
+    @staticmethod
+    def read(path: str) -> List[BufferedPrice]:
+        updates = []
+        with open(path, "rb") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                    updates.append(BufferedPrice(entry["id"], Decimal(entry["price"]), entry["at"], time.monotonic()))
+                except (ValueError, KeyError):
+                    # A crash can leave the last line half written; it was never acknowledged
+                    logger.warning(f"Skipping unreadable line in {path}")
+        return updates
+
+class PriceBuffer:
+    # Write-behind buffer for price updates. An update is acknowledged once it
+    # is in the journal; the buffer keeps only the newest price per item and
+    # writes them in batches when max_batch items are waiting or every
+    # flush_seconds. Each flush starts a new journal segment and deletes the
+    # old one once its updates are written, so a restart replays only what
+    # had not reached DynamoDB.
+    #
+    # Workers share journal_root, each journaling into its own <host>-<pid>
+    # directory under an exclusive flock. A starting worker adopts the
+    # directories of dead workers, whose locks the kernel has released, one
+    # starter at a time under the root's recovery lock.
+    def __init__(
+        self,
+        write: Callable[[List[BufferedPrice]], Awaitable[Dict[str, str]]],
+        journal_root: str,
+        max_batch: int,
+        flush_seconds: float,
+        max_pending: int,
+        owner: Optional[str] = None
+    ):
+        # write returns "written", "dropped" or "failed" per item id; failed
+        # updates are queued again for the next flush
+        self._write = write
+        self.journal_root = journal_root
+        self.journal_dir = os.path.join(journal_root, owner or default_owner())
+        self._owner_lock = None
+        self.max_batch = max_batch
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[str, BufferedPrice] = {}
+        self._journal: Optional[PriceJournal] = None
+        # Rotated segments whose updates are not all written or re-journaled yet
+        self._unconfirmed: List[PriceJournal] = []
+        self._segment = 0
+        self._full = asyncio.Event()
+        self._flushing = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.accepted = 0
+        self.coalesced = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def lag(self) -> float:
+        # Age of the oldest acknowledged update not yet in DynamoDB
+        if not self._pending:
+            return 0.0
+        return time.monotonic() - min(update.queued for update in self._pending.values())
+
+    @staticmethod
+    def _segments(directory: str) -> List[str]:
+        names = [name for name in os.listdir(directory) if name.endswith(JOURNAL_SUFFIX)]
+        return [os.path.join(directory, name) for name in sorted(names)]
+
+    def _orphans(self) -> Dict[str, object]:
+        # Other owners' directories whose lock could be taken, with that lock
+        orphans = {}
+        if fcntl is None:
+            return orphans
+        for name in sorted(os.listdir(self.journal_root)):
+            directory = os.path.join(self.journal_root, name)
+            if directory == self.journal_dir or not os.path.isdir(directory):
+                continue
+            lock = _lock(os.path.join(directory, OWNER_LOCK), blocking=False)
+            if lock is not None:
+                orphans[directory] = lock
+        return orphans
+
+    @staticmethod
+    def _remove_directory(directory: str):
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    def _open_segment(self) -> PriceJournal:
+        self._segment += 1
+        return PriceJournal(os.path.join(self.journal_dir, f"{self._segment:012d}{JOURNAL_SUFFIX}"))
+
+    def _queue(self, update: BufferedPrice) -> bool:
+        # Last write wins by timestamp; the oldest acknowledgement sets the lag
+        current = self._pending.get(update.item_id)
+        if current is None:
+            self._pending[update.item_id] = update
+            return True
+        if update.at >= current.at:
+            self._pending[update.item_id] = update._replace(queued=min(update.queued, current.queued))
+        self.coalesced += 1
+        return False
+
+    async def start(self):
+        os.makedirs(self.journal_root, exist_ok=True)
+        # Directories are only created, adopted and removed under the recovery
+        # lock, so no starter sees one before its owner has locked it
+        recovery = _lock(os.path.join(self.journal_root, RECOVERY_LOCK))
+        try:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._owner_lock = _lock(os.path.join(self.journal_dir, OWNER_LOCK), blocking=False)
+            if self._owner_lock is None:
+                raise RuntimeError(f"Price journal {self.journal_dir} is in use by another process")
+            await self._recover()
+        finally:
+            recovery.close()
+        self._task = asyncio.create_task(self._run())
+
+    async def _recover(self):
+        # This directory's own segments (left by an earlier process with the
+        # same host and pid) and those of dead owners
+        segments = self._segments(self.journal_dir)
+        if segments:
+            self._segment = int(os.path.basename(segments[-1])[:-len(JOURNAL_SUFFIX)])
+        orphans = self._orphans()
+        self._journal = self._open_segment()
+        try:
+            # Updates acknowledged before a crash or restart go into the new
+            # segment before the old ones are removed
+            recovered = 0
+            for path in segments + [path for directory in orphans for path in self._segments(directory)]:
+                for update in PriceJournal.read(path):
+                    recovered += 1
+                    self._queue(update)
+            line = 0
+            for update in self._pending.values():
+                line = self._journal.append(update)
+            await self._journal.commit(line)
+            for path in segments:
+                os.remove(path)
+            for directory in orphans:
+                self._remove_directory(directory)
+        finally:
+            for lock in orphans.values():
+                lock.close()
+        if recovered:
+            logger.info(
+                f"Recovered {recovered} buffered price updates for {self.depth} items "
+                f"from {self.journal_dir} and {len(orphans)} orphaned journals"
+            )
+
+    async def stop(self):
+        if self._task is not None:
+            # Waits for a flush in progress instead of cancelling it half way
+            async with self._flushing:
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # The journal still holds whatever was not written
+            logger.error(f"Final price flush failed: {str(e)}")
+        if self._journal is not None:
+            await self._journal.close()
+            self._journal = None
+        for journal in self._unconfirmed:
+            await journal.close()
+        if self._owner_lock is not None:
+            if not self._pending and not self._unconfirmed:
+                # Nothing left to replay; otherwise the next starter adopts it
+                recovery = _lock(os.path.join(self.journal_root, RECOVERY_LOCK))
+                try:
+                    self._remove_directory(self.journal_dir)
+                finally:
+                    recovery.close()
+            self._owner_lock.close()
+            self._owner_lock = None
+
+    async def submit(self, item_id: str, price: Decimal, at: str) -> bool:
+        # False when the buffer is not running or already holds max_pending
+        # items; the caller then writes synchronously
+        if self._journal is None:
+            return False
+        if item_id not in self._pending and len(self._pending) >= self.max_pending:
+            return False
+        update = BufferedPrice(item_id, price, at, time.monotonic())
+        # Queued and journaled without awaiting in between, so a flush's segment
+        # rotation always moves both together
+        self._queue(update)
+        journal = self._journal
+        line = journal.append(update)
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        await journal.commit(line)
+        self.accepted += 1
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Price flush failed: {str(e)}")
+
+    async def flush(self):
+        async with self._flushing:
+            if not self._pending:
+                return
+            start = time.perf_counter()
+            batch, self._pending = list(self._pending.values()), {}
+            journal, self._journal = self._journal, self._open_segment()
+            self._unconfirmed.append(journal)
+            # Item ids written, dropped or queued again by this flush
+            settled = set()
+
+            try:
+                retry = []
+                for index in range(0, len(batch), self.max_batch):
+                    chunk = batch[index:index + self.max_batch]
+                    try:
+                        outcomes = await self._write(chunk)
+                    except Exception as e:
+                        logger.error(f"Price batch of {len(chunk)} failed: {str(e)}")
+                        outcomes = {}
+                    for update in chunk:
+                        outcome = outcomes.get(update.item_id, "failed")
+                        if outcome == "written":
+                            self.written += 1
+                            settled.add(update.item_id)
+                        elif outcome == "dropped":
+                            self.dropped += 1
+                            settled.add(update.item_id)
+                        else:
+                            self.failed += 1
+                            retry.append(update)
+
+                # Failed updates move to the new segment unless a newer price arrived meanwhile
+                line = 0
+                for update in retry:
+                    self._queue(update)
+                    settled.add(update.item_id)
+                    line = self._journal.append(self._pending[update.item_id])
+                await self._journal.commit(line)
+            except BaseException:
+                # Cancelled or failed part way: the rest of the batch goes back
+                # into the buffer and the old segments stay on disk until a
+                # later flush has confirmed them
+                for update in batch:
+                    if update.item_id not in settled:
+                        self._queue(update)
+                raise
+
+            # Every update in the old segments is now written or in the new one
+            for confirmed in self._unconfirmed:
+                await confirmed.close()
+                os.remove(confirmed.path)
+            self._unconfirmed = []
+            self.last_flush_seconds = time.perf_counter() - start
+            logger.info(f"Flushed {len(batch)} buffered prices in {self.last_flush_seconds:.3f}s, {len(retry)} to retry")
+
+    def metric_samples(self) -> list:
+        # (name, type, help, value) rows for the /metrics collector
+        return [
+            ("inventory_price_buffer_depth", "gauge", "Items with a buffered price not yet written", self.depth),
+            ("inventory_price_buffer_lag_seconds", "gauge", "Age of the oldest buffered price not yet written", self.lag),
+            ("inventory_price_buffer_last_flush_seconds", "gauge", "Duration of the last price flush", self.last_flush_seconds),
+            ("inventory_price_buffer_accepted_total", "counter", "Price updates acknowledged by the buffer", self.accepted),
+            ("inventory_price_buffer_coalesced_total", "counter", "Price updates merged into one already buffered", self.coalesced),
+            ("inventory_price_buffer_written_total", "counter", "Buffered prices written to DynamoDB", self.written),
+            ("inventory_price_buffer_dropped_total", "counter", "Buffered prices dropped because the item was deleted or rewritten", self.dropped),
+            ("inventory_price_buffer_failed_total", "counter", "Buffered price writes that failed and were queued again", self.failed),
+        ]
+
+def create_price_buffer(write: Callable[[List[BufferedPrice]], Awaitable[Dict[str, str]]]) -> PriceBuffer:
+    # Started by the app lifespan when WRITE_BEHIND_ENABLED is set
+    return PriceBuffer(
+        write, settings.WRITE_BEHIND_JOURNAL_DIR, settings.WRITE_BEHIND_MAX_BATCH,
+        settings.WRITE_BEHIND_FLUSH_SECONDS, settings.WRITE_BEHIND_MAX_PENDING
+    )
@@ -28,6 +28,31 @@ resource "aws_dynamodb_table" "inventory_table" {
     type = "S"
   }
 
+  attribute {
+    name = "category"
+    type = "S"
+  }
+
+  attribute {
+    name = "last_updated_dt"
+    type = "S"
+  }
+
+  attribute {
+    name = "last_updated_date"
+    type = "S"
+  }
+
+  attribute {
+    name = "listing"
+    type = "S"
+  }
+
+  attribute {
+    name = "price"
+    type = "N"
+  }
+
   global_secondary_index {
     name            = "NameIndex"
     hash_key        = "item_name"
@@ -36,6 +61,92 @@ resource "aws_dynamodb_table" "inventory_table" {
     read_capacity   = 1
   }
 
+  global_secondary_index {
+    name            = "CategoryIndex"
+    hash_key        = "category"
+    range_key       = "last_updated_dt"
+    projection_type = "ALL"
+    write_capacity  = 1
+    read_capacity   = 1
+  }
+
+  global_secondary_index {
+    name            = "DateIndex"
+    hash_key        = "last_updated_date"
+    range_key       = "last_updated_dt"
+    projection_type = "ALL"
+    write_capacity  = 1
+    read_capacity   = 1
+  }
+
+  global_secondary_index {
+    name            = "ListingPriceIndex"
+    hash_key        = "listing"
+    range_key       = "price"
+    projection_type = "ALL"
+    write_capacity  = 1
+    read_capacity   = 1
+  }
+
+  global_secondary_index {
+    name            = "ListingNameIndex"
+    hash_key        = "listing"
+    range_key       = "item_name"
+    projection_type = "ALL"
+    write_capacity  = 1
+    read_capacity   = 1
+  }
+
+  global_secondary_index {
+    name            = "CategoryPriceIndex"
+    hash_key        = "category"
+    range_key       = "price"
+    projection_type = "ALL"
+    write_capacity  = 1
+    read_capacity   = 1
+  }
+
+  global_secondary_index {
+    name            = "CategoryNameIndex"
+    hash_key        = "category"
+    range_key       = "item_name"
+    projection_type = "ALL"
+    write_capacity  = 1
+    read_capacity   = 1
+  }
+
+  tags = {
+    Environment = "Development"
+    Application = "InventoryApp"
+  }
+}
+
+resource "aws_dynamodb_table" "inventory_aggregates_table" {
+  name         = "InventoryAggregates"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "scope"
+
+  attribute {
+    name = "scope"
+    type = "S"
+  }
+
+  tags = {
+    Environment = "Development"
+    Application = "InventoryApp"
+  }
+}
+
+resource "aws_dynamodb_table" "inventory_names_table" {
+  name         = "InventoryNames"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "item_name"
+
+  attribute {
+    name = "item_name"
+    type = "S"
+  }
+
   tags = {
     Environment = "Development"
     Application = "InventoryApp"
@@ -45,4 +156,12 @@ resource "aws_dynamodb_table" "inventory_table" {
 # Output the table name for reference
 output "dynamodb_table_name" {
   value = aws_dynamodb_table.inventory_table.name
-}
\ No newline at end of file
+}
+
+output "dynamodb_aggregates_table_name" {
+  value = aws_dynamodb_table.inventory_aggregates_table.name
+}
+
+output "dynamodb_names_table_name" {
+  value = aws_dynamodb_table.inventory_names_table.name
+}
@@ -1,10 +1,22 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
 from main import app
+from services import inventory
 from test.constants import SGT
 
+class StubTable:
+    # Stands in for a boto3 Table. Any DynamoDB call fails the test, so service
+    # tests replace the methods or collaborators that would make one.
+    def __init__(self, name: str):
+        self.name = name
+        self.meta = SimpleNamespace(client=self)
+
+    def __getattr__(self, operation):
+        raise AssertionError(f"Unexpected DynamoDB call {operation} on {self.name}")
+
 
 @pytest.fixture
 def client():
@@ -26,8 +38,19 @@ def mock_inventory_service():
         mock_service.query_items = AsyncMock()
         mock_service.query_items_paginated = AsyncMock()
         mock_service.update_item_price = AsyncMock()
+        mock_service.batch_upsert_items = AsyncMock()
+        mock_service.get_summary = AsyncMock()
+        mock_service.query_changes = AsyncMock()
+        # No validators unless a test sets a version
+        mock_service.read_version = AsyncMock(return_value=None)
         yield mock_service
 
+@pytest.fixture
+def inventory_service(monkeypatch):
+    # A real InventoryService, built by its own constructor, over stub tables
+    monkeypatch.setattr(inventory.db_manager, "table", StubTable)
+    return inventory.InventoryService()
+
 @pytest.fixture
 def create_test_items(TEST_ITEM):
     def _create_test_items(count=5, category="test"):
@@ -0,0 +1,120 @@
+import pytest
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from services.aggregates import AggregateDeltas, AggregateStore, compute_aggregates
+
+class RecordingTable:
+    def __init__(self):
+        self.updates = []
+
+    async def update_item(self, **params):
+        self.updates.append((params['Key']['scope'], params['ExpressionAttributeValues']))
+        return {}
+
+def test_deltas_roll_up_into_category_and_global_scopes():
+    deltas = AggregateDeltas()
+    deltas.created({"category": "food", "price": Decimal("2.50")})
+    deltas.repriced({"category": "food", "price": Decimal("1.00")}, Decimal("3.00"))
+    deltas.deleted({"category": "toys", "price": Decimal("4.00")})
+    assert deltas.scopes() == {
+        "category#food": (1, Decimal("4.50")),
+        "category#toys": (-1, Decimal("-4.00")),
+        "all": (0, Decimal("0.50")),
+    }
+
+def test_unchanged_price_still_bumps_versions():
+    deltas = AggregateDeltas()
+    deltas.repriced({"category": "food", "price": Decimal("1.00")}, Decimal("1.00"))
+    assert deltas.scopes() == {"category#food": (0, Decimal("0")), "all": (0, Decimal("0"))}
+    assert AggregateDeltas().scopes() == {}
+
+@pytest.mark.asyncio
+async def test_apply_adds_deltas_per_scope():
+    table = RecordingTable()
+    deltas = AggregateDeltas()
+    deltas.created({"category": "food", "price": Decimal("2.50")})
+    await AggregateStore(table).apply(deltas)
+    assert sorted(scope for scope, _ in table.updates) == ["all", "category#food"]
+    values = table.updates[0][1]
+    assert (values[":count"], values[":price"], values[":one"]) == (1, Decimal("2.50"), 1)
+
+def test_compute_aggregates_always_includes_global_scope():
+    assert compute_aggregates([]) == {"all": (0, Decimal("0"))}
+    scopes = compute_aggregates([
+        {"category": "food", "price": Decimal("1.25")},
+        {"category": "food", "price": "2.75"},
+    ])
+    assert scopes["category#food"] == (2, Decimal("4.00"))
+
+def test_summary_endpoint(mock_inventory_service, client):
+    mock_inventory_service.get_summary.return_value = {"category": "food", "count": 2, "total_price": "4.00"}
+    response = client.get("/items/summary?category=Food")
+    assert response.status_code == 200
+    assert response.json() == {"category": "food", "count": 2, "total_price": "4.00"}
+    mock_inventory_service.get_summary.assert_called_once_with(category="Food")
+
+class ContendedTable(RecordingTable):
+    # Rejects the first `failures` updates of each scope with `code`
+    def __init__(self, failures: int, code: str):
+        super().__init__()
+        self.failures = {}
+        self.default_failures = failures
+        self.code = code
+
+    async def update_item(self, **params):
+        scope = params['Key']['scope']
+        remaining = self.failures.setdefault(scope, self.default_failures)
+        if remaining:
+            self.failures[scope] = remaining - 1
+            raise ClientError({"Error": {"Code": self.code}}, "UpdateItem")
+        return await super().update_item(**params)
+
+def food_deltas(price: str) -> AggregateDeltas:
+    deltas = AggregateDeltas()
+    deltas.created({"category": "food", "price": Decimal(price)})
+    return deltas
+
+@pytest.mark.asyncio
+async def test_contended_updates_are_retried():
+    table = ContendedTable(2, "TransactionConflictException")
+    store = AggregateStore(table, max_attempts=3)
+    await store.apply(food_deltas("2.50"))
+    assert sorted(scope for scope, _ in table.updates) == ["all", "category#food"]
+    assert store.failed_updates == 0
+
+@pytest.mark.asyncio
+async def test_rejected_updates_carry_into_the_next_apply():
+    table = ContendedTable(1, "ValidationException")
+    store = AggregateStore(table)
+    await store.apply(food_deltas("2.50"))
+    assert table.updates == []
+    assert store.failed_updates == 2
+    assert {name: value for name, _, _, value in store.metric_samples()} == {
+        "inventory_aggregate_update_failures_total": 2, "inventory_aggregate_unapplied_scopes": 2
+    }
+
+    await store.apply(food_deltas("1.00"))
+    values = {scope: (values[":count"], values[":price"]) for scope, values in table.updates}
+    assert values == {"category#food": (2, Decimal("3.50")), "all": (2, Decimal("3.50"))}
+    assert store.metric_samples()[1][3] == 0
+
+class SeedTable:
+    def __init__(self, item):
+        self.item = item
+        self.reads = 0
+
+    async def get_item(self, **params):
+        self.reads += 1
+        return {"Item": self.item} if self.item is not None else {}
+
+@pytest.mark.asyncio
+async def test_aggregates_count_only_once_seeded():
+    assert not await AggregateStore(SeedTable(None), max_attempts=1).seeded()
+    # Rows that only ever saw ADDs
+    assert not await AggregateStore(SeedTable({"scope": "all"}), max_attempts=1).seeded()
+
+    table = SeedTable({"seeded_at": "2025-01-01T08:00:00.000000+08:00"})
+    store = AggregateStore(table, max_attempts=1)
+    assert await store.seeded()
+    assert await store.seeded()
+    assert table.reads == 1
@@ -0,0 +1,30 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from core.database import AsyncTable
+
+class SlowTable:
+    name = "Inventory"
+
+    def __init__(self):
+        self.threads = set()
+
+    def get_item(self, Key):
+        self.threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return {"Item": Key}
+
+@pytest.mark.asyncio
+async def test_async_table_runs_calls_off_the_event_loop():
+    table = SlowTable()
+    async_table = AsyncTable(table, ThreadPoolExecutor(max_workers=10))
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(async_table.get_item(Key={"id": str(i)}) for i in range(10)))
+    elapsed = time.perf_counter() - start
+
+    assert [r["Item"]["id"] for r in responses] == [str(i) for i in range(10)]
+    assert threading.get_ident() not in table.threads
+    assert elapsed < 0.05 * 5
@@ -0,0 +1,185 @@
+import pytest
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from core.models import ItemCreate
+from services.batch import BatchReader, BatchWriter
+
+class FlakyTable:
+    name = "Inventory"
+
+    def __init__(self, unprocessed_rounds=1):
+        self.unprocessed_rounds = unprocessed_rounds
+        self.calls = []
+
+    async def batch_write_item(self, RequestItems):
+        requests = RequestItems[self.name]
+        self.calls.append(len(requests))
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            return {"UnprocessedItems": {self.name: requests[:2]}}
+        return {"UnprocessedItems": {}}
+
+@pytest.mark.asyncio
+async def test_batch_writer_chunks_and_retries_unprocessed_items():
+    table = FlakyTable(unprocessed_rounds=1)
+    writer = BatchWriter(table, concurrency=1, max_retries=3)
+    errors = await writer.put_items([{"id": str(i)} for i in range(60)])
+    assert errors == {}
+    assert table.calls == [25, 2, 25, 10]
+
+@pytest.mark.asyncio
+async def test_batch_writer_reports_items_left_unprocessed():
+    table = FlakyTable(unprocessed_rounds=10)
+    writer = BatchWriter(table, concurrency=1, max_retries=1)
+    errors = await writer.put_items([{"id": str(i)} for i in range(5)])
+    assert set(errors) == {"0", "1"}
+
+@pytest.mark.asyncio
+async def test_batch_upsert_endpoint(mock_inventory_service, client):
+    mock_inventory_service.batch_upsert_items.return_value = {
+        "results": [
+            {"index": 0, "id": "id-1", "status": "created"},
+            {"index": 1, "id": "id-2", "status": "failed", "error": "Unprocessed after retries"}
+        ],
+        "created": 1, "updated": 0, "failed": 1
+    }
+    response = client.post("/items/batch", json=[
+        {"name": "Item A", "category": "Food", "price": 1.5},
+        {"name": "Item B", "category": "Food", "price": 2.5}
+    ])
+    assert response.status_code == 200
+    assert response.json()["results"][1]["status"] == "failed"
+    items = mock_inventory_service.batch_upsert_items.call_args.args[0]
+    assert [item.item_name for item in items] == ["item a", "item b"]
+
+def test_batch_upsert_rejects_invalid_items(client):
+    response = client.post("/items/batch", json=[{"name": "ok", "category": "food", "price": 0}])
+    assert response.status_code == 422
+
+class PartialReadTable:
+    name = "Inventory"
+
+    def __init__(self):
+        self.calls = []
+
+    async def batch_get_item(self, RequestItems):
+        keys = RequestItems[self.name]['Keys']
+        self.calls.append(len(keys))
+        found = [{"id": key["id"]} for key in keys if key["id"] != "missing"]
+        if len(keys) > 1:
+            return {"Responses": {self.name: found[1:]}, "UnprocessedKeys": {self.name: {"Keys": keys[:1]}}}
+        return {"Responses": {self.name: found}}
+
+@pytest.mark.asyncio
+async def test_batch_reader_chunks_and_retries_unprocessed_keys():
+    table = PartialReadTable()
+    items = await BatchReader(table, concurrency=1).get_items([str(i) for i in range(150)] + ["missing"])
+    assert len(items) == 150
+    assert table.calls == [100, 1, 51, 1]
+
+class RecordingWriter:
+    def __init__(self, failing=()):
+        self.rows = []
+        self.failing = set(failing)
+
+    async def put_items(self, rows):
+        self.rows.extend(rows)
+        return {row['id']: "Unprocessed after retries" for row in rows if row.get('item_name') in self.failing}
+
+class RecordingAggregates:
+    def __init__(self):
+        self.applied = []
+
+    async def apply(self, deltas):
+        self.applied.append(deltas.scopes())
+
+class NamesTable:
+    # Name guards; claiming a name that is already held fails its condition
+    name = "InventoryNames"
+
+    def __init__(self, owners=None):
+        self.owners = dict(owners or {})
+
+    async def put_item(self, Item, ConditionExpression, ReturnValuesOnConditionCheckFailure):
+        owner = self.owners.get(Item['item_name'])
+        if owner is not None:
+            raise ClientError(
+                {"Error": {"Code": "ConditionalCheckFailedException"}, "Item": {"item_name": {"S": Item['item_name']}, "id": {"S": owner}}},
+                "PutItem"
+            )
+        self.owners[Item['item_name']] = Item['id']
+        return {}
+
+    async def delete_item(self, Key, ConditionExpression, ExpressionAttributeValues):
+        if self.owners.get(Key['item_name']) == ExpressionAttributeValues[':id']:
+            del self.owners[Key['item_name']]
+        return {}
+
+def batch_service(service, existing, old_prices, failing=(), owners=None):
+    service.batch_writer = RecordingWriter(failing)
+    service.names = NamesTable(owners)
+    service.aggregates = RecordingAggregates()
+    service.updates = []
+
+    async def find_many_by_name(item_names):
+        return {name: item for name, item in existing.items() if name in item_names}
+
+    async def set_price(item_id, price, now):
+        service.updates.append((item_id, price))
+        old_price = old_prices[item_id]
+        if isinstance(old_price, Exception):
+            raise old_price
+        return {"id": item_id, "category": "food", "price": old_price}
+
+    service._find_many_by_name = find_many_by_name
+    service._set_price = set_price
+    return service
+
+@pytest.mark.asyncio
+async def test_repeated_names_are_written_once_and_counted_once(inventory_service):
+    service = batch_service(inventory_service, {}, {})
+    result = await service.batch_upsert_items([
+        ItemCreate(name="a", category="food", price=1),
+        ItemCreate(name="b", category="food", price=2),
+        ItemCreate(name="a", category="food", price=3),
+    ])
+    assert [row['price'] for row in service.batch_writer.rows] == [Decimal("3"), Decimal("2")]
+    assert [r.status for r in result.results] == ["superseded", "created", "created"]
+    assert result.results[0].id == result.results[2].id
+    assert (result.created, result.updated, result.failed, result.superseded) == (2, 0, 0, 1)
+    assert service.aggregates.applied == [{"category#food": (2, Decimal("5")), "all": (2, Decimal("5"))}]
+
+@pytest.mark.asyncio
+async def test_update_deltas_come_from_the_old_image(inventory_service):
+    # The lookup saw 1.00, but another write moved the price to 4.00 before this one
+    existing = {
+        "a": {"id": "id-a", "item_name": "a", "category": "food", "price": Decimal("1.00")},
+        "gone": {"id": "id-gone", "item_name": "gone", "category": "food", "price": Decimal("1.00")},
+    }
+    deleted = ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+    service = batch_service(inventory_service, existing, {"id-a": Decimal("4.00"), "id-gone": deleted})
+    result = await service.batch_upsert_items([
+        ItemCreate(name="a", category="food", price=5),
+        ItemCreate(name="gone", category="food", price=5),
+    ])
+    assert service.batch_writer.rows == []
+    assert [(r.status, r.error) for r in result.results] == [
+        ("updated", None), ("failed", "Item was deleted during the batch")
+    ]
+    assert service.aggregates.applied == [{"category#food": (0, Decimal("1.00")), "all": (0, Decimal("1.00"))}]
+
+@pytest.mark.asyncio
+async def test_names_are_claimed_before_rows_are_written(inventory_service):
+    # "taken" was created by another writer after the lookup missed it
+    service = batch_service(inventory_service, {}, {"id-taken": Decimal("1.00")}, failing={"lost"}, owners={"taken": "id-taken"})
+    result = await service.batch_upsert_items([
+        ItemCreate(name="new", category="food", price=2),
+        ItemCreate(name="taken", category="food", price=2),
+        ItemCreate(name="lost", category="food", price=2),
+    ])
+    assert [row['item_name'] for row in service.batch_writer.rows] == ["new", "lost"]
+    assert [(r.status, r.id) for r in result.results][1] == ("updated", "id-taken")
+    assert [r.status for r in result.results] == ["created", "updated", "failed"]
+    assert service.updates == [("id-taken", Decimal("2"))]
+    # The row that never landed gives its name back
+    assert sorted(service.names.owners) == ["new", "taken"]
@@ -0,0 +1,85 @@
+import time
+import pytest
+from services.cache import InMemoryCache, InventoryCache
+
+def test_in_memory_cache_evicts_least_recently_used():
+    cache = InMemoryCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats.evictions == 1
+
+def test_in_memory_cache_expires_entries():
+    cache = InMemoryCache(max_entries=10)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_invalidate_item_only_drops_affected_results():
+    cache = InventoryCache(InMemoryCache(max_entries=10), ttl=60)
+    food = cache.query_key("query_items", category="food")
+    toys = cache.query_key("query_items", category="toys")
+    everything = cache.query_key("query_items")
+    cache.set(food, "food", tags=cache.category_tags("food"))
+    cache.set(toys, "toys", tags=cache.category_tags("toys"))
+    cache.set(everything, "all", tags=cache.category_tags(None))
+    cache.set_item({"id": "1", "item_name": "apple", "category": "food"})
+
+    cache.invalidate_item("1", "food")
+
+    assert cache.get(food) is None
+    assert cache.get(everything) is None
+    assert cache.get_item("1") is None
+    assert cache.get_item_by_name("apple") is None
+    assert cache.get(toys) == "toys"
+
+def test_query_key_normalizes_filters():
+    key = InventoryCache.query_key
+    assert key("q", category=" Food ", price_min=10.0, page=None) == key("q", category="food", price_min=10)
+    assert key("q", cursor="AbC") != key("q", cursor="abc")
+
+@pytest.mark.asyncio
+async def test_cache_stats_endpoint(mock_inventory_service, client):
+    mock_inventory_service.cache.as_dict.return_value = {"hits": 3, "misses": 1, "hit_ratio": 0.75}
+    response = client.get("/cache/stats")
+    assert response.status_code == 200
+    assert response.json()["hits"] == 3
+
+def test_a_set_is_dropped_when_its_tags_were_invalidated_during_the_read():
+    cache = InventoryCache(InMemoryCache(max_entries=10), ttl=60)
+    tags = cache.category_tags("food")
+    generation = cache.generation(tags)
+    cache.invalidate_item("1", "food")
+    cache.set("food", "stale", tags=tags, generation=generation)
+    assert cache.get("food") is None
+    assert cache.stats.stale_skips == 1
+
+    # Writes elsewhere do not hold results back
+    generation = cache.generation(tags)
+    cache.invalidate_item("2", "toys")
+    cache.set("food", "fresh", tags=tags, generation=generation)
+    assert cache.get("food") == "fresh"
+
+@pytest.mark.asyncio
+async def test_a_read_overlapping_a_write_is_not_cached(inventory_service):
+    service = inventory_service
+    service.cache = InventoryCache(InMemoryCache(max_entries=10), ttl=60)
+    reads = []
+
+    async def execute_plan(plan):
+        reads.append(plan)
+        if len(reads) == 1:
+            # Another request writes to the category while this read is in flight
+            service.cache.invalidate_item("new", "food")
+        return []
+
+    service._execute_plan = execute_plan
+    await service.query_items(category="food")
+    await service.query_items(category="food")
+    assert len(reads) == 2
+    await service.query_items(category="food")
+    assert len(reads) == 2
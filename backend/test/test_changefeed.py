@@ -0,0 +1,91 @@
+import asyncio
+import json
+import pytest
+from services.changefeed import ChangeFeed
+
+def item(item_id: str, category: str = "food") -> dict:
+    return {"id": item_id, "item_name": f"item {item_id}", "category": category, "price": 1.5}
+
+async def take(events, count: int) -> list:
+    taken = []
+    async for event in events:
+        taken.append(event)
+        if len(taken) == count:
+            break
+    await events.aclose()
+    return taken
+
+@pytest.mark.asyncio
+async def test_listeners_get_new_events_for_their_category():
+    feed = ChangeFeed(history=100)
+    feed.publish("created", item("old"), "2025-01-01T08:00:00+08:00")
+    listener = asyncio.ensure_future(take(feed.listen(category="Food"), 2))
+    await asyncio.sleep(0)
+    feed.publish("created", item("a"), "2025-01-01T08:00:01+08:00")
+    feed.publish("updated", item("b", "toys"), "2025-01-01T08:00:02+08:00")
+    feed.publish("deleted", item("a"), "2025-01-01T08:00:03+08:00")
+
+    events = await asyncio.wait_for(listener, timeout=1)
+    assert [(change, data["item"]["id"]) for _, change, data in events] == [("created", "a"), ("deleted", "a")]
+    assert events[-1][0] == feed.event_id(4)
+    assert feed.listeners == 0
+
+@pytest.mark.asyncio
+async def test_resume_continues_after_the_last_event_id():
+    feed = ChangeFeed(history=100)
+    for index in range(5):
+        feed.publish("created", item(str(index)), "2025-01-01T08:00:00+08:00")
+
+    events = await take(feed.listen(last_event_id=feed.event_id(2)), 3)
+    assert [data["sequence"] for _, _, data in events] == [3, 4, 5]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("last_event_id", ["other:1", "nonsense", "{epoch}:99", "{epoch}:1"])
+async def test_unknown_or_expired_positions_get_a_reset(last_event_id):
+    feed = ChangeFeed(history=3)
+    for index in range(5):
+        feed.publish("created", item(str(index)), "2025-01-01T08:00:00+08:00")
+
+    [(event_id, change, data)] = await take(feed.listen(last_event_id=last_event_id.format(epoch=feed.epoch)), 1)
+    assert change == "reset"
+    assert event_id == feed.event_id(5)
+    assert feed.resets == 1
+
+@pytest.mark.asyncio
+async def test_a_slow_listener_is_reset_instead_of_holding_up_writers():
+    feed = ChangeFeed(history=2)
+    events = feed.listen(last_event_id=feed.event_id(0), heartbeat_seconds=1)
+    feed.publish("created", item("a"), "2025-01-01T08:00:00+08:00")
+    await events.__anext__()
+    # Writers never wait on listeners; this one's position has left the log
+    for index in range(3):
+        feed.publish("created", item(str(index)), "2025-01-01T08:00:00+08:00")
+
+    event_id, change, _ = await events.__anext__()
+    assert (event_id, change) == (feed.event_id(4), "reset")
+    await events.aclose()
+
+@pytest.mark.asyncio
+async def test_idle_listeners_get_heartbeats():
+    feed = ChangeFeed(history=10)
+    assert await take(feed.listen(heartbeat_seconds=0.01), 1) == [None]
+
+def test_changes_endpoint_streams_server_sent_events(mock_inventory_service, client):
+    calls = []
+
+    async def listen(category=None, last_event_id=None, heartbeat_seconds=15):
+        calls.append((category, last_event_id))
+        yield "e:1", "created", {"type": "created", "sequence": 1, "item": item("a")}
+        yield None
+
+    mock_inventory_service.feed.listen = listen
+    response = client.get("/items/changes?category=food&last_event_id=e:0", headers={"Last-Event-ID": "e:7"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert calls == [("food", "e:7")]
+
+    frame, heartbeat, _ = response.text.split("\n\n")
+    lines = frame.split("\n")
+    assert lines[:2] == ["id: e:1", "event: created"]
+    assert json.loads(lines[2].removeprefix("data: "))["item"]["id"] == "a"
+    assert heartbeat == ": keep-alive"
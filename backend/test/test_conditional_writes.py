@@ -0,0 +1,123 @@
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from core.config import settings
+from core.models import ItemCreate
+
+def condition_failure():
+    return ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+
+class NoopAggregates:
+    async def apply(self, deltas):
+        pass
+
+def stub_writes(service, create_results, set_price_results):
+    service.aggregates = NoopAggregates()
+    service.created = []
+    service.updated = []
+
+    async def create_item(item, price, now, replaces=None):
+        service.created.append(replaces)
+        return create_results.pop(0)
+
+    async def set_price(item_id, price, now):
+        service.updated.append(item_id)
+        result = set_price_results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    service._create_item = create_item
+    service._set_price = set_price
+    return service
+
+@pytest.mark.asyncio
+async def test_upsert_creates_without_a_lookup(inventory_service):
+    service = stub_writes(inventory_service, [(True, "new-id")], [])
+    assert await service._upsert_item(ItemCreate(name="a", category="c", price=1)) == {"id": "new-id"}
+    assert service.updated == []
+
+@pytest.mark.asyncio
+async def test_upsert_updates_the_owner_of_a_taken_name(inventory_service):
+    service = stub_writes(inventory_service, [(False, "owner")], [{"id": "owner", "category": "c", "price": 1}])
+    assert await service._upsert_item(ItemCreate(name="a", category="c", price=2)) == {"id": "owner"}
+    assert service.updated == ["owner"]
+
+@pytest.mark.asyncio
+async def test_upsert_replaces_a_guard_left_by_a_deleted_item(inventory_service):
+    service = stub_writes(inventory_service, [(False, "gone"), (True, "new-id")], [condition_failure()])
+    assert await service._upsert_item(ItemCreate(name="a", category="c", price=2)) == {"id": "new-id"}
+    assert service.created == [None, "gone"]
+
+def cancelled(*codes, item=None):
+    reasons = [{"Code": code} for code in codes]
+    if item is not None:
+        reasons[0]["Item"] = item
+    return ClientError({"Error": {"Code": "TransactionCanceledException"}, "CancellationReasons": reasons}, "TransactWriteItems")
+
+class TransactingTable:
+    name = "Inventory"
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.transactions = []
+
+    async def transact_write_items(self, TransactItems):
+        self.transactions.append(TransactItems)
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if outcome is not None:
+            raise outcome
+        return {}
+
+class RecordingAggregates:
+    def __init__(self):
+        self.applied = []
+
+    async def apply(self, deltas):
+        self.applied.append(deltas.scopes())
+
+def stub_transactions(service, *outcomes):
+    service.table = TransactingTable(*outcomes)
+    service.aggregates = RecordingAggregates()
+    return service
+
+@pytest.mark.asyncio
+async def test_create_transaction_leaves_aggregates_out(inventory_service):
+    service = stub_transactions(inventory_service, cancelled("None", "TransactionConflict"))
+    result = await service._upsert_item(ItemCreate(name="a", category="c", price=2))
+    # Guard and item only; the aggregate rows are updated once, after the retry succeeds
+    assert [len(actions) for actions in service.table.transactions] == [2, 2]
+    assert service.aggregates.applied == [{"category#c": (1, 2), "all": (1, 2)}]
+    assert result["id"] == service.table.transactions[1][1]["Put"]["Item"]["id"]
+
+@pytest.mark.asyncio
+async def test_persistent_conflicts_become_a_503(inventory_service, monkeypatch):
+    monkeypatch.setattr(settings, "UPSERT_MAX_ATTEMPTS", 2)
+    service = stub_transactions(
+        inventory_service, cancelled("TransactionConflict", "None"), cancelled("None", "ThrottlingError")
+    )
+    with pytest.raises(HTTPException) as error:
+        await service._upsert_item(ItemCreate(name="a", category="c", price=2))
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
+    assert service.aggregates.applied == []
+
+@pytest.mark.asyncio
+async def test_a_taken_guard_hands_back_its_owner(inventory_service):
+    service = stub_transactions(inventory_service, cancelled("ConditionalCheckFailed", "None", item={"id": {"S": "owner"}}))
+    created, owner = await service._create_item(ItemCreate(name="a", category="c", price=2), 2, "now")
+    assert (created, owner) == (False, "owner")
+
+@pytest.mark.asyncio
+async def test_other_cancellations_are_not_retried(inventory_service):
+    service = stub_transactions(inventory_service, cancelled("ValidationError", "None"))
+    with pytest.raises(ClientError):
+        await service._create_item(ItemCreate(name="a", category="c", price=2), 2, "now")
+
+@pytest.mark.asyncio
+async def test_a_name_that_keeps_changing_owner_is_a_409(inventory_service, monkeypatch):
+    monkeypatch.setattr(settings, "UPSERT_MAX_ATTEMPTS", 2)
+    service = stub_writes(inventory_service, [(False, "one"), (False, "two")], [condition_failure(), condition_failure()])
+    with pytest.raises(HTTPException) as error:
+        await service._upsert_item(ItemCreate(name="a", category="c", price=2))
+    assert error.value.status_code == 409
@@ -0,0 +1,63 @@
+import time
+import pytest
+from core.config import settings
+from core.database import (
+    GLOBAL_SECONDARY_INDEXES, DynamoDBClientManager, _wait_for_indexes, check_indexes, outdated_indexes
+)
+
+def test_tables_resolve_lazily():
+    manager = DynamoDBClientManager()
+    table = manager.table("Inventory")
+    assert table.name == "Inventory"
+    assert manager._resource is None
+
+def test_client_config_comes_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", False)
+    config = DynamoDBClientManager.client_config()
+    assert config.max_pool_connections == settings.DB_MAX_WORKERS + settings.SCAN_MAX_WORKERS + settings.STREAM_SCAN_MAX_WORKERS
+    assert config.retries == {'mode': settings.DB_RETRY_MODE, 'max_attempts': settings.DB_MAX_ATTEMPTS}
+    assert config.read_timeout == settings.DB_READ_TIMEOUT
+
+def test_botocore_does_not_retry_under_the_scheduler(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_ENABLED", True)
+    assert DynamoDBClientManager.client_config().retries == {'mode': 'standard', 'total_max_attempts': 1}
+
+class IndexedTable:
+    # Describes a table whose indexes never change; any update_table call fails
+    name = "Inventory"
+    table_status = "ACTIVE"
+
+    def __init__(self, indexes):
+        self.global_secondary_indexes = indexes
+
+    def reload(self):
+        pass
+
+def current_indexes(**overrides):
+    indexes = [dict(index, IndexStatus="ACTIVE") for index in GLOBAL_SECONDARY_INDEXES]
+    return [dict(index, **overrides.get(index['IndexName'], {})) for index in indexes]
+
+def test_outdated_indexes_are_reported_without_changing_the_table(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DB_REQUIRE_INDEXES", False)
+    indexes = current_indexes(
+        NameIndex={"IndexStatus": "CREATING"},
+        ListingPriceIndex={"KeySchema": [{"AttributeName": "listing", "KeyType": "HASH"}]}
+    )
+    table = IndexedTable([index for index in indexes if index['IndexName'] != 'CategoryNameIndex'])
+    assert outdated_indexes(table) == ["NameIndex", "ListingPriceIndex", "CategoryNameIndex"]
+    check_indexes(table)
+    assert "run python -m scripts.migrate" in caplog.text
+
+    assert outdated_indexes(IndexedTable(current_indexes())) == []
+
+def test_outdated_indexes_can_stop_a_worker_from_starting(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REQUIRE_INDEXES", True)
+    with pytest.raises(RuntimeError):
+        check_indexes(IndexedTable([]))
+    check_indexes(IndexedTable(current_indexes()))
+
+def test_waiting_for_indexes_gives_up(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    table = IndexedTable(current_indexes(NameIndex={"IndexStatus": "CREATING"}))
+    with pytest.raises(TimeoutError, match="NameIndex"):
+        _wait_for_indexes(table, timeout=0)
@@ -0,0 +1,74 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from core.config import settings
+from test.constants import SGT
+from utils.helpers import parse_since, to_sgt_iso
+
+VERSION = {'scope': 'all', 'version': 7, 'last_modified': "2025-01-01T08:00:00.000000+08:00", 'snapshot': None}
+
+def test_if_none_match_gets_304_without_reading_items(mock_inventory_service, client):
+    mock_inventory_service.read_version.return_value = VERSION
+    mock_inventory_service.query_items.return_value = {"items": [], "total_price": "0.00"}
+
+    first = client.get("/items/")
+    assert first.status_code == 200
+    assert first.headers["last-modified"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert first.headers["x-inventory-version"] == "7"
+
+    again = client.get("/items/", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+    assert mock_inventory_service.query_items.call_count == 1
+
+    # Another query, or a newer version, is a different representation
+    other = client.get("/items/?category=food", headers={"If-None-Match": first.headers["etag"]})
+    assert other.status_code == 200
+    mock_inventory_service.read_version.return_value = dict(VERSION, version=8)
+    assert client.get("/items/", headers={"If-None-Match": first.headers["etag"]}).status_code == 200
+
+def test_changed_since_reads_only_the_delta(mock_inventory_service, client):
+    mock_inventory_service.query_changes.return_value = {"items": [], "count": 0, "last_modified": VERSION['last_modified']}
+    response = client.get("/items/?changed_since=2025-01-01&category=food")
+    assert response.status_code == 200
+    mock_inventory_service.query_changes.assert_called_once_with("2025-01-01", category="food")
+    mock_inventory_service.query_items.assert_not_called()
+
+def test_changed_since_accepts_a_last_modified_value():
+    assert parse_since("Wed, 01 Jan 2025 00:00:00 GMT") == "2025-01-01T08:00:00.000000+08:00"
+    with pytest.raises(ValueError):
+        parse_since("yesterday")
+
+class VersionedAggregates:
+    def __init__(self, version: int, last_modified: str):
+        self.record = {'count': 0, 'total_price': 0, 'version': version, 'last_modified': last_modified}
+
+    async def get(self, category=None):
+        return dict(self.record)
+
+@pytest.mark.asyncio
+async def test_a_write_from_another_worker_drops_cached_results(inventory_service):
+    aggregates = VersionedAggregates(3, to_sgt_iso(datetime.now(SGT) - timedelta(minutes=1)))
+    service = inventory_service
+    service.aggregates = aggregates
+    key = service.cache.query_key('query_items', category="food")
+    assert (await service.read_version("Food"))['version'] == 3
+    service.cache.set(key, {"items": []}, tags=service.cache.category_tags("food"))
+
+    await service.read_version("food")
+    assert service.cache.get(key) is not None
+    aggregates.record['version'] = 4
+    await service.read_version("food")
+    assert service.cache.get(key) is None
+
+@pytest.mark.asyncio
+async def test_no_validators_until_a_write_settles(monkeypatch, inventory_service):
+    monkeypatch.setattr(settings, "ETAG_SETTLE_SECONDS", 60)
+    inventory_service.aggregates = VersionedAggregates(3, to_sgt_iso(datetime.now(SGT)))
+    assert await inventory_service.read_version() is None
+
+@pytest.mark.asyncio
+async def test_changed_since_rejects_an_unreadable_timestamp(inventory_service):
+    with pytest.raises(HTTPException) as error:
+        await inventory_service.query_changes("not a date")
+    assert error.value.status_code == 400
@@ -0,0 +1,32 @@
+import pytest
+from decimal import Decimal
+from datetime import datetime
+from utils.helpers import (
+    SGT, SGT_ISO_WIDTH, decode_cursor, encode_cursor, get_sgt_time, parse_time_bound, read_price,
+    to_price_number, to_sgt_iso
+)
+
+def test_cursor_round_trip():
+    payload = {"key": {"id": "abc", "price": Decimal("19.99")}, "query": ["tea", None]}
+    assert decode_cursor(encode_cursor(payload)) == payload
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_price_is_stored_as_cents_number():
+    assert to_price_number(19.999) == Decimal("20.00")
+    assert to_price_number(5) == Decimal("5.00")
+
+@pytest.mark.parametrize("stored", ["19.99", Decimal("19.99")])
+def test_read_price_accepts_string_and_number_rows(stored):
+    assert read_price(stored) == Decimal("19.99")
+
+def test_timestamps_are_fixed_width():
+    assert to_sgt_iso(datetime(2025, 1, 1, 10, tzinfo=SGT)) == "2025-01-01T10:00:00.000000+08:00"
+    assert len(get_sgt_time()) == SGT_ISO_WIDTH
+
+def test_time_bounds_are_normalised_to_sgt():
+    _, iso = parse_time_bound("2025-01-01T00:00:00Z")
+    assert iso == "2025-01-01T08:00:00.000000+08:00"
+    assert parse_time_bound("2025-01-01T00:00:00Z") is parse_time_bound("2025-01-01T00:00:00Z")
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+from core.models import BatchUpsertResponse
+from services.importer import ItemImporter, iter_lines
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+async def _lines(text):
+    for line in text.splitlines():
+        yield line
+
+class FakeService:
+    def __init__(self):
+        self.batches = []
+        self.active = 0
+        self.max_active = 0
+
+    async def batch_upsert_items(self, items):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.batches.append([item.item_name for item in items])
+        return BatchUpsertResponse(results=[], created=len(items), updated=0, failed=0)
+
+@pytest.mark.asyncio
+async def test_iter_lines_handles_split_utf8_and_lines():
+    lines = [line async for line in iter_lines(_chunks(b'{"a": "caf', b'\xc3', b'\xa9"}\r\n{"b"', b': 1}'))]
+    assert lines == ['{"a": "café"}', '{"b": 1}']
+
+@pytest.mark.asyncio
+async def test_importer_validates_normalises_and_chunks_ndjson():
+    rows = [{"name": f"Item {i}", "category": "Food", "price": 1 + i} for i in range(7)]
+    text = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n" + json.dumps({"name": "x", "category": "y", "price": 0})
+    service = FakeService()
+    reports = [r async for r in ItemImporter(service, chunk_size=3, concurrency=2).run(_lines(text), "ndjson")]
+
+    final = reports[-1]
+    assert final["done"] is True
+    assert (final["rows"], final["accepted"], final["rejected"], final["created"]) == (9, 7, 2, 7)
+    assert [e["line"] for r in reports for e in r.get("errors", [])] == [8, 9]
+    assert sorted(name for batch in service.batches for name in batch) == sorted(f"item {i}" for i in range(7))
+    assert service.max_active <= 2
+
+@pytest.mark.asyncio
+async def test_importer_serialises_chunks_sharing_a_name():
+    text = "name,category,price\nA,food,1\nB,food,2\nA,food,3\nC,food,4\n"
+    service = FakeService()
+    reports = [r async for r in ItemImporter(service, chunk_size=2, concurrency=4).run(_lines(text), "csv")]
+    assert reports[-1]["accepted"] == 4
+    assert service.max_active == 1
+
+@pytest.mark.asyncio
+async def test_import_endpoint_streams_progress(mock_inventory_service, client):
+    async def fake_import(lines, fmt):
+        received = [line async for line in lines]
+        yield {"done": True, "rows": len(received), "format": fmt}
+    mock_inventory_service.import_items = MagicMock(side_effect=fake_import)
+    response = client.post("/items/import?format=csv", content=b"name,category,price\nA,food,1\n")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert json.loads(response.text.splitlines()[-1]) == {"done": True, "rows": 2, "format": "csv"}
+
+def test_import_endpoint_rejects_unknown_format(client):
+    response = client.post("/items/import?format=xml", content=b"<items/>")
+    assert response.status_code == 400
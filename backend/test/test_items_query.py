@@ -1,6 +1,9 @@
+import json
 import pytest
+from unittest.mock import MagicMock
 from datetime import datetime, timedelta
 from urllib.parse import quote
+from routers.items import ndjson_lines
 from test.constants import SGT
 
 @pytest.mark.asyncio
@@ -57,4 +60,73 @@ async def test_query_items_pagination(mock_inventory_service, create_test_items,
         "items": test_items["items"][5:10], "count": 15, "page": 2, "limit": 5
     }
     response = client.get("/query-items/?page=2&limit=5")
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_query_items_cursor_mode(mock_inventory_service, create_test_items, client):
+    test_items = create_test_items(5)
+    mock_inventory_service.query_items_paginated.return_value = {
+        "items": test_items["items"], "count": 5, "page": 1, "limit": 5, "next_cursor": "abc"
+    }
+    response = client.get("/query-items/?limit=5&cursor=")
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] == "abc"
+    assert mock_inventory_service.query_items_paginated.call_args.kwargs["cursor"] == ""
+
+@pytest.mark.asyncio
+async def test_query_items_stream_mode(mock_inventory_service, create_test_items, client):
+    test_items = create_test_items(3)
+
+    async def records():
+        for item in test_items["items"]:
+            yield item
+        yield {"count": 3, "total_price": "35.97"}
+
+    mock_inventory_service.stream_items = MagicMock(return_value=records())
+    response = client.get("/items/?category=test&stream=true")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 4
+    assert lines[-1] == {"count": 3, "total_price": "35.97"}
+    mock_inventory_service.stream_items.assert_called_once_with(dt_from=None, dt_to=None, category="test")
+    mock_inventory_service.query_items.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_query_items_stream_rejects_changed_since(mock_inventory_service, client):
+    mock_inventory_service.stream_items = MagicMock()
+    response = client.get("/items/?stream=true&changed_since=2025-01-01T00:00:00%2B08:00")
+    assert response.status_code == 400
+    mock_inventory_service.stream_items.assert_not_called()
+    mock_inventory_service.query_changes.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_a_dropped_stream_closes_its_records():
+    closed = []
+
+    async def records():
+        try:
+            yield {"id": "1"}
+            yield {"id": "2"}
+        finally:
+            closed.append(True)
+
+    lines = ndjson_lines(records())
+    assert await lines.__anext__() == b'{"id":"1"}\n'
+    await lines.aclose()
+    assert closed == [True]
+
+@pytest.mark.asyncio
+async def test_query_items_limit_is_validated(mock_inventory_service, client):
+    response = client.get("/query-items/?limit=500")
+    assert response.status_code == 422
+    mock_inventory_service.query_items_paginated.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_query_items_returns_rows_as_built(mock_inventory_service, client):
+    row = {"id": "id-1", "item_name": "pen", "category": "stationery", "price": 1.5}
+    mock_inventory_service.query_items_paginated.return_value = {
+        "items": [row], "count": 1, "page": 1, "limit": 10, "next_cursor": None
+    }
+    response = client.get("/query-items/")
+    assert response.json() == {"items": [row], "count": 1, "page": 1, "limit": 10, "next_cursor": None}
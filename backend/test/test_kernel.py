@@ -0,0 +1,60 @@
+import random
+from decimal import Decimal
+import numpy as np
+from services.kernel import page_items, select_items, stable_order, total_price
+from services.snapshot import SnapshotData
+
+def make_items(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            'id': f"id-{i}",
+            'item_name': f"item {rng.randrange(20)}",
+            'category': f"cat {rng.randrange(4)}",
+            'price': Decimal(f"{rng.randint(1, 9)}.{rng.choice(['00', '50', '99'])}"),
+            'last_updated_dt': f"2025-01-{1 + rng.randrange(28):02d}T00:00:00.000000+08:00"
+        }
+        for i in range(count)
+    ]
+
+def test_stable_order_matches_python_sort_with_ties():
+    rng = random.Random(3)
+    for _ in range(200):
+        keys = [rng.randrange(5) for _ in range(rng.randrange(0, 30))]
+        for descending in (False, True):
+            expected = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+            for count in (None, 0, 1, 3, len(keys), len(keys) + 2):
+                got = stable_order(np.array(keys, dtype=np.int64), descending, count).tolist()
+                assert got == (expected if count is None else expected[:count])
+
+def test_batch_kernels_match_the_row_loops():
+    items = make_items(300)
+    # Rows from before prices became Numbers, and one missing the sort field
+    items[5]['price'] = "4.50"
+    del items[9]['last_updated_dt']
+
+    low, high = Decimal("2"), Decimal("5.5")
+    matches = select_items(items, name="item 1", category="cat 2", price_range=(low, high))
+    expected = [
+        item for item in items
+        if "item 1" in item['item_name'] and item['category'] == "cat 2" and low <= Decimal(str(item['price'])) <= high
+    ]
+    assert matches == expected
+    assert total_price(items) == sum(Decimal(str(item['price'])) for item in items)
+
+    for field in ('item_name', 'category', 'last_updated_dt'):
+        for descending in (False, True):
+            ordered = sorted(items, key=lambda x: x.get(field, ""), reverse=descending)
+            assert page_items(items, field, descending, page=3, limit=10) == ordered[20:30]
+
+def test_snapshot_order_keeps_row_order_for_ties():
+    data = SnapshotData()
+    for item in make_items(200):
+        data.load(item)
+    data.build_indexes()
+    rows = data.select(category="cat 1")
+    for field, column in (('price', data.prices), ('category', data.categories), ('last_updated_dt', data.updated)):
+        for descending in (False, True):
+            expected = sorted(rows, key=column.__getitem__, reverse=descending)[:15]
+            assert data.order(rows, field, descending, count=15) == expected
+    assert data.items(rows) == [data.item(row) for row in rows]
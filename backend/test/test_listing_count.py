@@ -0,0 +1,83 @@
+import pytest
+from decimal import Decimal
+
+class QueryTable:
+    # Serves an index query from `rows`, recording each call's Select and Limit
+    name = "Inventory"
+
+    def __init__(self, rows: int):
+        self.rows = [
+            {"id": str(i), "item_name": f"item {i:03d}", "category": "food", "price": Decimal(i), "last_updated_dt": "2025-01-01T08:00:00+08:00"}
+            for i in range(rows)
+        ]
+        self.calls = []
+
+    async def query(self, **params):
+        self.calls.append((params.get("Select"), params.get("Limit")))
+        start = int(params.get("ExclusiveStartKey", {}).get("id", -1)) + 1
+        if params.get("Select") == "COUNT":
+            return {"Count": len(self.rows)}
+        page = self.rows[start:start + params["Limit"]]
+        response = {"Items": page}
+        if start + len(page) < len(self.rows):
+            response["LastEvaluatedKey"] = {"id": page[-1]["id"]}
+        return response
+
+class CountingAggregates:
+    def __init__(self, count: int, seeded: bool = True):
+        self.count = count
+        self.is_seeded = seeded
+        self.scopes = []
+
+    async def seeded(self):
+        return self.is_seeded
+
+    async def get(self, category=None):
+        self.scopes.append(category)
+        return {"count": self.count, "total_price": Decimal("0"), "version": 1, "last_modified": None}
+
+def listing_service(service, rows: int = 300, seeded: bool = True):
+    service.table = QueryTable(rows)
+    service.aggregates = CountingAggregates(rows, seeded)
+    return service
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_field", ["name", "price"])
+async def test_an_unfiltered_page_counts_from_the_aggregate(inventory_service, sort_field):
+    service = listing_service(inventory_service)
+    result = await service._run_paginated_query(
+        name=None, category="Food", price_min=None, price_max=None,
+        page=1, limit=10, sort_field=sort_field, sort_order="asc", cursor=None
+    )
+    assert (len(result["items"]), result["count"]) == (10, 300)
+    assert service.table.calls == [(None, 10)]
+    assert service.aggregates.scopes == ["food"]
+
+@pytest.mark.asyncio
+async def test_unseeded_aggregates_are_not_used_for_counts(inventory_service):
+    service = listing_service(inventory_service, seeded=False)
+    result = await service._run_paginated_query(
+        name=None, category="Food", price_min=None, price_max=None,
+        page=1, limit=10, sort_field="name", sort_order="asc", cursor=None
+    )
+    assert result["count"] == 300
+    assert ("COUNT", None) in service.table.calls
+    assert service.aggregates.scopes == []
+
+@pytest.mark.asyncio
+async def test_a_filtered_page_counts_exactly_unless_an_estimate_is_asked_for(inventory_service):
+    service = listing_service(inventory_service)
+    query = dict(
+        name=None, category=None, price_min=0, price_max=1000,
+        page=2, limit=10, sort_field="price", sort_order="asc", cursor=None
+    )
+    result = await service._run_paginated_query(**query)
+    assert result["count"] == 300
+    assert ("COUNT", None) in service.table.calls
+    assert service.aggregates.scopes == []
+
+    service.table.calls = []
+    result = await service._run_paginated_query(**query, exact_count=False)
+    # Matches read so far, and one more because the index holds more
+    assert result["count"] == 21
+    assert all(select is None for select, _ in service.table.calls)
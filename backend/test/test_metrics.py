@@ -0,0 +1,104 @@
+import boto3
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from botocore.stub import Stubber
+from core.database import AsyncTable
+from core.metrics import (
+    DYNAMODB_CALL_DURATION, DYNAMODB_CALL_ERRORS, DYNAMODB_CONSUMED_CAPACITY, DYNAMODB_RETURNED_ITEMS,
+    DYNAMODB_SCANNED_ITEMS, REQUEST_DURATION, MetricsRegistry, current_route, instrument_dynamodb
+)
+
+def make_client():
+    client = boto3.client(
+        "dynamodb", region_name="ap-southeast-1",
+        aws_access_key_id="test", aws_secret_access_key="test"
+    )
+    instrument_dynamodb(client)
+    return client
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_total", "Demo counter", ("kind",))
+    histogram = registry.histogram("demo_seconds", "Demo latency", ("kind",), buckets=(0.1, 1.0))
+    counter.inc(kind='a"b')
+    counter.inc(2, kind='a"b')
+    histogram.observe(0.05, kind="x")
+    histogram.observe(0.5, kind="x")
+    histogram.observe(5, kind="x")
+    registry.register_collector(lambda: [("demo_entries", "gauge", "Demo gauge", 7)])
+
+    text = registry.render()
+
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{kind="a\\"b"} 3' in text
+    assert 'demo_seconds_bucket{kind="x",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{kind="x",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{kind="x",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{kind="x"} 3' in text
+    assert "demo_entries 7" in text
+
+def test_dynamodb_calls_record_capacity_and_scanned_counts():
+    client = make_client()
+    sent = []
+    client.meta.events.register("before-parameter-build.dynamodb", lambda params, **kwargs: sent.append(dict(params)))
+    labels = {"operation": "Query", "table": "MetricsTest", "route": "/test/query"}
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "query",
+            {"Items": [], "Count": 2, "ScannedCount": 10,
+             "ConsumedCapacity": {"TableName": "MetricsTest", "CapacityUnits": 1.5}}
+        )
+        token = current_route.set("/test/query")
+        try:
+            client.query(
+                TableName="MetricsTest", KeyConditionExpression="id = :id",
+                ExpressionAttributeValues={":id": {"S": "1"}}
+            )
+        finally:
+            current_route.reset(token)
+
+    assert sent[0]["ReturnConsumedCapacity"] == "TOTAL"
+    assert DYNAMODB_CALL_DURATION.count(**labels) == 1
+    assert DYNAMODB_SCANNED_ITEMS.value(**labels) == 10
+    assert DYNAMODB_RETURNED_ITEMS.value(**labels) == 2
+    assert DYNAMODB_CONSUMED_CAPACITY.value(**labels) == 1.5
+
+def test_dynamodb_errors_are_counted_by_code():
+    client = make_client()
+    with Stubber(client) as stubber:
+        stubber.add_client_error("get_item", service_error_code="ConditionalCheckFailedException")
+        with pytest.raises(client.exceptions.ConditionalCheckFailedException):
+            client.get_item(TableName="MetricsErrors", Key={"id": {"S": "1"}})
+
+    assert DYNAMODB_CALL_ERRORS.value(
+        operation="GetItem", table="MetricsErrors", route="-", code="ConditionalCheckFailedException"
+    ) == 1
+
+class RouteRecordingTable:
+    name = "Inventory"
+
+    def get_item(self, Key):
+        return {"route": current_route.get()}
+
+@pytest.mark.asyncio
+async def test_async_table_carries_route_into_worker_thread():
+    table = AsyncTable(RouteRecordingTable(), ThreadPoolExecutor(max_workers=1))
+    token = current_route.set("/items/{item_id}")
+    try:
+        response = await table.get_item(Key={"id": "1"})
+    finally:
+        current_route.reset(token)
+    assert response["route"] == "/items/{item_id}"
+
+def test_request_latency_uses_route_template(client, mock_inventory_service):
+    mock_inventory_service.update_item_price.return_value = {"message": "ok"}
+    labels = {"method": "PUT", "route": "/items/{item_id}/price", "status": "200"}
+    before = REQUEST_DURATION.count(**labels)
+
+    client.put("/items/abc/price", json={"price": 1.5})
+    client.get("/no/such/path")
+
+    assert REQUEST_DURATION.count(**labels) == before + 1
+    text = client.get("/metrics").text
+    assert 'route="unmatched",status="404"' in text
+    assert "inventory_cache_hits_total" in text
@@ -0,0 +1,52 @@
+import pytest
+from decimal import Decimal
+from services.planner import plan_items_query, plan_sorted_query
+
+def test_plan_uses_category_index():
+    plan = plan_items_query(category="food", dt_from="2025-01-01", dt_to="2025-01-31")
+    assert plan.operation == "query"
+    assert plan.index == "CategoryIndex"
+    request = plan.requests[0]
+    assert request["KeyConditionExpression"] == "category = :cat AND last_updated_dt BETWEEN :dt_from AND :dt_to"
+    assert request["ExpressionAttributeValues"][":dt_from"] == "2025-01-01T00:00:00.000000+08:00"
+
+def test_plan_uses_date_index_per_day():
+    plan = plan_items_query(dt_from="2025-01-01T10:00:00+08:00", dt_to="2025-01-03T09:00:00+08:00")
+    assert plan.operation == "query"
+    assert plan.index == "DateIndex"
+    assert [r["ExpressionAttributeValues"][":day"] for r in plan.requests] == [
+        "2025-01-01", "2025-01-02", "2025-01-03"
+    ]
+
+def test_plan_normalises_bounds_to_sgt():
+    plan = plan_items_query(dt_from="2025-01-01T00:00:00Z", dt_to="2025-01-01T12:00:00Z")
+    values = plan.requests[0]["ExpressionAttributeValues"]
+    assert values[":day"] == "2025-01-01"
+    assert values[":dt_from"] == "2025-01-01T08:00:00.000000+08:00"
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"dt_to": "2025-01-01"},
+    {"dt_from": "2020-01-01", "dt_to": "2025-01-01"},
+])
+def test_plan_falls_back_to_scan(params):
+    plan = plan_items_query(**params)
+    assert plan.operation == "scan"
+
+def test_sorted_plan_uses_price_range_as_key_condition():
+    params = plan_sorted_query(category="Food", price_min=1, price_max=5.5, sort_field="price", sort_order="desc")
+    assert params["IndexName"] == "CategoryPriceIndex"
+    assert params["KeyConditionExpression"] == "category = :category AND price BETWEEN :price_min AND :price_max"
+    assert params["ExpressionAttributeValues"][":price_max"] == Decimal("5.5")
+    assert params["ScanIndexForward"] is False
+    assert "FilterExpression" not in params
+
+def test_sorted_plan_by_name_filters_price_and_name():
+    params = plan_sorted_query(name="Tea", price_min=1, price_max=5, sort_field="name")
+    assert params["IndexName"] == "ListingNameIndex"
+    assert params["KeyConditionExpression"] == "listing = :listing"
+    assert params["FilterExpression"] == "price BETWEEN :price_min AND :price_max AND contains(item_name, :name)"
+    assert params["ExpressionAttributeValues"][":name"] == "tea"
+
+def test_sorted_plan_without_index_for_other_fields():
+    assert plan_sorted_query(sort_field="category") is None
@@ -0,0 +1,37 @@
+import pytest
+from services.scanner import ParallelScanner
+
+class FakeTable:
+    name = "Inventory"
+
+    def __init__(self, rows, page_size=2, fail_segment=None):
+        self.rows = rows
+        self.page_size = page_size
+        self.fail_segment = fail_segment
+        self.calls = []
+
+    def scan(self, Segment, TotalSegments, ExclusiveStartKey=None, **kwargs):
+        self.calls.append((Segment, TotalSegments, kwargs))
+        if Segment == self.fail_segment:
+            raise RuntimeError("segment failed")
+        rows = [r for i, r in enumerate(self.rows) if i % TotalSegments == Segment]
+        start = ExclusiveStartKey["offset"] if ExclusiveStartKey else 0
+        page = rows[start:start + self.page_size]
+        response = {"Items": page}
+        if start + self.page_size < len(rows):
+            response["LastEvaluatedKey"] = {"offset": start + self.page_size}
+        return response
+
+def test_parallel_scan_returns_every_row_once():
+    table = FakeTable([{"id": str(i)} for i in range(25)])
+    scanner = ParallelScanner(table, segments=4, max_workers=2)
+    items = list(scanner.items(FilterExpression="category = :cat"))
+    assert sorted(int(item["id"]) for item in items) == list(range(25))
+    assert {segment for segment, _, _ in table.calls} == {0, 1, 2, 3}
+    assert all(total == 4 and kwargs == {"FilterExpression": "category = :cat"} for _, total, kwargs in table.calls)
+
+def test_parallel_scan_propagates_segment_errors():
+    table = FakeTable([{"id": str(i)} for i in range(10)], fail_segment=1)
+    scanner = ParallelScanner(table, segments=2)
+    with pytest.raises(RuntimeError):
+        list(scanner.items())
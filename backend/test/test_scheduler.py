@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from core.database import AsyncTable
+from core.scheduler import CapacityExceeded, CapacityScheduler
+from services.scanner import ParallelScanner
+
+class FaultyTable:
+    # Local stand-in for a DynamoDB table that throttles on demand: the first
+    # `throttles` calls of each operation fail with `code`, later ones succeed
+    name = "Faulty"
+
+    def __init__(self, throttles: int = 0, code: str = "ProvisionedThroughputExceededException", delay: float = 0):
+        self.throttles = {}
+        self.default_throttles = throttles
+        self.code = code
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str, **params) -> dict:
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append((operation, time.monotonic()))
+            remaining = self.throttles.setdefault(operation, self.default_throttles)
+            if remaining:
+                self.throttles[operation] = remaining - 1
+        if remaining:
+            raise ClientError({"Error": {"Code": self.code, "Message": "Rate exceeded"}}, operation)
+        return {"Item": {"id": params.get("Key", {}).get("id")}, "Items": [], "operation": operation}
+
+    def get_item(self, **params):
+        return self._call("get_item", **params)
+
+    def update_item(self, **params):
+        return self._call("update_item", **params)
+
+    def scan(self, **params):
+        return self._call("scan", **params)
+
+def make_scheduler(read=1000, scan=1000, write=1000, max_queue=100, max_retries=3) -> CapacityScheduler:
+    return CapacityScheduler(
+        "Faulty", {'read': read, 'scan': scan, 'write': write}, 1, max_queue, max_retries, 0.001, 0.01
+    )
+
+def make_table(table: FaultyTable, scheduler: CapacityScheduler) -> AsyncTable:
+    return AsyncTable(table, ThreadPoolExecutor(max_workers=8), scheduler)
+
+@pytest.mark.asyncio
+async def test_throttled_calls_are_retried_and_slow_the_class_down():
+    table = FaultyTable(throttles=2)
+    scheduler = make_scheduler()
+    response = await make_table(table, scheduler).get_item(Key={"id": "a"})
+    assert response["Item"] == {"id": "a"}
+    assert len(table.calls) == 3
+    # Two throttles halve the point-read rate twice, and slow scans down with it
+    assert scheduler.buckets['read'].rate < 300
+    assert scheduler.buckets['scan'].rate < 300
+    assert scheduler.buckets['write'].rate == 1000
+
+@pytest.mark.asyncio
+async def test_persistent_throttling_becomes_a_429_with_retry_after():
+    table = FaultyTable(throttles=100, code="ThrottlingException")
+    with pytest.raises(CapacityExceeded) as error:
+        await make_table(table, make_scheduler(max_retries=2)).update_item(Key={"id": "a"})
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) >= 1
+    assert len(table.calls) == 3
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_without_slowing_down():
+    table = FaultyTable(throttles=2, code="InternalServerError")
+    scheduler = make_scheduler()
+    await make_table(table, scheduler).get_item(Key={"id": "a"})
+    assert len(table.calls) == 3
+    assert scheduler.buckets['read'].rate == 1000
+
+    table = FaultyTable(throttles=100, code="ServiceUnavailable")
+    with pytest.raises(ClientError):
+        await make_table(table, make_scheduler(max_retries=2)).get_item(Key={"id": "a"})
+    assert len(table.calls) == 3
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    table = FaultyTable(throttles=5, code="ConditionalCheckFailedException")
+    with pytest.raises(ClientError):
+        await make_table(table, make_scheduler()).update_item(Key={"id": "a"})
+    assert len(table.calls) == 1
+
+@pytest.mark.asyncio
+async def test_calls_are_paced_by_the_class_rate():
+    table = FaultyTable()
+    start = time.monotonic()
+    async_table = make_table(table, make_scheduler(read=50))
+    # The one-second burst covers 50 calls; ten more take a fifth of a second,
+    # however long the burst itself took to run
+    await asyncio.gather(*(async_table.get_item(Key={"id": str(i)}) for i in range(60)))
+    assert 0.18 < time.monotonic() - start < 1
+
+@pytest.mark.asyncio
+async def test_a_full_queue_sheds_new_calls():
+    table = FaultyTable()
+    async_table = make_table(table, make_scheduler(write=10, max_queue=5))
+    results = await asyncio.gather(
+        *(async_table.update_item(Key={"id": str(i)}) for i in range(30)), return_exceptions=True
+    )
+    shed = [result for result in results if isinstance(result, CapacityExceeded)]
+    # Ten go straight through on the burst, five wait, the rest are refused
+    assert len(shed) == 15
+    assert len(table.calls) == 15
+
+@pytest.mark.asyncio
+async def test_point_reads_are_not_queued_behind_scans():
+    table = FaultyTable()
+    scheduler = make_scheduler(read=20, scan=1000)
+    async_table = make_table(table, scheduler)
+    # A backlog of point reads holds scans back as well
+    reads = [asyncio.ensure_future(async_table.get_item(Key={"id": str(i)})) for i in range(25)]
+    await asyncio.sleep(0)
+    assert scheduler.buckets['read'].backlog() > 0.1
+    await asyncio.gather(async_table.scan(), *reads)
+    operations = [operation for operation, _ in table.calls]
+    assert operations.index("scan") > 20
+
+def test_parallel_scan_segments_retry_throttled_pages():
+    table = FaultyTable(throttles=2)
+    scanner = ParallelScanner(table, segments=2, max_workers=2, scheduler=make_scheduler())
+    assert list(scanner.items()) == []
+    assert len(table.calls) == 4
+
+def test_a_shed_call_reaches_the_client_as_429(mock_inventory_service, client):
+    mock_inventory_service.get_summary.side_effect = CapacityExceeded("read", 2.5)
+    response = client.get("/items/summary")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+    assert isinstance(CapacityExceeded("read", 0), HTTPException)
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from services.search import NameSearchIndex
+
+def names_loader(names):
+    async def load():
+        for item_id, item_name in names.items():
+            yield item_id, item_name
+    return load
+
+@pytest.mark.asyncio
+async def test_search_matches_substrings():
+    index = NameSearchIndex(names_loader({"1": "apple juice", "2": "pineapple", "3": "banana"}), 300)
+    await index.ensure_loaded()
+    assert sorted(index.search("apple")) == ["1", "2"]
+    assert index.search("Juice") == ["1"]
+    assert index.search("grape") == []
+    assert sorted(index.search("an")) == ["3"]
+
+@pytest.mark.asyncio
+async def test_search_follows_writes():
+    index = NameSearchIndex(names_loader({"1": "apple juice"}), 300)
+    await index.ensure_loaded()
+    index.add("2", "apple pie")
+    index.remove("1")
+    assert index.search("apple") == ["2"]
+
+@pytest.mark.asyncio
+async def test_search_gives_up_on_broad_queries():
+    index = NameSearchIndex(names_loader({str(i): f"item {i}" for i in range(20)}), 300)
+    await index.ensure_loaded()
+    assert index.search("item", limit=10) is None
+    assert len(index.search("item", limit=20)) == 20
+
+@pytest.mark.asyncio
+async def test_rebuild_keeps_writes_made_during_the_scan():
+    index = NameSearchIndex(None, 300)
+
+    async def load():
+        yield "1", "apple juice"
+        index.add("2", "apple pie")
+        index.remove("1")
+    index.loader = load
+    await index.ensure_loaded()
+    assert index.search("apple") == ["2"]
+
+def test_writes_before_the_first_build_are_skipped():
+    index = NameSearchIndex(None, 300)
+    index.add("1", "apple juice")
+    index.remove("2")
+    assert len(index) == 0
+
+@pytest.mark.asyncio
+async def test_catch_up_adds_names_written_by_other_workers():
+    reads = []
+
+    async def changes(since):
+        reads.append(since)
+        return [("2", "apple pie")]
+
+    index = NameSearchIndex(names_loader({"1": "apple juice"}), 300, changes)
+    await index.ensure_loaded()
+    assert index.search("pie") == []
+    await asyncio.gather(index.catch_up(), index.catch_up())
+    assert index.search("pie") == ["2"]
+    # Concurrent searches share one read, which starts from the build's watermark
+    assert len(reads) == 1
+
+@pytest.mark.asyncio
+async def test_a_failed_catch_up_is_reported():
+    async def changes(since):
+        raise RuntimeError("DateIndex unavailable")
+
+    index = NameSearchIndex(names_loader({"1": "apple juice"}), 300, changes)
+    await index.ensure_loaded()
+    with pytest.raises(RuntimeError):
+        await index.catch_up()
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from core.config import settings
+from services.cache import InventoryCache, NullCache
+from services.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_read():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    reads = []
+
+    async def read(key):
+        reads.append(key)
+        await release.wait()
+        return {"key": key}
+
+    calls = [asyncio.ensure_future(flights.run(key, lambda key=key: read(key))) for key in ("a", "a", "a", "b")]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert sorted(reads) == ["a", "b"]
+    assert results[0] is results[1] is results[2]
+    assert (flights.started, flights.coalesced, flights.in_flight) == (2, 2, 0)
+
+@pytest.mark.asyncio
+async def test_failure_reaches_every_caller_and_frees_the_key():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("throttled")
+
+    calls = [asyncio.ensure_future(flights.run("a", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def succeeding():
+        return 1
+
+    assert await flights.run("a", succeeding) == 1
+
+@pytest.mark.asyncio
+async def test_a_cancelled_caller_does_not_cancel_the_shared_read():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def read():
+        await release.wait()
+        return 1
+
+    first = asyncio.ensure_future(flights.run("a", read))
+    second = asyncio.ensure_future(flights.run("a", read))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == 1
+    assert first.cancelled()
+
+@pytest.mark.asyncio
+async def test_callers_after_a_write_start_a_new_read():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    reads = []
+
+    async def read():
+        reads.append(len(reads))
+        await release.wait()
+        return len(reads)
+
+    before = asyncio.ensure_future(flights.run("a", read))
+    await asyncio.sleep(0)
+    flights.forget()
+    after = asyncio.ensure_future(flights.run("a", read))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(before, after)
+    assert reads == [0, 1]
+    assert flights.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_identical_paginated_queries_run_one_dynamodb_read(monkeypatch, inventory_service):
+    monkeypatch.setattr(settings, "SNAPSHOT_ENABLED", False)
+    service = inventory_service
+    service.cache = InventoryCache(NullCache(), ttl=30)
+    reads = []
+
+    async def run_paginated_query(**params):
+        reads.append(params)
+        await asyncio.sleep(0.01)
+        return {"items": [], "count": 0, "page": 1, "limit": 10, "next_cursor": None}
+
+    service._run_paginated_query = run_paginated_query
+    # Filters differing only in case share the read, as they share a cache entry
+    results = await asyncio.gather(*(
+        service.query_items_paginated(category=category) for category in ["Food"] * 10 + ["food"] * 10 + ["toys"]
+    ))
+    assert len(reads) == 2
+    assert all(result is results[0] for result in results[:20])
@@ -0,0 +1,114 @@
+import asyncio
+import random
+import time
+import pytest
+from decimal import Decimal
+from services.snapshot import InventorySnapshot, SnapshotData, price_bounds, time_bounds
+
+def make_item(i: int, price: str = None, dt: str = "2025-01-01T00:00:00.000000+08:00", category: str = None) -> dict:
+    return {
+        'id': f"id-{i}",
+        'item_name': f"item {i:03d}",
+        'category': category or f"cat {i % 3}",
+        'price': Decimal(price or f"{1 + i % 7}.{i % 100:02d}"),
+        'last_updated_dt': dt
+    }
+
+def loaded(items) -> SnapshotData:
+    data = SnapshotData()
+    for item in items:
+        data.load(item)
+    data.build_indexes()
+    return data
+
+def test_select_and_order_match_a_plain_filter_and_sort():
+    rng = random.Random(1)
+    items = [make_item(i, dt=f"2025-01-{1 + i % 28:02d}T00:00:00.000000+08:00") for i in range(200)]
+    data = loaded(items)
+    # Live writes must leave the same answers as a fresh load
+    for i in rng.sample(range(200), 40):
+        items[i] = make_item(i, price=f"{rng.randint(1, 9)}.50", dt="2025-02-01T00:00:00.000000+08:00", category="cat 9")
+        data.upsert(items[i])
+    for i in sorted(rng.sample(range(200), 30), reverse=True):
+        data.remove(items.pop(i)['id'])
+
+    low, high = price_bounds(2, 5.5)
+    rows = data.select(category="cat 9", price_range=(low, high))
+    expected = [item for item in items if item['category'] == "cat 9" and 2 <= item['price'] <= Decimal("5.5")]
+    assert sorted(data.ids[r] for r in rows) == sorted(item['id'] for item in expected)
+    assert data.total(rows) == sum(item['price'] for item in expected)
+
+    ordered = data.order(data.select(), "price", descending=True, count=len(items))
+    assert [data.prices[r] for r in ordered] == sorted((int(item['price'] * 100) for item in items), reverse=True)
+    ordered = data.order(data.select(name="item 1"), "name", descending=False, count=5)
+    assert [data.names[r] for r in ordered] == sorted(item['item_name'] for item in items if "item 1" in item['item_name'])[:5]
+
+    rows = data.select(time_range=time_bounds("2025-01-10", "2025-01-20T00:00:00+08:00"))
+    expected = [item for item in items if "2025-01-10" <= item['last_updated_dt'][:10] <= "2025-01-20"]
+    assert len(rows) == len(expected)
+
+def test_upsert_ignores_an_older_copy():
+    data = loaded([make_item(1, price="5.00", dt="2025-01-02T00:00:00.000000+08:00")])
+    data.upsert(make_item(1, price="9.00", dt="2025-01-01T00:00:00.000000+08:00"))
+    assert data.item(data.rows["id-1"])['price'] == 5.0
+    assert data.by_price == [(500, "id-1")]
+
+@pytest.mark.asyncio
+async def test_rebuild_replays_writes_made_during_the_scan():
+    release = asyncio.Event()
+
+    async def load():
+        yield make_item(1)
+        yield make_item(2)
+        await release.wait()
+
+    async def no_changes(since):
+        return []
+
+    snapshot = InventorySnapshot(load, no_changes, refresh_seconds=5, rebuild_seconds=900, max_staleness_seconds=30)
+    build = asyncio.ensure_future(snapshot.ensure_loaded())
+    await asyncio.sleep(0)
+    snapshot.upsert(make_item(3))
+    snapshot.remove("id-1")
+    release.set()
+    await build
+
+    assert snapshot.ready and snapshot.fresh
+    assert sorted(snapshot.data.ids) == ["id-2", "id-3"]
+
+@pytest.mark.asyncio
+async def test_delta_does_not_bring_back_a_local_delete():
+    changes = asyncio.Queue()
+
+    async def load():
+        yield make_item(1)
+
+    async def read_changes(since):
+        assert since is not None
+        return await changes.get()
+
+    snapshot = InventorySnapshot(load, read_changes, refresh_seconds=0, rebuild_seconds=900, max_staleness_seconds=30)
+    await snapshot.ensure_loaded()
+    delta = asyncio.ensure_future(snapshot._apply_delta())
+    await asyncio.sleep(0)
+    # Deleted locally after the delta read started, then the read returns the old row
+    snapshot.remove("id-1")
+    changes.put_nowait([make_item(1), make_item(2)])
+    await delta
+
+    assert sorted(snapshot.data.ids) == ["id-2"]
+
+def test_snapshot_past_its_staleness_bound_is_not_fresh():
+    snapshot = InventorySnapshot(None, None, refresh_seconds=5, rebuild_seconds=900, max_staleness_seconds=30)
+    assert not snapshot.fresh
+    snapshot._built_at = snapshot._synced_at = time.monotonic() - 10
+    assert snapshot.fresh
+    snapshot._synced_at = time.monotonic() - 31
+    assert not snapshot.fresh
+
+def test_writes_before_the_first_build_are_skipped():
+    snapshot = InventorySnapshot(None, None, refresh_seconds=5, rebuild_seconds=900, max_staleness_seconds=30)
+    snapshot.upsert(make_item(1))
+    snapshot.remove("id-2")
+    assert len(snapshot.data) == 0
+    assert snapshot.generation == 0
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import pytest
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from services.aggregates import AggregateDeltas
+from services.writebehind import BufferedPrice, PriceBuffer
+
+class RecordingWriter:
+    def __init__(self, outcomes=None):
+        self.batches = []
+        # item id -> outcomes to return on successive writes; "written" otherwise
+        self.outcomes = outcomes or {}
+
+    async def __call__(self, updates):
+        self.batches.append([(update.item_id, update.price) for update in updates])
+        return {
+            update.item_id: (self.outcomes.get(update.item_id) or ["written"]).pop(0)
+            for update in updates
+        }
+
+def make_buffer(tmp_path, write, max_batch=100, flush_seconds=60, max_pending=1000, owner="w1") -> PriceBuffer:
+    return PriceBuffer(write, str(tmp_path), max_batch, flush_seconds, max_pending, owner=owner)
+
+async def crash(buffer: PriceBuffer):
+    # Stops the flush loop without the final flush that stop() does, and lets
+    # go of the directory as the kernel would for a dead process
+    buffer._task.cancel()
+    await asyncio.gather(buffer._task, return_exceptions=True)
+    buffer._owner_lock.close()
+
+@pytest.mark.asyncio
+async def test_updates_to_one_item_are_coalesced_by_timestamp(tmp_path):
+    writer = RecordingWriter()
+    buffer = make_buffer(tmp_path, writer)
+    await buffer.start()
+    assert await buffer.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    assert await buffer.submit("a", Decimal("3.00"), "2025-01-01T08:00:03.000000+08:00")
+    # Arrives late but is older, so it does not replace the newer price
+    assert await buffer.submit("a", Decimal("2.00"), "2025-01-01T08:00:02.000000+08:00")
+    assert await buffer.submit("b", Decimal("5.00"), "2025-01-01T08:00:01.000000+08:00")
+    assert buffer.depth == 2
+
+    await buffer.flush()
+    assert writer.batches == [[("a", Decimal("3.00")), ("b", Decimal("5.00"))]]
+    assert (buffer.depth, buffer.accepted, buffer.coalesced, buffer.written) == (0, 4, 2, 2)
+    assert sorted(os.listdir(buffer.journal_dir)) == ["000000000002.journal", "owner.lock"]
+    await buffer.stop()
+    # A clean stop with nothing left to write leaves nothing to replay
+    assert os.listdir(tmp_path) == ["recovery.lock"]
+
+@pytest.mark.asyncio
+async def test_acknowledged_updates_survive_a_crash(tmp_path):
+    first = make_buffer(tmp_path, RecordingWriter())
+    await first.start()
+    await first.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    await first.submit("a", Decimal("4.00"), "2025-01-01T08:00:04.000000+08:00")
+    await crash(first)
+    # A crash can cut the last line short; it was never acknowledged
+    with open(os.path.join(first.journal_dir, "000000000001.journal"), "ab") as journal:
+        journal.write(b'{"id": "b", "pri')
+
+    # Another worker adopts the dead one's journal and removes it
+    writer = RecordingWriter()
+    second = make_buffer(tmp_path, writer, owner="w2")
+    await second.start()
+    assert second.depth == 1
+    assert sorted(os.listdir(tmp_path)) == ["recovery.lock", "w2"]
+    assert sorted(os.listdir(second.journal_dir)) == ["000000000001.journal", "owner.lock"]
+    await second.stop()
+    assert writer.batches == [[("a", Decimal("4.00"))]]
+
+@pytest.mark.asyncio
+async def test_a_restart_with_the_same_owner_replays_its_own_journal(tmp_path):
+    first = make_buffer(tmp_path, RecordingWriter())
+    await first.start()
+    await first.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    await crash(first)
+
+    second = make_buffer(tmp_path, RecordingWriter())
+    await second.start()
+    assert list(second._pending) == ["a"]
+    assert sorted(os.listdir(second.journal_dir)) == ["000000000002.journal", "owner.lock"]
+    await second.stop()
+
+@pytest.mark.asyncio
+async def test_live_workers_keep_their_journals(tmp_path):
+    first = make_buffer(tmp_path, RecordingWriter())
+    await first.start()
+    await first.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+
+    second = make_buffer(tmp_path, RecordingWriter(), owner="w2")
+    await second.start()
+    assert second.depth == 0
+    assert first.depth == 1
+    assert os.path.exists(os.path.join(first.journal_dir, "000000000001.journal"))
+    # Two processes can never share a directory
+    with pytest.raises(RuntimeError):
+        await make_buffer(tmp_path, RecordingWriter()).start()
+    await second.stop()
+    await first.stop()
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_retried_and_stay_journaled(tmp_path):
+    writer = RecordingWriter({"a": ["failed"], "gone": ["dropped"]})
+    buffer = make_buffer(tmp_path, writer)
+    await buffer.start()
+    await buffer.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    await buffer.submit("gone", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    await buffer.flush()
+    assert (buffer.depth, buffer.failed, buffer.dropped) == (1, 1, 1)
+    await crash(buffer)
+
+    recovered = make_buffer(tmp_path, RecordingWriter(), owner="w2")
+    await recovered.start()
+    assert list(recovered._pending) == ["a"]
+    await recovered.stop()
+
+class BlockedWriter(RecordingWriter):
+    # Holds every write until release is set
+    def __init__(self):
+        super().__init__()
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, updates):
+        self.started.set()
+        await self.release.wait()
+        return await super().__call__(updates)
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_a_flush_in_progress(tmp_path):
+    writer = BlockedWriter()
+    buffer = make_buffer(tmp_path, writer, max_batch=1)
+    await buffer.start()
+    await buffer.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    await asyncio.wait_for(writer.started.wait(), timeout=1)
+
+    stopping = asyncio.create_task(buffer.stop())
+    await asyncio.sleep(0.05)
+    # The flush loop is not cancelled out from under the write
+    assert not stopping.done()
+    assert os.path.exists(os.path.join(buffer.journal_dir, "000000000001.journal"))
+    writer.release.set()
+    await asyncio.wait_for(stopping, timeout=1)
+    assert writer.batches == [[("a", Decimal("1.00"))]]
+    assert os.listdir(tmp_path) == ["recovery.lock"]
+
+@pytest.mark.asyncio
+async def test_a_cancelled_flush_keeps_its_batch_and_segment(tmp_path):
+    writer = BlockedWriter()
+    buffer = make_buffer(tmp_path, writer)
+    await buffer.start()
+    await buffer.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    flushing = asyncio.create_task(buffer.flush())
+    await asyncio.wait_for(writer.started.wait(), timeout=1)
+    # A newer price arrives while the old one is being written
+    await buffer.submit("a", Decimal("2.00"), "2025-01-01T08:00:02.000000+08:00")
+    flushing.cancel()
+    await asyncio.gather(flushing, return_exceptions=True)
+
+    assert buffer._pending["a"].price == Decimal("2.00")
+    assert sorted(os.listdir(buffer.journal_dir)) == ["000000000001.journal", "000000000002.journal", "owner.lock"]
+    writer.release.set()
+    await buffer.flush()
+    assert writer.batches == [[("a", Decimal("2.00"))]]
+    assert sorted(os.listdir(buffer.journal_dir)) == ["000000000003.journal", "owner.lock"]
+    await buffer.stop()
+
+@pytest.mark.asyncio
+async def test_a_full_batch_flushes_before_the_timer(tmp_path):
+    writer = RecordingWriter()
+    buffer = make_buffer(tmp_path, writer, max_batch=2)
+    await buffer.start()
+    await buffer.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    await buffer.submit("b", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    for _ in range(100):
+        if writer.batches:
+            break
+        await asyncio.sleep(0.01)
+    assert writer.batches == [[("a", Decimal("1.00")), ("b", Decimal("1.00"))]]
+    await buffer.stop()
+
+@pytest.mark.asyncio
+async def test_a_full_buffer_hands_new_items_back(tmp_path):
+    buffer = make_buffer(tmp_path, RecordingWriter(), max_pending=1)
+    assert not await buffer.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    await buffer.start()
+    assert await buffer.submit("a", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    assert not await buffer.submit("b", Decimal("1.00"), "2025-01-01T08:00:01.000000+08:00")
+    # Items already buffered can still be updated
+    assert await buffer.submit("a", Decimal("2.00"), "2025-01-01T08:00:02.000000+08:00")
+    await buffer.stop()
+
+class RecordingAggregates:
+    def __init__(self):
+        self.applied = []
+
+    async def apply(self, deltas: AggregateDeltas):
+        self.applied.append(deltas.scopes())
+
+@pytest.mark.asyncio
+async def test_a_flush_writes_conditionally_and_applies_deltas_once(inventory_service):
+    service = inventory_service
+    service.aggregates = RecordingAggregates()
+    calls = []
+
+    async def set_price(item_id, price, now, only_if_older=False):
+        calls.append((item_id, only_if_older))
+        if item_id == "gone":
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "UpdateItem")
+        return {"id": item_id, "category": "food", "price": Decimal("1.00")}
+
+    service._set_price = set_price
+    outcomes = await service._write_prices([
+        BufferedPrice(item_id, Decimal("2.50"), "2025-01-01T08:00:01.000000+08:00", 0)
+        for item_id in ("a", "b", "gone")
+    ])
+    assert outcomes == {"a": "written", "b": "written", "gone": "dropped"}
+    assert all(only_if_older for _, only_if_older in calls)
+    assert len(service.aggregates.applied) == 1
+    assert service.aggregates.applied[0]["category#food"] == (0, Decimal("3.00"))
+
+def test_buffered_price_update_returns_202(mock_inventory_service, client):
+    mock_inventory_service.update_item_price.return_value = {"status": "accepted", "updated_price": "2.50"}
+    response = client.put("/items/some-id/price", json={"price": 2.5})
+    assert response.status_code == 202
+    assert response.json()["status"] == "accepted"
@@ -1,4 +1,10 @@
-from datetime import datetime
+import base64
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Tuple
 from zoneinfo import ZoneInfo
 
 SGT = ZoneInfo("Asia/Singapore")
@@ -6,8 +12,52 @@ SGT = ZoneInfo("Asia/Singapore")
 def format_price(price: float) -> str:
     return f"{price:.2f}"
 
+def to_price_number(price: float) -> Decimal:
+    # Stored as a DynamoDB Number, rounded to cents like the old string format
+    return Decimal(format_price(price))
+
+def read_price(value) -> Decimal:
+    # Rows written before prices became Numbers still hold the formatted string
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+# len("2025-01-01T00:00:00.000000+08:00")
+SGT_ISO_WIDTH = 32
+
 def get_sgt_time() -> str:
-    return datetime.now(SGT).isoformat()
+    return to_sgt_iso(datetime.now(SGT))
+
+def to_sgt_iso(dt: datetime) -> str:
+    # Always microseconds and always +08:00, so stored timestamps and query
+    # bounds order correctly as plain strings
+    return dt.astimezone(SGT).isoformat(timespec='microseconds')
+
+def date_bucket(dt_str: str) -> str:
+    # last_updated_dt is always written in SGT, so the date prefix is the SGT day
+    return dt_str[:10]
+
+def _encode_key_value(value):
+    if isinstance(value, Decimal):
+        return {"N": str(value)}
+    raise TypeError(f"Unsupported cursor value: {value!r}")
+
+def _decode_key_value(value: dict):
+    if set(value) == {"N"}:
+        return Decimal(value["N"])
+    return value
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, default=_encode_key_value, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw, object_hook=_decode_key_value)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(payload, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return payload
 
 def parse_datetime(dt_str: str) -> datetime:
     dt_str = dt_str.strip()
@@ -29,4 +79,30 @@ def parse_datetime(dt_str: str) -> datetime:
                 dt = datetime.strptime(dt_str, "%Y-%m-%d")
                 return dt.replace(tzinfo=SGT)
             except ValueError as e:
-                raise ValueError(f"Invalid datetime format: {dt_str}") from e
\ No newline at end of file
+                raise ValueError(f"Invalid datetime format: {dt_str}") from e
+
+@lru_cache(maxsize=1024)
+def parse_time_bound(dt_str: str) -> Tuple[datetime, str]:
+    # User-supplied range bounds repeat across requests (dashboards, polling
+    # clients), so the fallback chain above runs once per distinct value
+    dt = parse_datetime(dt_str)
+    return dt, to_sgt_iso(dt)
+
+def to_http_date(dt_str: str) -> str:
+    # Last-Modified format; HTTP dates have whole-second precision
+    return format_datetime(parse_datetime(dt_str).astimezone(timezone.utc), usegmt=True)
+
+def parse_since(value: str) -> str:
+    # changed_since accepts an ISO timestamp, like dt_from, or a Last-Modified value
+    try:
+        return parse_time_bound(value)[1]
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid datetime format: {value}") from e
+    if dt.tzinfo is None:
+        # "-0000" dates are UTC with no zone information
+        dt = dt.replace(tzinfo=timezone.utc)
+    return to_sgt_iso(dt)